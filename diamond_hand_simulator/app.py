@@ -1,16 +1,17 @@
 import streamlit as st
+import altair as alt
 import pandas as pd
 import calendar
 from datetime import datetime
-from core.logic import judge_all, calculate_statistics, DEFAULT_THRESHOLD_MIN, DEFAULT_JUDGMENT_HOURS
+from core.logic import judge_table, judge_sweep, calculate_statistics, DEFAULT_THRESHOLD_MIN, DEFAULT_JUDGMENT_HOURS
 from core.liquidation import create_liquidation_model
+from core.aggregate_dataset import AGGREGATE_DATASET_DIRNAME, has_aggregate_dataset, read_aggregate_dataset
+from core.bar_store import BarStore
+from core.detail_view import WEEKDAY_ORDER, build_detail_view_dataframe
 from pathlib import Path
 
 APP_DIR = Path(__file__).resolve().parent
 
-WEEKDAY_ORDER = ['月', '火', '水', '木', '金', '土', '日']
-WEEKDAY_MAP = dict(enumerate(WEEKDAY_ORDER))
-
 COLUMN_LABELS = {
     'date': '日付',
     'weekday_jp': '曜日',
@@ -115,8 +116,21 @@ judgment_hours = judgment_options[judgment_period_label]
 @st.cache_data
 def load_data(threshold_min=2, judgment_hours=None):
     """
-    指定された判定条件のファイルを読み込む（B案: ファイル分割版）
+    指定された判定条件の集計データを読み込む
+
+    Hive パーティション形式のデータセット（_metadata 付き）があればフィルタ付きで読み、
+    無ければ従来の分割ファイル（B案）を読む。
     """
+    dataset_dir = APP_DIR / "data" / "derived" / AGGREGATE_DATASET_DIRNAME
+    if has_aggregate_dataset(dataset_dir):
+        df = read_aggregate_dataset(
+            dataset_dir,
+            threshold_minutes=[threshold_min],
+            judgment_hours=[judgment_hours],
+        )
+        st.sidebar.info(f"Aggregates dataset: {dataset_dir}")
+        return df
+
     # ファイル名を生成
     if judgment_hours is None:
         j_label = 'close'
@@ -138,20 +152,27 @@ def load_data(threshold_min=2, judgment_hours=None):
     
     return df
 
+
 @st.cache_data
-def load_1min_data():
-    """1分足データを読み込み"""
+def load_judgment_windows(threshold_min=2, judgment_hours_list=(None,)):
+    """複数の判定期間の集計データを1回のスキャンで読み込む（データセットが無ければ分割ファイルを順に読む）"""
+    dataset_dir = APP_DIR / "data" / "derived" / AGGREGATE_DATASET_DIRNAME
+    if not has_aggregate_dataset(dataset_dir):
+        return pd.concat(
+            [load_data(threshold_min, j) for j in judgment_hours_list],
+            ignore_index=True,
+        )
+    return read_aggregate_dataset(
+        dataset_dir,
+        threshold_minutes=[threshold_min],
+        judgment_hours=list(judgment_hours_list),
+    )
+
+@st.cache_resource
+def load_bar_store():
+    """1分足のバーストアを開く（CSV の解析は初回のみ、以後はメモリマップ）"""
     path = APP_DIR / "data" / "raw" / "gold_1min_20251101_.csv"
-    df = pd.read_csv(path, parse_dates=['日時'])
-    df = df.rename(columns={
-        '日時': 'timestamp',
-        '始値': 'open',
-        '高値': 'high',
-        '安値': 'low',
-        '終値': 'close'
-    })
-    df.set_index('timestamp', inplace=True)
-    return df
+    return BarStore.from_csv(path)
 
 def _exchange_config_signature():
     """モデル設定の変更をキャッシュキーに反映するためのシグネチャ。"""
@@ -165,55 +186,17 @@ def load_model(config_signature):
     return create_liquidation_model()
 
 
-def derive_weekday_series(date_series):
-    date_parsed = pd.to_datetime(date_series, errors='coerce')
-    return date_parsed.dt.dayofweek.map(WEEKDAY_MAP)
-
-
-def first_available(row, columns):
-    for col in columns:
-        val = row.get(col)
-        if pd.notna(val):
-            return val
-    return pd.NA
-
-
-def build_detail_view_dataframe(results_df, source_df):
-    base_df = results_df.copy()
-    base_df['date'] = pd.to_datetime(base_df.get('date'), errors='coerce').dt.date
-
-    source_meta = source_df.copy()
-    source_meta['date'] = pd.to_datetime(source_meta.get('date'), errors='coerce').dt.date
-
-    optional_cols = [
-        'date', 'skip_minutes', 'used_tier_index', 'used_mm_rate',
-        'used_notional', 'used_tier_min_notional', 'used_tier_max_notional',
-    ]
-    available_meta_cols = [c for c in optional_cols if c in source_meta.columns]
-    if available_meta_cols:
-        source_meta = source_meta[available_meta_cols].drop_duplicates(subset=['date'])
-
-    merged_df = base_df.merge(source_meta, on='date', how='left', suffixes=('', '_src'))
-
-    merged_df['weekday_jp'] = derive_weekday_series(merged_df.get('date'))
-    merged_df['is_loss_cut'] = merged_df.get('symbol', '').astype(str).str.contains('❌|🔵')
-
-    merged_df['move_vs_entry'] = merged_df.apply(
-        lambda row: first_available(row, ['phase2_high', 'phase2_low']) - row.get('entry')
-        if pd.notna(first_available(row, ['phase2_high', 'phase2_low'])) and pd.notna(row.get('entry')) else pd.NA,
-        axis=1,
-    )
-    merged_df['reach_time'] = merged_df.apply(
-        lambda row: first_available(row, ['phase2_high_time', 'phase2_low_time']),
-        axis=1,
-    )
-    merged_df['target_price'] = merged_df.apply(
-        lambda row: first_available(row, ['phase2_high', 'phase2_low']),
-        axis=1,
+@st.cache_data
+def run_sweep(config_signature, threshold_min, leverages, position_margin, additional_margins):
+    """全判定期間 × レバレッジ × 追加証拠金のグリッドを一括集計する"""
+    df_windows = load_judgment_windows(threshold_min, tuple(judgment_options.values()))
+    return judge_sweep(
+        df_windows,
+        load_model(config_signature),
+        leverages,
+        position_margin,
+        additional_margins,
     )
-    merged_df['skip_minutes'] = pd.to_numeric(merged_df.get('skip_minutes'), errors='coerce').fillna(0)
-
-    return merged_df
 
 
 def format_display_dataframe(df, selected_cols):
@@ -256,7 +239,7 @@ try:
 
     st.info(f"📊 読み込んだデータ: {len(df)} 件（判定期間: {judgment_period_label}）")
 
-    df_1min = load_1min_data()
+    bar_store = load_bar_store()
     model = load_model(_exchange_config_signature())
 
     # TierMM の場合、mm_rate を確実に計算させて表示する
@@ -308,15 +291,13 @@ try:
 
     # 判定実行
     with st.spinner(f'判定中...（{len(df)}件のデータ）'):
-        results = judge_all(
+        results = judge_table(
             df,
             model,
             leverage,
             position_margin,
             additional_margin,
-            threshold_min=DEFAULT_THRESHOLD_MIN,
-            judgment_hours=judgment_hours,
-            df_1min=df_1min
+            bars=bar_store,
         )
 
     stats = calculate_statistics(results)
@@ -335,7 +316,7 @@ try:
         st.metric("❌ ロスカット", stats['loss_count'])
 
     # タブで表示切替
-    tab1, tab2, tab3 = st.tabs(["📅 カレンダー表示", "📊 詳細リスト", "📈 統計"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📅 カレンダー表示", "📊 詳細リスト", "📈 統計", "🗺️ パラメータスイープ"])
 
     with tab1:
         st.subheader("月次カレンダー")
@@ -343,14 +324,15 @@ try:
         if len(results) == 0:
             st.warning(f"データがありません。先に build_daily_aggregates.py を実行してください。")
         else:
-            results_df = pd.DataFrame(results)
-            results_df['year_month'] = results_df['date'].apply(lambda x: x.strftime('%Y-%m'))
+            results_df = results.copy()
+            results_df['year_month'] = pd.to_datetime(results_df['date']).dt.strftime('%Y-%m')
 
             for ym in sorted(results_df['year_month'].unique()):
                 year, month = map(int, ym.split('-'))
                 st.markdown(f"### {year}年{month}月")
 
                 month_data = results_df[results_df['year_month'] == ym]
+                day_results = {row.date: row for row in month_data.drop_duplicates(subset=['date']).itertuples(index=False)}
 
                 # 月曜始まりのカレンダーを作成
                 cal = calendar.monthcalendar(year, month)
@@ -368,29 +350,20 @@ try:
                             table_html += '<td style="border: 1px solid #ddd; padding: 8px;"></td>'
                         else:
                             date_obj = datetime(year, month, day).date()
-                            day_result = month_data[month_data['date'] == date_obj]
+                            day_result = day_results.get(date_obj)
 
-                            if len(day_result) > 0:
-                                symbol = day_result.iloc[0]['symbol']
-                                detail = day_result.iloc[0]['detail']
-                                info = day_result.iloc[0]['info']
+                            if day_result is not None:
+                                symbol = day_result.symbol
+                                detail = day_result.detail
 
                                 # ❌の場合はロスカット時間を表示
-                                if '❌' in symbol and info and 'liq_time' in info:
-                                    liq_time = info['liq_time']
-                                    if pd.notna(liq_time):
-                                        time_str = pd.to_datetime(liq_time).strftime('%H:%M')
-                                        display_text = f'{symbol}<br><small>{time_str}</small>'
-                                    else:
-                                        display_text = symbol
+                                if '❌' in symbol and pd.notna(day_result.liq_time):
+                                    time_str = pd.to_datetime(day_result.liq_time).strftime('%H:%M')
+                                    display_text = f'{symbol}<br><small>{time_str}</small>'
                                 # ✅, 🟠の場合は建値割れ時刻を表示
-                                elif ('✅' in symbol or '🟠' in symbol or '💎' in symbol) and info and 'breach_time' in info:
-                                    breach_time = info['breach_time']
-                                    if pd.notna(breach_time):
-                                        time_str = pd.to_datetime(breach_time).strftime('%H:%M')
-                                        display_text = f'{symbol}<br><small>{time_str}</small>'
-                                    else:
-                                        display_text = symbol
+                                elif ('✅' in symbol or '🟠' in symbol or '💎' in symbol) and pd.notna(day_result.breach_time):
+                                    time_str = pd.to_datetime(day_result.breach_time).strftime('%H:%M')
+                                    display_text = f'{symbol}<br><small>{time_str}</small>'
                                 else:
                                     display_text = symbol
 
@@ -413,7 +386,7 @@ try:
         if len(results) == 0:
             st.warning(f"データがありません。")
         else:
-            detail_df = build_detail_view_dataframe(pd.DataFrame(results), df)
+            detail_df = build_detail_view_dataframe(results, df)
             total_count = len(detail_df)
 
             preset = st.selectbox('列プリセット', options=list(PRESET_COLUMNS.keys()), index=0, key='detail_preset')
@@ -571,6 +544,71 @@ try:
                 st.write("TierMMModel: mm_rate not computed yet (run a calculation first)")
 
 
+    with tab4:
+        st.subheader("レバレッジ × 追加証拠金 スイープ")
+        st.caption(f"ポジション証拠金 ${position_margin:.0f}・開場後{DEFAULT_THRESHOLD_MIN}分判定で、全判定期間を一括集計します")
+
+        col_s1, col_s2, col_s3 = st.columns(3)
+        with col_s1:
+            sweep_leverage_range = st.slider("レバレッジ範囲", 10, 2000, (100, 1000), step=10)
+            sweep_leverage_step = st.number_input("レバレッジ刻み", min_value=1, max_value=500, value=10, step=1)
+        with col_s2:
+            sweep_margin_range = st.slider("追加証拠金範囲（USD）", 0, 1000, (0, 200), step=10)
+            sweep_margin_step = st.number_input("追加証拠金刻み（USD）", min_value=1, max_value=500, value=10, step=1)
+        with col_s3:
+            sweep_metric_label = st.radio("表示する指標", ["💎 勝率", "❌ ロスカット率"], horizontal=True)
+            sweep_window_label = st.selectbox(
+                "判定期間（スイープ）",
+                options=list(judgment_options.keys()),
+                index=list(judgment_options.keys()).index(judgment_period_label),
+            )
+
+        sweep_leverages = tuple(range(sweep_leverage_range[0], sweep_leverage_range[1] + 1, int(sweep_leverage_step)))
+        sweep_margins = tuple(range(sweep_margin_range[0], sweep_margin_range[1] + 1, int(sweep_margin_step)))
+
+        with st.spinner(f"スイープ中...（{len(sweep_leverages) * len(sweep_margins)}点 × 全判定期間）"):
+            sweep_df = run_sweep(
+                _exchange_config_signature(),
+                DEFAULT_THRESHOLD_MIN,
+                sweep_leverages,
+                position_margin,
+                sweep_margins,
+            )
+
+        sweep_hours = judgment_options[sweep_window_label]
+        sweep_label = "次の閉場" if sweep_hours is None else f"{sweep_hours}h"
+        window_df = sweep_df[sweep_df['judgment_label'] == sweep_label]
+        metric_col = 'win_rate' if sweep_metric_label == "💎 勝率" else 'loss_rate'
+
+        if window_df.empty:
+            st.info("この判定期間の集計データがありません")
+        else:
+            heatmap = alt.Chart(window_df).mark_rect().encode(
+                x=alt.X('leverage:O', title='レバレッジ'),
+                y=alt.Y('additional_margin:O', title='追加証拠金（USD）', sort='descending'),
+                color=alt.Color(
+                    f'{metric_col}:Q',
+                    title=sweep_metric_label,
+                    scale=alt.Scale(scheme='redyellowgreen', reverse=metric_col == 'loss_rate'),
+                ),
+                tooltip=[
+                    'leverage', 'additional_margin',
+                    alt.Tooltip('win_rate:Q', format='.1f'),
+                    alt.Tooltip('loss_rate:Q', format='.1f'),
+                    'win_count', 'recovery_count', 'warning_count', 'loss_count', 'total',
+                ],
+            )
+            st.altair_chart(heatmap, use_container_width=True)
+
+            st.markdown("#### 判定期間別（現在のレバレッジ・追加証拠金に最も近い点）")
+            nearest = sweep_df.assign(
+                _dist=(sweep_df['leverage'] - leverage).abs() + (sweep_df['additional_margin'] - additional_margin).abs()
+            )
+            nearest = nearest[nearest['_dist'] == nearest['_dist'].min()]
+            st.dataframe(
+                nearest[['judgment_label', 'leverage', 'additional_margin', 'win_rate', 'loss_rate', 'total']],
+                use_container_width=True,
+            )
 
 except FileNotFoundError as e:
     st.error(f"❌ {e}")
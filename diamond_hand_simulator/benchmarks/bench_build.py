@@ -0,0 +1,46 @@
+"""日次集計ビルドのベンチマーク（従来版とベクトル化版）"""
+
+import pytest
+
+from build_daily_aggregates import JUDGMENT_HOURS, THRESHOLD_MINUTES, process_daily_data
+from core.aggregate_engine import process_daily_data_vectorized
+
+# 従来版との比較用（従来版は全組み合わせだと24か月で数分かかる）
+COMPARE_THRESHOLDS = [2]
+COMPARE_JUDGMENTS = [1, 6, None]
+
+
+def test_process_daily_data_reference(run_stage, gold_series):
+    if gold_series['months'] > 6:
+        pytest.skip("従来版は6か月までに制限")
+    run_stage(
+        process_daily_data,
+        gold_series['df_1min'],
+        gold_series['df_market'],
+        COMPARE_THRESHOLDS,
+        COMPARE_JUDGMENTS,
+        rows=len(gold_series['df_market']),
+        rounds=1,
+    )
+
+
+def test_process_daily_data_vectorized(run_stage, gold_series):
+    run_stage(
+        process_daily_data_vectorized,
+        gold_series['df_1min'],
+        gold_series['df_market'],
+        COMPARE_THRESHOLDS,
+        COMPARE_JUDGMENTS,
+        rows=len(gold_series['df_market']),
+    )
+
+
+def test_process_daily_data_vectorized_all_windows(run_stage, gold_series):
+    run_stage(
+        process_daily_data_vectorized,
+        gold_series['df_1min'],
+        gold_series['df_market'],
+        THRESHOLD_MINUTES,
+        JUDGMENT_HOURS,
+        rows=len(gold_series['df_market']),
+    )
@@ -0,0 +1,10 @@
+"""詳細リスト整形（build_detail_view_dataframe）のベンチマーク"""
+
+from core.detail_view import build_detail_view_dataframe
+from core.liquidation import TierMMModel
+from core.logic import judge_table
+
+
+def test_build_detail_view_dataframe(run_stage, gold_series, close_window):
+    results = judge_table(close_window, TierMMModel(), 500, 100, 50, bars=gold_series['df_1min'])
+    run_stage(build_detail_view_dataframe, results, close_window, rows=len(results))
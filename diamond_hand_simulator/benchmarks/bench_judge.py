@@ -0,0 +1,49 @@
+"""判定（judge_all / judge_table / judge_sweep）のベンチマーク"""
+
+from core.liquidation import TierMMModel
+from core.logic import judge_all, judge_sweep, judge_table
+
+LEVERAGE = 500
+POSITION_MARGIN = 100
+ADDITIONAL_MARGIN = 50
+
+
+def test_judge_all(run_stage, gold_series, close_window):
+    run_stage(
+        judge_all,
+        close_window,
+        TierMMModel(),
+        LEVERAGE,
+        POSITION_MARGIN,
+        ADDITIONAL_MARGIN,
+        df_1min=gold_series['df_1min'],
+        rows=len(close_window),
+    )
+
+
+def test_judge_table(run_stage, gold_series, close_window):
+    run_stage(
+        judge_table,
+        close_window,
+        TierMMModel(),
+        LEVERAGE,
+        POSITION_MARGIN,
+        ADDITIONAL_MARGIN,
+        bars=gold_series['df_1min'],
+        rows=len(close_window),
+    )
+
+
+def test_judge_sweep(run_stage, gold_aggregates):
+    leverages = list(range(10, 2001, 10))
+    additional_margins = list(range(0, 201, 10))
+    df = gold_aggregates[gold_aggregates['threshold_min'] == 2]
+    run_stage(
+        judge_sweep,
+        df,
+        TierMMModel(),
+        leverages,
+        POSITION_MARGIN,
+        additional_margins,
+        rows=len(df) * len(leverages) * len(additional_margins),
+    )
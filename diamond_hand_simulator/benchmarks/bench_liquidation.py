@@ -0,0 +1,18 @@
+"""TierMMModel のロスカット価格計算のベンチマーク"""
+
+from core.liquidation import TierMMModel
+
+
+def _per_row(model, entries):
+    return [model.calc_liq_price_long(e, 500, 100, 50) for e in entries]
+
+
+def test_tier_mm_per_row(run_stage, close_window):
+    entries = close_window['long_entry'].tolist()
+    run_stage(_per_row, TierMMModel(), entries, rows=len(entries))
+
+
+def test_tier_mm_array(run_stage, close_window):
+    entries = close_window['long_entry'].to_numpy()
+    model = TierMMModel()
+    run_stage(model.calc_liq_price_long, entries, 500, 100, 50, rows=len(entries))
@@ -0,0 +1,137 @@
+"""
+ベンチマーク共通の設定と合成データ
+
+1分足は実データと同じ休場パターン（毎日 06:00〜08:00、土曜 06:00〜月曜 08:00）で
+1・6・24か月分を生成する。各ベンチマークは計測とは別に1回だけ tracemalloc で実行し、
+ピークメモリを extra_info に記録する。
+"""
+
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+from pytest_benchmark.utils import parse_compare_fail
+
+from build_daily_aggregates import JUDGMENT_HOURS, THRESHOLD_MINUTES, prepare_market_hours
+from core.aggregate_engine import process_daily_data_vectorized
+
+# --benchmark-compare 時に、平均時間がこれ以上悪化したら失敗させる
+REGRESSION_TOLERANCE = os.environ.get('BENCHMARK_TOLERANCE', 'mean:20%')
+
+SERIES_MONTHS = [1, 6, 24]
+SERIES_START = pd.Timestamp('2024-01-01 08:00')
+WEEKEND_GAP = pd.Timedelta(hours=24)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if config.getoption('benchmark_compare', None) and not config.getoption('benchmark_compare_fail', None):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_TOLERANCE)]
+
+
+def make_gold_series(months, seed=0):
+    """休場を含む合成1分足（index=時刻, open/high/low/close/volume）"""
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(SERIES_START, SERIES_START + pd.DateOffset(months=months), freq='1min', inclusive='left')
+
+    minute_of_day = idx.hour * 60 + idx.minute
+    daily_break = (minute_of_day >= 6 * 60) & (minute_of_day < 8 * 60)
+    weekend = (
+        ((idx.dayofweek == 5) & (minute_of_day >= 6 * 60)) |
+        (idx.dayofweek == 6) |
+        ((idx.dayofweek == 0) & (minute_of_day < 8 * 60))
+    )
+    idx = idx[~daily_break & ~weekend]
+
+    close = 2000 + np.cumsum(rng.normal(0, 0.35, len(idx)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.25, (2, len(idx))))
+    # 一部の足はレンジ0（開場基準足のスキップが起きるように）
+    flat = rng.random(len(idx)) < 0.02
+    high = np.where(flat, open_, np.maximum(open_, close) + wick[0])
+    low = np.where(flat, open_, np.minimum(open_, close) - wick[1])
+    close = np.where(flat, open_, close)
+
+    return pd.DataFrame(
+        {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': rng.random(len(idx))},
+        index=idx,
+    )
+
+
+def market_hours_from_bars(df_1min):
+    """15分以上の空白を休場とみなし、build_daily_aggregates 用の市場休場データを作る"""
+    idx = df_1min.index
+    gaps = np.flatnonzero(np.diff(idx.values) > np.timedelta64(15, 'm'))
+    df_market = pd.DataFrame({
+        '閉場日時': idx[gaps],
+        '開場日時': idx[gaps + 1],
+    })
+    df_market['タイプ'] = np.where(
+        df_market['開場日時'] - df_market['閉場日時'] > WEEKEND_GAP, '週末', '日次休場'
+    )
+    df_market, _ = prepare_market_hours(df_market, idx.max())
+    return df_market
+
+
+@pytest.fixture(scope='session', params=SERIES_MONTHS, ids=lambda m: f'{m}mo')
+def gold_series(request):
+    df_1min = make_gold_series(request.param)
+    return {
+        'months': request.param,
+        'df_1min': df_1min,
+        'df_market': market_hours_from_bars(df_1min),
+    }
+
+
+@pytest.fixture(scope='session')
+def gold_aggregates(gold_series):
+    """本番と同じ閾値・判定時間で集計したデータ"""
+    return process_daily_data_vectorized(
+        gold_series['df_1min'],
+        gold_series['df_market'],
+        threshold_minutes=THRESHOLD_MINUTES,
+        judgment_hours=JUDGMENT_HOURS,
+    )
+
+
+@pytest.fixture(scope='session')
+def close_window(gold_aggregates):
+    """app の既定（閾値2分・次の閉場まで）の判定対象"""
+    mask = (gold_aggregates['threshold_min'] == 2) & gold_aggregates['judgment_hours'].isna()
+    return gold_aggregates[mask].reset_index(drop=True)
+
+
+def peak_memory_mb(func, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+@pytest.fixture
+def run_stage(benchmark):
+    """
+    段階を計測する: benchmark.pedantic で時間を測り、件数・スループット・ピークメモリを記録する
+    """
+    def run(func, *args, rows, rounds=3, **kwargs):
+        peak = peak_memory_mb(func, *args, **kwargs)
+        result = benchmark.pedantic(func, args=args, kwargs=kwargs, rounds=rounds, iterations=1)
+        benchmark.extra_info['rows'] = int(rows)
+        # --benchmark-disable のときは時間を測らない（stats が None）
+        if not benchmark.disabled and benchmark.stats is not None:
+            benchmark.extra_info['rows_per_sec'] = rows / benchmark.stats.stats.mean
+        benchmark.extra_info['peak_memory_mb'] = round(peak, 2)
+        return result
+
+    return run
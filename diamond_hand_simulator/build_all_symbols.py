@@ -0,0 +1,89 @@
+"""
+全銘柄の日次集計データをまとめて作成するスクリプト
+
+銘柄ごとにマニフェストを確認してから、全銘柄のセッションを塊に分けて
+1つのプロセスプールに投入する。ワーカーは各銘柄のバーストア（.npy）を
+メモリマップで開くので、1分足はプロセス間で OS のページキャッシュを共有する。
+
+保存先は銘柄ごとに分かれる（GOLD は data/derived、他は data/derived/symbol=<銘柄>/）。
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_daily_aggregates import (
+    collect_aggregate_shards,
+    finish_build,
+    load_exchange_settings,
+    plan_build,
+    submit_aggregate_shards,
+)
+from core.symbols import SYMBOLS, derived_dir, raw_paths
+
+
+def main(symbols=None, full_rebuild=False, workers=None):
+    SCRIPT_DIR = Path(__file__).resolve().parent
+    data_dir = SCRIPT_DIR / "data"
+    symbols = list(SYMBOLS) if not symbols else symbols
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    print("=" * 60)
+    print(f"日次集計データの作成（全銘柄: {len(symbols)}銘柄, {workers}プロセス）")
+    print("=" * 60)
+
+    exchange_settings = load_exchange_settings(
+        SCRIPT_DIR / "config" / "exchanges" / "bingx.yaml"
+    )
+
+    plans = {}
+    for symbol in symbols:
+        bars_csv_path, market_csv_path = raw_paths(data_dir, symbol)
+        if not bars_csv_path.exists() or not market_csv_path.exists():
+            print(f"\n⏭️ [{symbol}] 入力ファイルが無いためスキップ: {bars_csv_path.name}, {market_csv_path.name}")
+            continue
+        plan = plan_build(
+            market_csv_path,
+            bars_csv_path,
+            derived_dir(data_dir, symbol),
+            exchange_settings,
+            full_rebuild,
+            label=f"[{symbol}] ",
+        )
+        if plan is not None:
+            plans[symbol] = plan
+
+    if not plans:
+        print("\n✅ 集計が必要な銘柄はありません")
+        return
+
+    # 全銘柄のセッションの塊を先に投入し、銘柄ごとに結果を受け取って保存する
+    print(f"\n[2/5] 日次集計中...（{', '.join(plans)}）")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            symbol: submit_aggregate_shards(
+                executor, plan['store_root'], plan['df_market_target'], exchange_settings, workers
+            )
+            for symbol, plan in plans.items()
+        }
+        for symbol, symbol_futures in futures.items():
+            finish_build(plans[symbol], collect_aggregate_shards(symbol_futures))
+
+    print("\n[5/5] 完了")
+    print(f"✅ {len(plans)}銘柄の集計データを保存しました")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="全銘柄の日次集計データを作成する")
+    parser.add_argument('symbols', nargs='*', type=str.upper,
+                        help=f"対象銘柄（{', '.join(SYMBOLS)}。省略時は全銘柄）")
+    parser.add_argument('--full', action='store_true',
+                        help="マニフェストを無視して全セッションを再構築する")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="プロセス数（省略時は CPU コア数）")
+    args = parser.parse_args()
+    unknown = [s for s in args.symbols if s not in SYMBOLS]
+    if unknown:
+        parser.error(f"未知の銘柄: {', '.join(unknown)}")
+    main(symbols=args.symbols, full_rebuild=args.full, workers=args.workers)
@@ -5,12 +5,21 @@
 判定時間ごとに分割して保存する。
 """
 
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import timedelta
+import pyarrow.parquet as pq
 import yaml
 
+from core.aggregate_dataset import AGGREGATE_DATASET_DIRNAME, write_aggregate_dataset
+from core.aggregate_engine import aggregates_to_table, process_daily_data_vectorized
+from core.bar_store import NS_PER_MINUTE, BarStore, file_fingerprint, is_appended_since
 from core.open_reference import (
     DEFAULT_OPEN_BAR_MAX_SKIP,
     DEFAULT_OPEN_BAR_OFFSET_MINUTES,
@@ -18,6 +27,7 @@ from core.open_reference import (
     resolve_price_tick,
     select_open_reference_bar,
 )
+from core.symbols import DEFAULT_SYMBOL, derived_dir, raw_paths
 
 
 def load_exchange_settings(config_path):
@@ -95,7 +105,9 @@ def process_daily_data(df_1min, df_market, threshold_minutes=[1],
                       open_bar_max_skip=DEFAULT_OPEN_BAR_MAX_SKIP,
                       price_tick=DEFAULT_PRICE_TICK_FALLBACK):
     """
-    日次集計データを作成
+    日次集計データを作成（参照実装）
+
+    main() は同じ結果を返す core.aggregate_engine.process_daily_data_vectorized を使う。
     """
     results = []
 
@@ -208,128 +220,388 @@ def process_daily_data(df_1min, df_market, threshold_minutes=[1],
 
     return pd.DataFrame(results)
 
-def main():
-    SCRIPT_DIR = Path(__file__).resolve().parent
 
-    print("=" * 60)
-    print("日次集計データの作成（複数時間窓対応版 + ファイル分割版）")
-    print("=" * 60)
+THRESHOLD_MINUTES = [1, 2, 3, 4, 5]
+JUDGMENT_HOURS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12,
+                  13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, None]
 
-    # データ読み込み
-    print("\n[1/5] データ読み込み中...")
-    market_csv_path = SCRIPT_DIR / "data" / "raw" / "market_hours_20251101_.csv"
-    df_market = pd.read_csv(market_csv_path, parse_dates=['閉場日時', '開場日時'])
+MANIFEST_FILENAME = "daily_aggregates_manifest.json"
+MANIFEST_VERSION = 1
 
-    gold_csv_path = SCRIPT_DIR / "data" / "raw" / "gold_1min_20251101_.csv"
-    df_1min = pd.read_csv(gold_csv_path, parse_dates=['日時'])
-    df_1min = df_1min.rename(columns={
-        '日時': 'timestamp',
-        '始値': 'open',
-        '高値': 'high',
-        '安値': 'low',
-        '終値': 'close'
-    })
-    df_1min.set_index('timestamp', inplace=True)
-    print(f"   1分足データ: {len(df_1min)}行")
-    print(f"   1分足の期間: {df_1min.index.min()} 〜 {df_1min.index.max()}")
 
-    # 次の閉場時刻を計算
+def partition_filename(threshold_min, judgment_hour):
+    """閾値・判定時間に対応する分割ファイル名"""
+    if judgment_hour is None or pd.isna(judgment_hour):
+        j_label = 'close'
+    else:
+        j_label = int(judgment_hour)
+    return f"daily_aggregates_t{int(threshold_min)}_j{j_label}.parquet"
+
+
+def load_manifest(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(path, manifest):
+    """途中で落ちても壊れないよう、一時ファイル経由で置き換える"""
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_settings(exchange_settings, threshold_minutes, judgment_hours):
+    """マニフェストに記録するビルド設定（変わったら全件再構築）"""
+    return {
+        'threshold_minutes': [int(t) for t in threshold_minutes],
+        'judgment_hours': [None if j is None else int(j) for j in judgment_hours],
+        'open_bar_offset_minutes': int(exchange_settings['open_bar_offset_minutes']),
+        'open_bar_max_skip': int(exchange_settings['open_bar_max_skip']),
+        'price_tick': float(exchange_settings['price_tick']),
+    }
+
+
+def prepare_market_hours(df_market, last_1min_time):
+    """
+    次の閉場時刻を付与し、列名を process_daily_data 用にそろえる。
+
+    Returns:
+        tuple[pd.DataFrame, pd.Series]: (市場休場データ, 次の閉場時刻を補完した行のマスク)
+    """
+    df_market = df_market.copy()
     df_market['次の閉場時刻'] = df_market['閉場日時'].shift(-1)
 
     # 🔧 直近日付の補完: 次の閉場時刻がNaNの場合、1分足データの最後を使う
-    last_1min_time = df_1min.index.max()
     mask_last = df_market['次の閉場時刻'].isna() & df_market['開場日時'].notna()
-
-    if mask_last.any():
-        補完数 = mask_last.sum()
-        print(f"\n   ⚠️ 直近セッションの補完: {補完数}件")
-        print(f"      次の閉場時刻が未定 → 1分足データの最後（{last_1min_time}）を使用")
-        df_market.loc[mask_last, '次の閉場時刻'] = last_1min_time
+    df_market.loc[mask_last, '次の閉場時刻'] = last_1min_time
 
     df_market = df_market.rename(columns={
         '閉場日時': '閉場時刻',
         '開場日時': '開場時刻'
     })
-    print(f"   市場休場データ: {len(df_market)}行")
+    return df_market, mask_last
 
-    exchange_settings = load_exchange_settings(
-        SCRIPT_DIR / "config" / "exchanges" / "bingx.yaml"
+
+def last_finalized_close_time(df_market, mask_backfilled, last_1min_time):
+    """
+    以後の再計算が不要な（確定した）最後のセッションの閉場時刻。
+
+    次の閉場時刻を補完したセッションや、1分足がまだ揃っていないセッションは
+    未確定として扱い、次回の増分ビルドで再計算する。
+    """
+    finalized = (
+        df_market['開場時刻'].notna() &
+        ~mask_backfilled &
+        (df_market['次の閉場時刻'] <= last_1min_time)
     )
+    # 未確定セッションより後ろは確定扱いにしない
+    pending = ~finalized
+    if pending.any():
+        finalized &= df_market['閉場時刻'] < df_market.loc[pending, '閉場時刻'].min()
+    if not finalized.any():
+        return None
+    return df_market.loc[finalized, '閉場時刻'].max()
 
-    # 集計処理
-    print("\n[2/5] 日次集計中...")
-    print("   閾値: 1-5分")
-    print("   判定時間: 1h〜24h（1時間刻み）+ 次の閉場")
 
-    df_aggregates = process_daily_data(
+def iter_partitions(df_aggregates, threshold_minutes, judgment_hours):
+    """(ファイル名, 該当行) を閾値×判定時間の組み合わせごとに返す"""
+    for threshold_min in threshold_minutes:
+        for judgment_hour in judgment_hours:
+            if df_aggregates.empty:
+                yield partition_filename(threshold_min, judgment_hour), df_aggregates
+                continue
+            if judgment_hour is None:
+                mask = df_aggregates['judgment_hours'].isna()
+            else:
+                mask = df_aggregates['judgment_hours'] == judgment_hour
+            df_subset = df_aggregates[(df_aggregates['threshold_min'] == threshold_min) & mask]
+            yield partition_filename(threshold_min, judgment_hour), df_subset
+
+
+def write_partitions(df_aggregates, output_dir, threshold_minutes, judgment_hours, replace_after=None):
+    """
+    閾値×判定時間ごとのファイルに保存する。
+
+    replace_after を指定すると増分モード: 既存ファイルのうち閉場時刻が
+    replace_after より後の行だけを df_aggregates の行で置き換え、それ以前の行は残す。
+
+    Returns:
+        tuple[list[tuple[str, int, float]], pd.DataFrame]:
+            ((ファイル名, 行数, KB) のリスト, 保存した全パーティションを連結したデータ)
+    """
+    saved_files = []
+    saved_frames = []
+    for filename, df_subset in iter_partitions(df_aggregates, threshold_minutes, judgment_hours):
+        output_path = output_dir / filename
+
+        if replace_after is not None and output_path.exists():
+            df_existing = pd.read_parquet(output_path)
+            df_existing = df_existing[df_existing['close_time'] <= replace_after]
+            if df_subset.empty:
+                df_subset = df_existing
+            elif not df_existing.empty:
+                df_subset = pd.concat([df_existing, df_subset], ignore_index=True)
+
+        if len(df_subset) == 0:
+            continue
+
+        pq.write_table(aggregates_to_table(df_subset), output_path)
+        saved_frames.append(df_subset)
+
+        # ファイルサイズを取得
+        file_size = output_path.stat().st_size / 1024  # KB
+        saved_files.append((filename, len(df_subset), file_size))
+
+    df_saved = pd.concat(saved_frames, ignore_index=True) if saved_frames else pd.DataFrame()
+    return saved_files, df_saved
+
+
+def aggregate_sessions(store_root, df_market, exchange_settings,
+                       threshold_minutes=THRESHOLD_MINUTES, judgment_hours=JUDGMENT_HOURS):
+    """
+    担当セッションだけを集計する（プロセスプールのワーカーから呼ばれる）。
+
+    1分足はバーストアをメモリマップで開いて必要な期間だけ切り出すので、
+    親プロセスから DataFrame を pickle で受け渡す必要はない。
+    """
+    store = BarStore(store_root)
+    start = df_market['閉場時刻'].min()
+    end = df_market['次の閉場時刻'].max()
+    df_1min = store.load(
+        None if pd.isna(start) else start - timedelta(minutes=1),
+        None if pd.isna(end) else end + timedelta(minutes=1),
+    )
+    return process_daily_data_vectorized(
         df_1min,
         df_market,
-        threshold_minutes=[1, 2, 3, 4, 5],
-        judgment_hours=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12,
-                       13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, None],
+        threshold_minutes=threshold_minutes,
+        judgment_hours=judgment_hours,
         open_bar_offset_minutes=exchange_settings['open_bar_offset_minutes'],
         open_bar_max_skip=exchange_settings['open_bar_max_skip'],
         price_tick=exchange_settings['price_tick'],
     )
 
-    print(f"   集計完了: {len(df_aggregates)}行")
 
-    # 保存（判定期間ごとに分割）
-    print("\n[3/5] データ保存中（判定期間ごとに分割）...")
-    output_dir = SCRIPT_DIR / "data" / "derived"
+def shard_sessions(df_market, shards):
+    """セッションを連続した shards 個の塊に分ける（空の塊は除く）"""
+    shards = max(1, min(int(shards), len(df_market)))
+    return [
+        df_market.iloc[positions]
+        for positions in np.array_split(np.arange(len(df_market)), shards)
+        if len(positions)
+    ]
+
+
+def submit_aggregate_shards(executor, store_root, df_market, exchange_settings, shards):
+    """セッションの塊ごとに aggregate_sessions をプールへ投入し、Future のリストを返す"""
+    return [
+        executor.submit(aggregate_sessions, str(store_root), df_shard, exchange_settings)
+        for df_shard in shard_sessions(df_market, shards)
+    ]
+
+
+def collect_aggregate_shards(futures):
+    """塊ごとの結果をセッション順に連結する"""
+    frames = [f.result() for f in futures]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def plan_build(market_csv_path, bars_csv_path, output_dir, exchange_settings, full_rebuild=False, label=""):
+    """
+    マニフェストを確認し、今回集計すべきセッションを決める。
+
+    Returns:
+        dict | None: ビルド計画（集計対象の市場休場データなど）。入力に変更が無ければ None
+    """
+    output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_FILENAME
+    settings = build_settings(exchange_settings, THRESHOLD_MINUTES, JUDGMENT_HOURS)
+
+    # 増分ビルドの可否（設定が同じで、入力が追記のみで更新されていること）
+    manifest = None if full_rebuild else load_manifest(manifest_path)
+    if manifest is not None and (
+        manifest.get('settings') != settings or
+        not is_appended_since(market_csv_path, manifest['sources'].get('market_hours')) or
+        not is_appended_since(bars_csv_path, manifest['sources'].get('gold_1min'))
+    ):
+        print(f"\n   ⚠️ {label}設定または入力ファイルが追記以外で変更されています → 全件再構築")
+        manifest = None
+
+    sources = {
+        'market_hours': file_fingerprint(market_csv_path),
+        'gold_1min': file_fingerprint(bars_csv_path),
+    }
+    if manifest is not None and manifest['sources'] == sources:
+        print(f"\n✅ {label}入力ファイルに変更はありません（集計済み）")
+        print(f"\n📁 保存先: {output_dir}")
+        return None
 
-    # 閾値と判定時間の組み合わせごとに保存
-    threshold_minutes = sorted(df_aggregates['threshold_min'].unique())
-    judgment_hours_list = sorted([x for x in df_aggregates['judgment_hours'].unique() if pd.notna(x)]) + [None]
+    replace_after = None
+    if manifest is not None and manifest.get('last_close_time'):
+        replace_after = pd.Timestamp(manifest['last_close_time'])
+
+    # データ読み込み
+    print(f"\n[1/5] {label}データ読み込み中...")
+    df_market = pd.read_csv(market_csv_path, parse_dates=['閉場日時', '開場日時'])
+
+    # 1分足はバーストア経由（初回のみ CSV を解析し、以後はメモリマップで読む）
+    store = BarStore.from_csv(bars_csv_path)
+    print(f"   1分足データ: {len(store)}行")
+    if len(store) == 0:
+        print("   ⚠️ 1分足データがありません")
+        return None
+
+    first_1min_time = pd.Timestamp(int(store.minutes[0]) * NS_PER_MINUTE)
+    last_1min_time = pd.Timestamp(int(store.minutes[-1]) * NS_PER_MINUTE)
+    print(f"   1分足の期間: {first_1min_time} 〜 {last_1min_time}")
+
+    df_market, mask_last = prepare_market_hours(df_market, last_1min_time)
+
+    if mask_last.any():
+        補完数 = mask_last.sum()
+        print(f"\n   ⚠️ 直近セッションの補完: {補完数}件")
+        print(f"      次の閉場時刻が未定 → 1分足データの最後（{last_1min_time}）を使用")
+
+    print(f"   市場休場データ: {len(df_market)}行")
+
+    # 増分モード: 前回確定分より後のセッション（未確定だったセッションを含む）だけを計算
+    df_market_target = df_market
+    if replace_after is not None:
+        df_market_target = df_market[df_market['閉場時刻'] > replace_after]
+        print(f"\n   🔁 増分ビルド: {replace_after} より後の {len(df_market_target)} セッションを再計算")
+
+    return {
+        'label': label,
+        'output_dir': output_dir,
+        'manifest_path': manifest_path,
+        'store_root': store.root,
+        'sources': sources,
+        'settings': settings,
+        'incremental': manifest is not None,
+        'replace_after': replace_after,
+        'df_market': df_market,
+        'df_market_target': df_market_target,
+        'mask_last': mask_last,
+        'last_1min_time': last_1min_time,
+    }
 
-    saved_files = []
-    for threshold_min in threshold_minutes:
-        for judgment_hour in judgment_hours_list:
-            # 該当データを抽出
-            if pd.isna(judgment_hour) or judgment_hour is None:
-                df_subset = df_aggregates[
-                    (df_aggregates['threshold_min'] == threshold_min) &
-                    (df_aggregates['judgment_hours'].isna())
-                ]
-                j_label = 'close'
-            else:
-                df_subset = df_aggregates[
-                    (df_aggregates['threshold_min'] == threshold_min) &
-                    (df_aggregates['judgment_hours'] == judgment_hour)
-                ]
-                j_label = int(judgment_hour)
 
-            if len(df_subset) > 0:
-                filename = f"daily_aggregates_t{int(threshold_min)}_j{j_label}.parquet"
-                output_path = output_dir / filename
-                df_subset.to_parquet(output_path, index=False)
+def finish_build(plan, df_aggregates):
+    """集計結果を分割ファイル・データセットに保存し、マニフェストを更新する"""
+    label = plan['label']
+    output_dir = plan['output_dir']
+    replace_after = plan['replace_after']
+    incremental = plan['incremental']
 
-                # ファイルサイズを取得
-                file_size = output_path.stat().st_size / 1024  # KB
-                saved_files.append((filename, len(df_subset), file_size))
+    print(f"   {label}集計完了: {len(df_aggregates)}行")
 
-                print(f"   保存: {filename} ({len(df_subset)}行, {file_size:.1f}KB)")
+    # 保存（判定期間ごとに分割）
+    print(f"\n[3/5] {label}データ保存中（判定期間ごとに分割）...")
+    saved_files, df_saved = write_partitions(
+        df_aggregates,
+        output_dir,
+        THRESHOLD_MINUTES,
+        JUDGMENT_HOURS,
+        replace_after=replace_after if incremental else None,
+    )
+    for filename, rows, file_size in saved_files:
+        print(f"   保存: {filename} ({rows}行, {file_size:.1f}KB)")
+
+    # 同じ内容を Hive パーティション形式のデータセットにも保存（app はこちらを優先して読む）
+    if not df_saved.empty:
+        dataset_dir = output_dir / AGGREGATE_DATASET_DIRNAME
+        dataset_files = write_aggregate_dataset(df_saved, dataset_dir)
+        print(f"   保存: {AGGREGATE_DATASET_DIRNAME}/ ({dataset_files}パーティション, _metadata 付き)")
+
+    last_1min_time = plan['last_1min_time']
+    last_close_time = last_finalized_close_time(plan['df_market'], plan['mask_last'], last_1min_time)
+    if last_close_time is None:
+        last_close_time = replace_after
+    save_manifest(plan['manifest_path'], {
+        'version': MANIFEST_VERSION,
+        'sources': plan['sources'],
+        'settings': plan['settings'],
+        'last_close_time': None if last_close_time is None else pd.Timestamp(last_close_time).isoformat(),
+        'last_1min_time': pd.Timestamp(last_1min_time).isoformat(),
+    })
 
     # サマリー表示
-    print("\n[4/5] サマリー")
+    print(f"\n[4/5] {label}サマリー")
     print("=" * 60)
-    print(f"総データ数: {len(df_aggregates)}行")
+    print(f"総データ数: {len(df_aggregates)}行{'（増分）' if incremental else ''}")
     print(f"保存ファイル数: {len(saved_files)}個")
-    print(f"日数: {df_aggregates['date'].nunique()}日")
+    if not df_aggregates.empty:
+        print(f"日数: {df_aggregates['date'].nunique()}日")
 
     total_size = sum(size for _, _, size in saved_files)
     print(f"総ファイルサイズ: {total_size:.1f}KB ({total_size/1024:.2f}MB)")
 
     # 閾値別の内訳
     print("\n閾値別の内訳:")
-    for threshold_min in threshold_minutes:
+    for threshold_min in THRESHOLD_MINUTES:
         count = len([f for f, _, _ in saved_files if f.startswith(f"daily_aggregates_t{int(threshold_min)}_")])
         print(f"  閾値{int(threshold_min)}分: {count}ファイル")
 
+    print(f"\n📁 保存先: {output_dir}")
+
+
+def main(full_rebuild=False, workers=1):
+    SCRIPT_DIR = Path(__file__).resolve().parent
+
+    print("=" * 60)
+    print("日次集計データの作成（複数時間窓対応版 + ファイル分割版）")
+    print("=" * 60)
+
+    gold_csv_path, market_csv_path = raw_paths(SCRIPT_DIR / "data", DEFAULT_SYMBOL)
+    output_dir = derived_dir(SCRIPT_DIR / "data", DEFAULT_SYMBOL)
+
+    exchange_settings = load_exchange_settings(
+        SCRIPT_DIR / "config" / "exchanges" / "bingx.yaml"
+    )
+
+    plan = plan_build(market_csv_path, gold_csv_path, output_dir, exchange_settings, full_rebuild)
+    if plan is None:
+        return
+
+    # 集計処理
+    print("\n[2/5] 日次集計中...")
+    print("   閾値: 1-5分")
+    print("   判定時間: 1h〜24h（1時間刻み）+ 次の閉場")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = submit_aggregate_shards(
+                executor, plan['store_root'], plan['df_market_target'], exchange_settings, workers
+            )
+            df_aggregates = collect_aggregate_shards(futures)
+    else:
+        df_aggregates = aggregate_sessions(plan['store_root'], plan['df_market_target'], exchange_settings)
+
+    finish_build(plan, df_aggregates)
+
     print("\n[5/5] 完了")
     print("✅ 全ての集計データを保存しました")
-    print(f"\n📁 保存先: {output_dir}")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="日次集計データを作成する")
+    parser.add_argument('--full', action='store_true',
+                        help="マニフェストを無視して全セッションを再構築する")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="セッションを分割して並列集計するプロセス数（1なら逐次）")
+    args = parser.parse_args()
+    main(full_rebuild=args.full, workers=args.workers)
@@ -0,0 +1,105 @@
+"""
+日次集計の Hive パーティション形式データセット
+
+daily_aggregates/threshold_min=T/judgment_hours=J/part-0.parquet の形で保存し、
+全ファイルのフッターを集めた _metadata を1つ書き出す。
+読み込み側は _metadata のフッター1回だけでデータセットを組み立て、
+pyarrow のフィルタで必要なパーティションだけを読む。
+
+「次の閉場」(judgment_hours=None) は judgment_hours=__HIVE_DEFAULT_PARTITION__ に入る。
+"""
+
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from core.aggregate_engine import AGGREGATE_SCHEMA, aggregates_to_table
+
+AGGREGATE_DATASET_DIRNAME = "daily_aggregates"
+METADATA_FILENAME = "_metadata"
+
+PARTITION_SCHEMA = pa.schema([
+    AGGREGATE_SCHEMA.field('threshold_min'),
+    AGGREGATE_SCHEMA.field('judgment_hours'),
+])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+
+def has_aggregate_dataset(root):
+    return (Path(root) / METADATA_FILENAME).exists()
+
+
+def write_aggregate_dataset(df_aggregates, root):
+    """
+    全パーティション分の集計データをデータセットとして書き出す。
+
+    書き込んだパーティションは置き換え、_metadata は今回書いたファイルだけで作り直す。
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    table = aggregates_to_table(df_aggregates)
+
+    metadata_collector = []
+
+    def collect_metadata(written_file):
+        metadata = written_file.metadata
+        metadata.set_file_path(Path(os.path.relpath(written_file.path, root)).as_posix())
+        metadata_collector.append(metadata)
+
+    ds.write_dataset(
+        table,
+        root,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+        file_visitor=collect_metadata,
+    )
+
+    # _metadata のスキーマはパーティション列を除いた各ファイルのスキーマと一致させる
+    file_schema = table.schema
+    for name in PARTITION_SCHEMA.names:
+        file_schema = file_schema.remove(file_schema.get_field_index(name))
+
+    pq.write_metadata(
+        file_schema,
+        root / METADATA_FILENAME,
+        metadata_collector=metadata_collector,
+    )
+    return len(metadata_collector)
+
+
+def _partition_filter(threshold_minutes=None, judgment_hours=None):
+    expr = None
+    if threshold_minutes is not None:
+        expr = pc.field('threshold_min').isin([int(t) for t in threshold_minutes])
+
+    if judgment_hours is not None:
+        hours = [float(j) for j in judgment_hours if j is not None]
+        j_expr = pc.field('judgment_hours').isin(hours)
+        if any(j is None for j in judgment_hours):
+            j_expr = j_expr | pc.field('judgment_hours').is_null()
+        expr = j_expr if expr is None else expr & j_expr
+
+    return expr
+
+
+def read_aggregate_dataset(root, threshold_minutes=None, judgment_hours=None):
+    """
+    データセットから指定パーティションを1回のスキャンで読み込む。
+
+    Args:
+        root: データセットのルートディレクトリ
+        threshold_minutes: 読み込む閾値（分）のリスト。None なら全件
+        judgment_hours: 読み込む判定時間のリスト（None 要素は「次の閉場」）。None なら全件
+
+    Returns:
+        pd.DataFrame: daily_aggregates_t{T}_j{J}.parquet と同じ列構成の集計データ
+    """
+    dataset = ds.parquet_dataset(Path(root) / METADATA_FILENAME, partitioning=PARTITIONING)
+    table = dataset.to_table(filter=_partition_filter(threshold_minutes, judgment_hours))
+    return table.select(AGGREGATE_SCHEMA.names).to_pandas()
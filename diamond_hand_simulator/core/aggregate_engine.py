@@ -0,0 +1,255 @@
+"""
+日次集計のベクトル化ビルドエンジン
+
+build_daily_aggregates.process_daily_data と同じ出力を、
+セッションごとの全体マスク走査なしで計算する。
+
+- 全セッションの境界（建値窓・開場〜次の閉場）は1回の searchsorted で求める
+- 開場基準足は select_open_reference_bars で全セッション分を一括で選ぶ
+- Phase1/Phase2 の高値・安値は累積極値（prefix）配列から取り出す
+- long_entry の初回割れは「次に割れる足」の suffix 配列から取り出す
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.open_reference import (
+    DEFAULT_OPEN_BAR_MAX_SKIP,
+    DEFAULT_OPEN_BAR_OFFSET_MINUTES,
+    DEFAULT_PRICE_TICK_FALLBACK,
+    select_open_reference_bars,
+)
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+NAT_NS = np.iinfo(np.int64).min
+
+JUDGMENT_LABEL_CLOSE = "次の閉場"
+
+# daily_aggregates_t{T}_j{J}.parquet のスキーマ（列順も含めて固定）
+AGGREGATE_SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('close_time', pa.timestamp('ns')),
+    ('open_time', pa.timestamp('ns')),
+    ('reference_open_time', pa.timestamp('ns')),
+    ('skip_minutes', pa.int64()),
+    ('next_close_time', pa.timestamp('ns')),
+    ('type', pa.string()),
+    ('threshold_min', pa.int64()),
+    ('threshold_time', pa.timestamp('ns')),
+    ('judgment_hours', pa.float64()),
+    ('judgment_label', pa.string()),
+    ('judgment_hours_actual', pa.float64()),
+    ('judgment_end_time', pa.timestamp('ns')),
+    ('long_entry', pa.float64()),
+    ('short_entry', pa.float64()),
+    ('phase1_high', pa.float64()),
+    ('phase1_low', pa.float64()),
+    ('phase2_high', pa.float64()),
+    ('phase2_low', pa.float64()),
+    ('phase2_breach_long_time', pa.timestamp('ns')),
+    ('phase2_breach_long_min', pa.float64()),
+    ('phase2_breach_short_time', pa.timestamp('ns')),
+    ('phase2_breach_short_max', pa.float64()),
+])
+
+AGGREGATE_COLUMNS = AGGREGATE_SCHEMA.names
+
+_TIME_COLUMNS = [
+    'close_time', 'open_time', 'reference_open_time', 'next_close_time',
+    'threshold_time', 'judgment_end_time',
+    'phase2_breach_long_time', 'phase2_breach_short_time',
+]
+
+
+def to_ns(values):
+    """datetime 系の配列を int64 ナノ秒に変換（NaT は NAT_NS）。"""
+    return np.asarray(values, dtype='datetime64[ns]').view(np.int64)
+
+
+def aggregates_to_table(df_aggregates):
+    """集計 DataFrame を AGGREGATE_SCHEMA 固定の pyarrow.Table に変換する。"""
+    return pa.Table.from_pandas(df_aggregates, schema=AGGREGATE_SCHEMA, preserve_index=False)
+
+
+def process_daily_data_vectorized(df_1min, df_market, threshold_minutes=[1],
+                                  judgment_hours=[1, 3, 6, 12, 22, None],
+                                  open_bar_offset_minutes=DEFAULT_OPEN_BAR_OFFSET_MINUTES,
+                                  open_bar_max_skip=DEFAULT_OPEN_BAR_MAX_SKIP,
+                                  price_tick=DEFAULT_PRICE_TICK_FALLBACK):
+    """
+    日次集計データを作成（ベクトル化版）
+
+    引数・戻り値は build_daily_aggregates.process_daily_data と同じ。
+    時刻列は datetime64[ns] で返す。
+    """
+    if not df_1min.index.is_monotonic_increasing:
+        df_1min = df_1min.sort_index(kind='stable')
+
+    ts = to_ns(df_1min.index)
+    high = df_1min['high'].to_numpy(dtype=np.float64)
+    low = df_1min['low'].to_numpy(dtype=np.float64)
+
+    close_ns = to_ns(df_market['閉場時刻'])
+    open_ns = to_ns(df_market['開場時刻'])
+    next_close_ns = to_ns(df_market['次の閉場時刻'])
+    n_sessions = len(df_market)
+
+    # 建値窓 [close-1分, close] と セッション [open, next_close) の境界を一括で求める
+    bounds = np.searchsorted(ts, np.concatenate([
+        close_ns - NS_PER_MINUTE,
+        close_ns + 1,
+        open_ns,
+        next_close_ns,
+    ]), side='left')
+    close_lo, close_hi, session_lo, session_hi = bounds.reshape(4, n_sessions)
+
+    valid = (
+        (close_ns != NAT_NS) & (open_ns != NAT_NS) & (next_close_ns != NAT_NS) &
+        (close_hi > close_lo) & (session_hi > session_lo)
+    )
+
+    # 開場基準足は全セッション分をまとめて選ぶ
+    reference_index, reference_skip = select_open_reference_bars(
+        ts, high, low, open_ns,
+        offset_min=open_bar_offset_minutes,
+        max_skip=open_bar_max_skip,
+        price_tick=price_tick,
+        starts=session_lo,
+        stops=session_hi,
+    )
+
+    thresholds = np.asarray(threshold_minutes, dtype=np.int64)
+    judgment_values = np.array([np.nan if j is None else j for j in judgment_hours])
+    judgment_labels = np.array(
+        [JUDGMENT_LABEL_CLOSE if j is None else f"{j}h" for j in judgment_hours], dtype=object
+    )
+    judgment_offsets = np.array(
+        [-1 if j is None else int(j * NS_PER_HOUR) for j in judgment_hours], dtype=np.int64
+    )
+    judgment_is_close = judgment_offsets < 0
+    n_judgments = len(judgment_hours)
+
+    chunks = {name: [] for name in (
+        'session', 'reference_open_time', 'skip_minutes', 'threshold_pos',
+        'threshold_time', 'judgment_pos', 'judgment_hours_actual', 'judgment_end_time',
+        'long_entry', 'short_entry', 'phase1_high', 'phase1_low',
+        'phase2_high', 'phase2_low', 'phase2_breach_long_time', 'phase2_breach_long_min',
+    )}
+
+    for s in np.flatnonzero(valid):
+        a, b = int(session_lo[s]), int(session_hi[s])
+
+        # 建値（閉場時の価格）
+        long_entry = np.fmax.reduce(high[close_lo[s]:close_hi[s]])
+        short_entry = np.fmin.reduce(low[close_lo[s]:close_hi[s]])
+
+        r, skip_minutes = int(reference_index[s]), int(reference_skip[s])
+        if r < 0:
+            continue
+
+        ref_ns = ts[r]
+        seg_ts = ts[r:b]
+        seg_high = high[r:b]
+        seg_low = low[r:b]
+        n = len(seg_ts)
+
+        run_high = np.fmax.accumulate(seg_high)
+        run_low = np.fmin.accumulate(seg_low)
+
+        # 各位置から見て次に long_entry を割る足の位置（無ければ n）
+        below_pos = np.where(seg_low < long_entry, np.arange(n), n)
+        next_below = np.append(np.minimum.accumulate(below_pos[::-1])[::-1], n)
+
+        end_ns = np.where(
+            judgment_is_close,
+            next_close_ns[s],
+            np.minimum(ref_ns + judgment_offsets, next_close_ns[s]),
+        )
+        end_pos = np.searchsorted(seg_ts, end_ns, side='left')
+        hours_actual = (end_ns - ref_ns) / 1e9 / 3600
+
+        for t_pos, threshold_min in enumerate(thresholds):
+            threshold_ns = ref_ns + int(threshold_min) * NS_PER_MINUTE
+            p = int(np.searchsorted(seg_ts, threshold_ns, side='left'))
+
+            # Phase1: 基準足〜閾値
+            if p == 0:
+                continue
+
+            # Phase2: 閾値〜判定終了時刻（p から始まる累積極値）
+            count = end_pos - p
+            has_phase2 = count > 0
+            take = np.clip(count - 1, 0, None)
+            if p < n:
+                p2_high = np.fmax.accumulate(seg_high[p:])[np.minimum(take, n - p - 1)]
+                p2_low = np.fmin.accumulate(seg_low[p:])[np.minimum(take, n - p - 1)]
+            else:
+                p2_high = p2_low = np.full(n_judgments, np.nan)
+
+            k = next_below[p]
+            breached = has_phase2 & (k < end_pos)
+            if k < n:
+                breach_time = np.where(breached, seg_ts[k], NAT_NS)
+                breach_min = np.where(breached, (seg_ts[k] - seg_ts[p]) / 1e9 / 60, np.nan)
+            else:
+                breach_time = np.full(n_judgments, NAT_NS)
+                breach_min = np.full(n_judgments, np.nan)
+
+            chunks['session'].append(np.full(n_judgments, s))
+            chunks['reference_open_time'].append(np.full(n_judgments, ref_ns))
+            chunks['skip_minutes'].append(np.full(n_judgments, skip_minutes, dtype=np.int64))
+            chunks['threshold_pos'].append(np.full(n_judgments, t_pos))
+            chunks['threshold_time'].append(np.full(n_judgments, threshold_ns))
+            chunks['judgment_pos'].append(np.arange(n_judgments))
+            chunks['judgment_hours_actual'].append(hours_actual)
+            chunks['judgment_end_time'].append(end_ns)
+            chunks['long_entry'].append(np.full(n_judgments, long_entry))
+            chunks['short_entry'].append(np.full(n_judgments, short_entry))
+            chunks['phase1_high'].append(np.full(n_judgments, run_high[p - 1]))
+            chunks['phase1_low'].append(np.full(n_judgments, run_low[p - 1]))
+            chunks['phase2_high'].append(np.where(has_phase2, p2_high, np.nan))
+            chunks['phase2_low'].append(np.where(has_phase2, p2_low, np.nan))
+            chunks['phase2_breach_long_time'].append(breach_time)
+            chunks['phase2_breach_long_min'].append(breach_min)
+
+    if not chunks['session']:
+        return pd.DataFrame()
+
+    cols = {name: np.concatenate(parts) for name, parts in chunks.items()}
+    session = cols.pop('session')
+    threshold_pos = cols.pop('threshold_pos')
+    judgment_pos = cols.pop('judgment_pos')
+    n_rows = len(session)
+
+    out = {
+        'date': pd.DatetimeIndex(open_ns[session].view('datetime64[ns]')).date,
+        'close_time': close_ns[session],
+        'open_time': open_ns[session],
+        'reference_open_time': cols['reference_open_time'],
+        'skip_minutes': cols['skip_minutes'],
+        'next_close_time': next_close_ns[session],
+        'type': df_market['タイプ'].to_numpy()[session],
+        'threshold_min': thresholds[threshold_pos],
+        'threshold_time': cols['threshold_time'],
+        'judgment_hours': judgment_values[judgment_pos],
+        'judgment_label': judgment_labels[judgment_pos],
+        'judgment_hours_actual': cols['judgment_hours_actual'],
+        'judgment_end_time': cols['judgment_end_time'],
+        'long_entry': cols['long_entry'],
+        'short_entry': cols['short_entry'],
+        'phase1_high': cols['phase1_high'],
+        'phase1_low': cols['phase1_low'],
+        'phase2_high': cols['phase2_high'],
+        'phase2_low': cols['phase2_low'],
+        'phase2_breach_long_time': cols['phase2_breach_long_time'],
+        'phase2_breach_long_min': cols['phase2_breach_long_min'],
+        # ショート側は将来の拡張用（常に欠損）
+        'phase2_breach_short_time': np.full(n_rows, NAT_NS),
+        'phase2_breach_short_max': np.full(n_rows, np.nan),
+    }
+    for name in _TIME_COLUMNS:
+        out[name] = np.asarray(out[name], dtype=np.int64).view('datetime64[ns]')
+
+    return pd.DataFrame(out, columns=AGGREGATE_COLUMNS)
@@ -0,0 +1,241 @@
+"""
+1分足のカラムナ保存（バーストア）
+
+ダウンロードした gold_1min_*.csv を一度だけ解析し、
+int64 のエポック分（CSV の日時をそのまま壁時計として扱う）と float64 の OHLCV を
+列ごとの .npy に保存する。以後はメモリマップで開き、searchsorted で期間を切り出す。
+
+CSV に追記された分は追記部分だけを解析して末尾に足す。
+追記以外で変更された場合は作り直す。
+"""
+
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NS_PER_MINUTE = 60 * 10**9
+
+STORE_VERSION = 1
+META_FILENAME = "meta.json"
+MINUTE_COLUMN = 'minute'
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+CSV_COLUMN_MAP = {
+    '始値': 'open',
+    '高値': 'high',
+    '安値': 'low',
+    '終値': 'close',
+    '出来高': 'volume',
+}
+
+
+def file_fingerprint(path, length=None):
+    """
+    ファイル先頭 length バイト（None なら全体）のサイズと sha256 を返す。
+
+    追記のみで更新されたかは、前回の fingerprint と同じ長さの先頭部分の
+    ハッシュが一致するかで判定する（is_appended_since）。
+    """
+    path = Path(path)
+    size = path.stat().st_size if length is None else int(length)
+    digest = hashlib.sha256()
+    remaining = size
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return {'size': size, 'sha256': digest.hexdigest()}
+
+
+def is_appended_since(path, fingerprint):
+    """前回の fingerprint から追記のみで更新されていれば True"""
+    path = Path(path)
+    if not fingerprint or not path.exists():
+        return False
+    if path.stat().st_size < fingerprint['size']:
+        return False
+    return file_fingerprint(path, fingerprint['size']) == fingerprint
+
+
+def default_store_dir(csv_path):
+    """CSV と同じ場所の <stem>.bars/ をバーストアにする"""
+    return Path(csv_path).with_suffix('.bars')
+
+
+def to_minute(value):
+    """日時（Timestamp・文字列など）をエポック分に変換する（秒以下は切り捨て）"""
+    return pd.Timestamp(value).as_unit('ns').value // NS_PER_MINUTE
+
+
+def _parse_csv(source, names=None):
+    """
+    1分足 CSV を (エポック分, {列名: 値}, CSV の列名) に変換する。
+
+    names を渡すとヘッダ無し（追記部分）として読む。
+    """
+    if names is None:
+        df = pd.read_csv(source)
+    else:
+        df = pd.read_csv(source, header=None, names=names)
+
+    if '日時' in df.columns:
+        timestamps = pd.to_datetime(df['日時'])
+    else:
+        timestamps = pd.to_datetime(df['日付'] + ' ' + df['時刻'])
+
+    minutes = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64) // NS_PER_MINUTE
+
+    columns = {}
+    for src, dst in CSV_COLUMN_MAP.items():
+        if src in df.columns:
+            columns[dst] = df[src].to_numpy(dtype=np.float64)
+        else:
+            columns[dst] = np.full(len(df), np.nan)
+
+    return minutes, columns, list(df.columns)
+
+
+def _save_array(path, values):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+def _read_meta(root):
+    path = Path(root) / META_FILENAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != STORE_VERSION:
+        return None
+    return meta
+
+
+def write_bar_store(root, minutes, columns, source=None, csv_columns=None):
+    """配列をバーストアとして保存する（時刻順に並べ替える）"""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    minutes = np.asarray(minutes, dtype=np.int64)
+    if len(minutes) > 1 and np.any(np.diff(minutes) < 0):
+        order = np.argsort(minutes, kind='stable')
+        minutes = minutes[order]
+        columns = {name: np.asarray(values)[order] for name, values in columns.items()}
+
+    _save_array(root / f'{MINUTE_COLUMN}.npy', minutes)
+    for name in BAR_COLUMNS:
+        _save_array(root / f'{name}.npy', np.asarray(columns[name], dtype=np.float64))
+
+    # メタ情報は最後に書く（途中で落ちたら次回作り直しになる）
+    meta_path = root / META_FILENAME
+    tmp_path = meta_path.with_name(META_FILENAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': STORE_VERSION,
+            'source': source,
+            'csv_columns': csv_columns,
+            'rows': int(len(minutes)),
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+class BarStore:
+    """メモリマップした1分足の列（エポック分 + OHLCV）"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.meta = _read_meta(self.root)
+        if self.meta is None:
+            raise FileNotFoundError(f"バーストアが見つかりません: {self.root}")
+
+        self.minutes = np.load(self.root / f'{MINUTE_COLUMN}.npy', mmap_mode='r')
+        self.columns = {
+            name: np.load(self.root / f'{name}.npy', mmap_mode='r')
+            for name in BAR_COLUMNS
+        }
+
+    @classmethod
+    def from_csv(cls, csv_path, root=None):
+        """
+        CSV に対応するバーストアを開く。無い・古い場合はここで作成／更新する。
+        """
+        csv_path = Path(csv_path)
+        root = Path(root) if root is not None else default_store_dir(csv_path)
+        fingerprint = file_fingerprint(csv_path)
+        meta = _read_meta(root)
+
+        if meta is not None and meta.get('source') == fingerprint:
+            return cls(root)
+
+        if meta is not None and meta.get('csv_columns') and is_appended_since(csv_path, meta.get('source')):
+            # 追記分だけを解析して末尾に足す
+            with open(csv_path, 'rb') as f:
+                f.seek(meta['source']['size'])
+                tail = f.read()
+            store = cls(root)
+            minutes = np.array(store.minutes)
+            columns = {name: np.array(values) for name, values in store.columns.items()}
+            del store
+
+            if tail.strip():
+                new_minutes, new_columns, _ = _parse_csv(io.BytesIO(tail), names=meta['csv_columns'])
+                minutes = np.concatenate([minutes, new_minutes])
+                columns = {name: np.concatenate([columns[name], new_columns[name]]) for name in BAR_COLUMNS}
+            write_bar_store(root, minutes, columns, source=fingerprint, csv_columns=meta['csv_columns'])
+            return cls(root)
+
+        minutes, columns, csv_columns = _parse_csv(csv_path)
+        write_bar_store(root, minutes, columns, source=fingerprint, csv_columns=csv_columns)
+        return cls(root)
+
+    def __len__(self):
+        return len(self.minutes)
+
+    def span(self, start=None, end=None):
+        """[start, end) に入る足の位置範囲 (lo, hi) を返す"""
+        lo = 0 if start is None else int(np.searchsorted(self.minutes, to_minute(start), side='left'))
+        hi = len(self.minutes) if end is None else int(np.searchsorted(self.minutes, to_minute(end), side='left'))
+        return lo, max(lo, hi)
+
+    def arrays(self, start=None, end=None):
+        """[start, end) の列をメモリマップのまま返す（'minute' + OHLCV）"""
+        lo, hi = self.span(start, end)
+        out = {MINUTE_COLUMN: self.minutes[lo:hi]}
+        for name in BAR_COLUMNS:
+            out[name] = self.columns[name][lo:hi]
+        return out
+
+    def load(self, start=None, end=None):
+        """
+        [start, end) の1分足を DataFrame で返す。
+
+        Returns:
+            pd.DataFrame: index=timestamp（datetime64[ns]）, 列=open/high/low/close/volume
+        """
+        arrays = self.arrays(start, end)
+        index = pd.DatetimeIndex(
+            (np.asarray(arrays[MINUTE_COLUMN]) * NS_PER_MINUTE).view('datetime64[ns]'),
+            name='timestamp',
+        )
+        return pd.DataFrame(
+            {name: np.asarray(arrays[name]) for name in BAR_COLUMNS},
+            index=index,
+        )
+
+
+def load_bars(csv_path, start=None, end=None, root=None):
+    """CSV のバーストアを（必要なら作成して）開き、[start, end) の1分足を返す"""
+    return BarStore.from_csv(csv_path, root=root).load(start, end)
@@ -0,0 +1,59 @@
+"""
+詳細リスト表示用のデータ整形（app.py の「詳細リスト」タブで使う）
+"""
+
+import pandas as pd
+
+WEEKDAY_ORDER = ['月', '火', '水', '木', '金', '土', '日']
+WEEKDAY_MAP = dict(enumerate(WEEKDAY_ORDER))
+
+
+def derive_weekday_series(date_series):
+    date_parsed = pd.to_datetime(date_series, errors='coerce')
+    return date_parsed.dt.dayofweek.map(WEEKDAY_MAP)
+
+
+def first_available(row, columns):
+    for col in columns:
+        val = row.get(col)
+        if pd.notna(val):
+            return val
+    return pd.NA
+
+
+def build_detail_view_dataframe(results_df, source_df):
+    base_df = results_df.copy()
+    base_df['date'] = pd.to_datetime(base_df.get('date'), errors='coerce').dt.date
+
+    source_meta = source_df.copy()
+    source_meta['date'] = pd.to_datetime(source_meta.get('date'), errors='coerce').dt.date
+
+    optional_cols = [
+        'date', 'skip_minutes', 'used_tier_index', 'used_mm_rate',
+        'used_notional', 'used_tier_min_notional', 'used_tier_max_notional',
+    ]
+    available_meta_cols = [c for c in optional_cols if c in source_meta.columns]
+    if available_meta_cols:
+        source_meta = source_meta[available_meta_cols].drop_duplicates(subset=['date'])
+
+    merged_df = base_df.merge(source_meta, on='date', how='left', suffixes=('', '_src'))
+
+    merged_df['weekday_jp'] = derive_weekday_series(merged_df.get('date'))
+    merged_df['is_loss_cut'] = merged_df.get('symbol', '').astype(str).str.contains('❌|🔵')
+
+    merged_df['move_vs_entry'] = merged_df.apply(
+        lambda row: first_available(row, ['phase2_high', 'phase2_low']) - row.get('entry')
+        if pd.notna(first_available(row, ['phase2_high', 'phase2_low'])) and pd.notna(row.get('entry')) else pd.NA,
+        axis=1,
+    )
+    merged_df['reach_time'] = merged_df.apply(
+        lambda row: first_available(row, ['phase2_high_time', 'phase2_low_time']),
+        axis=1,
+    )
+    merged_df['target_price'] = merged_df.apply(
+        lambda row: first_available(row, ['phase2_high', 'phase2_low']),
+        axis=1,
+    )
+    merged_df['skip_minutes'] = pd.to_numeric(merged_df.get('skip_minutes'), errors='coerce').fillna(0)
+
+    return merged_df
@@ -3,6 +3,7 @@ Simple Adjustment Factor ロスカットモデル
 BingXの adjustment factor をベースにした簡易ロスカット計算
 """
 
+import numpy as np
 import yaml
 from pathlib import Path
 
@@ -103,6 +104,8 @@ class SimpleAFModel:
         """取引所ティック単位に合わせて価格を正規化（未設定時はそのまま）。"""
         if not self.price_tick or self.price_tick <= 0:
             return price
+        if isinstance(price, np.ndarray):
+            return np.round(price / self.price_tick) * self.price_tick
         return round(price / self.price_tick) * self.price_tick
     
     def is_liquidated_long(self, entry_price, current_price, leverage, position_margin, additional_margin=0):
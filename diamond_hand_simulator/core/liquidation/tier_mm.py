@@ -1,12 +1,26 @@
 """Tier-based Maintenance Margin (mm_rate) liquidation model for BingX."""
 
+import logging
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
 import yaml
 
+logger = logging.getLogger(__name__)
+
+# (leverage, position_margin, additional_margin) ごとのロスカット距離のキャッシュ件数
+DISTANCE_CACHE_SIZE = 4096
+
 
 class TierMMModel:
-    """維持証拠金率(mm_rate)ティアを使ったロスカット目安モデル。"""
+    """
+    維持証拠金率(mm_rate)ティアを使ったロスカット目安モデル。
+
+    ティアは初期化時に「境界の昇順配列 + 区間ごとの mm_rate」へコンパイルし、
+    searchsorted で引く。calc_liq_price_long/short は建値の配列もそのまま受け取れる。
+    計算過程のログは logging の DEBUG レベルで出す（既定では出ない）。
+    """
 
     def __init__(self, config_path=None):
         if config_path is None:
@@ -22,6 +36,8 @@ class TierMMModel:
             self.config.get('safety_multiplier', 1.0)
         )
         self.tiers = self._load_tiers(self.config)
+        self._tier_bounds, self._tier_rates = self._compile_tiers(self.tiers)
+        self._cached_distance = lru_cache(maxsize=DISTANCE_CACHE_SIZE)(self._distance_for_margin)
 
     def _load_config(self, config_path):
         path = Path(config_path)
@@ -76,13 +92,53 @@ class TierMMModel:
             )
         return converted
 
-    def _infer_notional(self, leverage, position_margin, entry_price=None, qty=None):
-        if qty is not None and entry_price is not None and qty > 0 and entry_price > 0:
-            return entry_price * qty
+    def _compile_tiers(self, tiers):
+        """
+        ティアを (境界の昇順配列, 区間ごとの mm_rate) に変換する。
+
+        rates[searchsorted(bounds, notional, 'right')] が、ティアを先頭から順に
+        調べる従来の判定（最初に当てはまったティア、無ければ最後のティア）と一致する。
+        """
+        bounds = sorted({
+            float(value)
+            for tier in tiers
+            for value in (tier.get('min_notional', 0), tier.get('max_notional'))
+            if value is not None
+        })
+        rates = [self._walk_tiers(float('-inf'))] + [self._walk_tiers(b) for b in bounds]
+        return np.array(bounds, dtype=np.float64), np.array(rates, dtype=np.float64)
+
+    def _walk_tiers(self, notional):
+        for tier in self.tiers:
+            min_notional = tier.get('min_notional', 0)
+            max_notional = tier.get('max_notional')
+            mm_rate = tier.get('mm_rate', self.default_mm_rate)
 
-        if entry_price is not None and entry_price > 0:
-            inferred_qty = (position_margin * leverage) / entry_price
-            return entry_price * inferred_qty
+            if notional < min_notional:
+                continue
+            if max_notional is None or notional < max_notional:
+                return mm_rate
+
+        return self.tiers[-1].get('mm_rate', self.default_mm_rate)
+
+    def _infer_notional(self, leverage, position_margin, entry_price=None, qty=None):
+        """
+        想定元本。qty と建値があれば建値×数量、無ければ 証拠金×レバレッジ。
+
+        建値から数量を逆算しても (margin*leverage/entry)*entry = margin*leverage なので、
+        建値に依らない証拠金×レバレッジをそのまま使う。
+        """
+        if qty is not None and entry_price is not None:
+            qty_arr = np.asarray(qty, dtype=np.float64)
+            entry_arr = np.asarray(entry_price, dtype=np.float64)
+            if qty_arr.ndim or entry_arr.ndim:
+                return np.where(
+                    (qty_arr > 0) & (entry_arr > 0),
+                    entry_arr * qty_arr,
+                    position_margin * leverage,
+                )
+            if qty > 0 and entry_price > 0:
+                return entry_price * qty
 
         return position_margin * leverage
 
@@ -98,35 +154,44 @@ class TierMMModel:
         return min(2.0, max(0.5, value))
 
     def _resolve_mm_rate(self, notional):
-        for tier in self.tiers:
-            min_notional = tier.get('min_notional', 0)
-            max_notional = tier.get('max_notional')
-            mm_rate = tier.get('mm_rate', self.default_mm_rate)
+        """想定元本に対応する mm_rate（配列なら配列で返す）"""
+        positions = np.searchsorted(self._tier_bounds, notional, side='right')
+        if np.ndim(positions):
+            return self._tier_rates[positions]
+        return float(self._tier_rates[positions])
 
-            if notional < min_notional:
-                continue
-            if max_notional is None or notional < max_notional:
-                return mm_rate
+    def _distance_for_notional(self, notional, total_margin):
+        mm_rate = self._resolve_mm_rate(notional)
+        effective_mm_rate = mm_rate * self.safety_multiplier
+        # 距離 = 総証拠金率 - 維持証拠金率
+        distance_pct = np.maximum(0.0, (total_margin / notional) - effective_mm_rate)
+        if np.ndim(distance_pct):
+            return distance_pct, mm_rate, effective_mm_rate
+        return float(distance_pct), mm_rate, effective_mm_rate
 
-        return self.tiers[-1].get('mm_rate', self.default_mm_rate)
+    def _distance_for_margin(self, leverage, position_margin, additional_margin):
+        return self._distance_for_notional(position_margin * leverage, position_margin + additional_margin)
 
     def calc_liq_distance_pct(self, leverage, position_margin, additional_margin=0, entry_price=None, qty=None):
         total_margin = position_margin + additional_margin
         notional = self._infer_notional(leverage, position_margin, entry_price, qty)
-        mm_rate = self._resolve_mm_rate(notional)
-        effective_mm_rate = mm_rate * self.safety_multiplier
+        if qty is None:
+            # 想定元本が (leverage, position_margin) だけで決まるのでキャッシュを使う
+            distance_pct, mm_rate, effective_mm_rate = self._cached_distance(
+                leverage, position_margin, additional_margin
+            )
+        else:
+            distance_pct, mm_rate, effective_mm_rate = self._distance_for_notional(notional, total_margin)
+
         self.current_mm_rate = effective_mm_rate
         self.current_notional = notional  # 任意（デバッグに便利）
-        print(
-            f"[TierMM] notional={notional:.2f}, mm_rate={mm_rate:.6f}, "
-            f"safety_multiplier={self.safety_multiplier:.3f}, "
-            f"effective_mm_rate={effective_mm_rate:.6f}, total_margin={total_margin:.2f}"
-        )
-
-
-        # 距離 = 総証拠金率 - 維持証拠金率
-        distance_pct = (total_margin / notional) - effective_mm_rate
-        return max(0.0, distance_pct)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[TierMM] notional=%s, mm_rate=%s, safety_multiplier=%.3f, "
+                "effective_mm_rate=%s, total_margin=%.2f",
+                notional, mm_rate, self.safety_multiplier, effective_mm_rate, total_margin,
+            )
+        return distance_pct
 
     def calc_liq_price_long(self, entry_price, leverage, position_margin, additional_margin=0, qty=None):
         distance_pct = self.calc_liq_distance_pct(
@@ -153,6 +218,8 @@ class TierMMModel:
     def _normalize_price(self, price):
         if not self.price_tick or self.price_tick <= 0:
             return price
+        if isinstance(price, np.ndarray):
+            return np.round(price / self.price_tick) * self.price_tick
         return round(price / self.price_tick) * self.price_tick
 
     def is_liquidated_long(self, entry_price, current_price, leverage, position_margin, additional_margin=0, qty=None):
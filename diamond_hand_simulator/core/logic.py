@@ -4,7 +4,9 @@
 ※ データは事前にフィルタ済みなので、パラメータチェックは不要
 """
 
+import numpy as np
 import pandas as pd
+from core.aggregate_engine import NAT_NS, NS_PER_MINUTE
 from core.liquidation.simple_af import SimpleAFModel
 
 # === 設定（ここを変更すれば判定ロジックを調整可能） ===
@@ -262,19 +264,364 @@ def judge_all(df_aggregates, liq_model, leverage, position_margin, additional_ma
     return results
 
 
+RESULT_COLUMNS = [
+    'date', 'type', 'symbol', 'detail', 'judgment_label', 'judgment_hours_actual',
+    'entry', 'phase2_high', 'phase2_high_time', 'phase2_low', 'phase2_low_time', 'skip_minutes',
+    'position', 'result', 'liq_price_long', 'liq_price_short', 'liq_time', 'breach_time',
+    'closest_distance', 'is_loss_cut',
+]
+
+
+def _bar_arrays(bars):
+    """BarStore または 1分足 DataFrame から (時刻ns, high, low) を取り出す"""
+    if bars is None:
+        return None
+    if hasattr(bars, 'minutes'):
+        ts = np.asarray(bars.minutes, dtype=np.int64) * NS_PER_MINUTE
+        return ts, np.asarray(bars.columns['high']), np.asarray(bars.columns['low'])
+    ts = np.asarray(bars.index, dtype='datetime64[ns]').view(np.int64)
+    return ts, bars['high'].to_numpy(dtype=np.float64), bars['low'].to_numpy(dtype=np.float64)
+
+
+def _window_positions(ts, starts, ends):
+    """
+    各行の [start, end) に入る足の位置を1次元に並べて返す。
+
+    Returns:
+        tuple: (行番号, 足の位置, 各行の足数)
+    """
+    lo = np.searchsorted(ts, starts, side='left')
+    hi = np.searchsorted(ts, ends, side='left')
+    lengths = np.maximum(hi - lo, 0)
+    row = np.repeat(np.arange(len(starts)), lengths)
+    seg_start = np.cumsum(lengths) - lengths
+    pos = np.repeat(lo, lengths) + (np.arange(lengths.sum()) - np.repeat(seg_start, lengths))
+    return row, pos, lengths
+
+
+def _first_hit(row, mask, n_rows):
+    """行ごとに mask が最初に True になる1次元位置（無ければ -1）"""
+    out = np.full(n_rows, -1, dtype=np.int64)
+    hits = np.flatnonzero(mask)
+    if len(hits):
+        rows_hit, first = np.unique(row[hits], return_index=True)
+        out[rows_hit] = hits[first]
+    return out
+
+
+def _liq_price_arrays(liq_model, long_entry, short_entry, leverage, position_margin, additional_margin):
+    """建値の配列からロスカット価格の配列を求める（モデルの配列対応メソッドで一括計算）"""
+    liq_long = liq_model.calc_liq_price_long(long_entry, leverage, position_margin, additional_margin)
+    liq_short = liq_model.calc_liq_price_short(short_entry, leverage, position_margin, additional_margin)
+    return (
+        np.broadcast_to(np.asarray(liq_long, dtype=np.float64), long_entry.shape),
+        np.broadcast_to(np.asarray(liq_short, dtype=np.float64), short_entry.shape),
+    )
+
+
+def _format_hhmm(values_ns, fallback="不明"):
+    times = pd.DatetimeIndex(np.asarray(values_ns, dtype=np.int64).view('datetime64[ns]'))
+    return pd.Series(times.strftime("%H:%M")).fillna(fallback).to_numpy(dtype=object)
+
+
+def judge_table(df_aggregates, liq_model, leverage, position_margin, additional_margin=0, bars=None):
+    """
+    全日のデータを一括判定し、結果を1行1日の DataFrame で返す（judge_all の列指向版）
+
+    判定規則・シンボル・詳細文は judge_day と同じ。info の中身は列に展開する
+    （liq_time, breach_time, closest_distance など）。
+
+    Args:
+        df_aggregates: フィルタ済みの日次集計データ
+        bars: 1分足（BarStore または index=時刻の DataFrame）。
+            指定するとPhase2の高値・安値とその時刻、ロスカット時刻を1分足から求める
+
+    Returns:
+        pd.DataFrame: RESULT_COLUMNS の列を持つ判定結果
+    """
+    n = len(df_aggregates)
+    if n == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    long_entry = df_aggregates['long_entry'].to_numpy(dtype=np.float64)
+    short_entry = df_aggregates['short_entry'].to_numpy(dtype=np.float64)
+    phase1_high = df_aggregates['phase1_high'].to_numpy(dtype=np.float64)
+    phase1_low = df_aggregates['phase1_low'].to_numpy(dtype=np.float64)
+    phase2_high = df_aggregates['phase2_high'].to_numpy(dtype=np.float64).copy()
+    phase2_low = df_aggregates['phase2_low'].to_numpy(dtype=np.float64).copy()
+    phase2_breach_ns = np.asarray(df_aggregates['phase2_breach_long_time'], dtype='datetime64[ns]').view(np.int64)
+    if 'skip_minutes' in df_aggregates.columns:
+        skip_minutes = df_aggregates['skip_minutes'].to_numpy()
+    else:
+        skip_minutes = np.zeros(n, dtype=np.int64)
+
+    liq_long, liq_short = _liq_price_arrays(
+        liq_model, long_entry, short_entry, leverage, position_margin, additional_margin
+    )
+
+    phase2_high_ns = np.full(n, NAT_NS)
+    phase2_low_ns = np.full(n, NAT_NS)
+    liq_ns = np.full(n, NAT_NS)
+
+    bar_arrays = _bar_arrays(bars)
+    if bar_arrays is not None:
+        ts, high, low = bar_arrays
+        starts = np.asarray(df_aggregates['threshold_time'], dtype='datetime64[ns]').view(np.int64)
+        ends = np.asarray(df_aggregates['judgment_end_time'], dtype='datetime64[ns]').view(np.int64)
+        row, pos, lengths = _window_positions(ts, starts, ends)
+
+        nonempty = lengths > 0
+        if nonempty.any():
+            seg_start = (np.cumsum(lengths) - lengths)[nonempty]
+            win_high = high[pos]
+            win_low = low[pos]
+            phase2_high[nonempty] = np.fmax.reduceat(win_high, seg_start)
+            phase2_low[nonempty] = np.fmin.reduceat(win_low, seg_start)
+
+            # idxmax/idxmin と同じく最初に極値を付けた足
+            high_hit = _first_hit(row, win_high == phase2_high[row], n)
+            low_hit = _first_hit(row, win_low == phase2_low[row], n)
+            phase2_high_ns = np.where(high_hit >= 0, ts[pos[high_hit]], NAT_NS)
+            phase2_low_ns = np.where(low_hit >= 0, ts[pos[low_hit]], NAT_NS)
+
+            # ロスカット価格を下回った最初の時刻
+            liq_hit = _first_hit(row, win_low <= liq_long[row], n)
+            liq_ns = np.where(liq_hit >= 0, ts[pos[liq_hit]], NAT_NS)
+
+    # ===== 第1ロジック：開場〜閾値での判定 =====
+    long_safe_phase1 = phase1_low >= liq_long
+    short_safe_phase1 = phase1_high <= liq_short
+    is_long = long_safe_phase1
+    is_short = short_safe_phase1 & ~long_safe_phase1
+    is_none = ~is_long & ~is_short
+
+    # ===== 第2ロジック：閾値以降〜判定終了時刻での判定 =====
+    distance = long_entry - phase2_low
+    is_liquidated = is_long & (phase2_low <= liq_long)
+    is_breached = is_long & ~is_liquidated & (phase2_low < long_entry)
+    is_recovered = is_breached & (distance / long_entry * 100 < 0.5)
+    is_warning = is_breached & ~is_recovered
+    is_win = is_long & ~is_liquidated & ~is_breached
+    is_short_breached = is_short & (phase2_high > short_entry)
+    is_short_held = is_short & ~is_short_breached
+
+    result = np.select(
+        [is_none, is_liquidated, is_recovered, is_warning, is_win, is_short_breached, is_short_held],
+        ['🔵', '❌', '✅', '🟠', '💎', '⤴️', '⏬'],
+        default='',
+    ).astype(object)
+    position = np.select([is_long, is_short], ['LONG', 'SHORT'], default='NONE').astype(object)
+    symbol = np.where(
+        is_none,
+        '🔵',
+        np.where(is_long, '🟢 → ', '🔴 → ').astype(object) + result,
+    )
+
+    liq_time_ns = np.where(is_liquidated, liq_ns, NAT_NS)
+    breach_time_ns = np.where(is_breached, phase2_breach_ns, NAT_NS)
+    liq_time_str = _format_hhmm(liq_time_ns)
+    breach_time_str = _format_hhmm(phase2_breach_ns)
+    threshold_min = df_aggregates['threshold_min'].to_numpy()
+
+    details = []
+    for i in range(n):
+        r = result[i]
+        if r == '🔵':
+            detail = f'開場{threshold_min[i]}分以内にロング/ショート共にロスカット'
+        elif r == '❌':
+            detail = f'ロスカット（{liq_time_str[i]}）'
+        elif r == '✅':
+            detail = f'建値割れ後回復（最大-${distance[i]:.2f}、{breach_time_str[i]}）'
+        elif r == '🟠':
+            detail = f'マイナス継続（最大-${distance[i]:.2f}、{breach_time_str[i]}）'
+        elif r == '💎':
+            detail = f'完全勝利（最小+${distance[i]:.2f}）'
+        elif r == '⤴️':
+            detail = '建値上抜け'
+        else:
+            detail = f'終日マイナス（最低値: ${phase2_low[i]:.2f}）'
+        details.append(append_open_bar_skip_detail(detail, skip_minutes[i]))
+
+    def as_time(values_ns):
+        return np.asarray(values_ns, dtype=np.int64).view('datetime64[ns]')
+
+    return pd.DataFrame({
+        'date': df_aggregates['date'].to_numpy(),
+        'type': df_aggregates['type'].to_numpy(),
+        'symbol': symbol,
+        'detail': details,
+        'judgment_label': df_aggregates['judgment_label'].to_numpy(),
+        'judgment_hours_actual': df_aggregates['judgment_hours_actual'].to_numpy(),
+        'entry': np.where(is_short, short_entry, long_entry),
+        'phase2_high': phase2_high,
+        'phase2_high_time': as_time(phase2_high_ns),
+        'phase2_low': phase2_low,
+        'phase2_low_time': as_time(phase2_low_ns),
+        'skip_minutes': skip_minutes,
+        'position': position,
+        'result': result,
+        'liq_price_long': liq_long,
+        'liq_price_short': liq_short,
+        'liq_time': as_time(liq_time_ns),
+        'breach_time': as_time(breach_time_ns),
+        'closest_distance': np.where(is_long & ~is_liquidated, distance, np.nan),
+        'is_loss_cut': is_liquidated | is_none,
+    }, columns=RESULT_COLUMNS)
+
+
+SWEEP_WINDOW_COLUMNS = ['threshold_min', 'judgment_label']
+
+SWEEP_COLUMNS = [
+    'threshold_min', 'judgment_label', 'leverage', 'position_margin', 'additional_margin',
+    'liq_distance_pct', 'total', 'win_count', 'recovery_count', 'warning_count',
+    'short_count', 'loss_count', 'win_rate', 'loss_rate',
+]
+
+
+def _normalize_prices(liq_model, prices):
+    """モデルの _normalize_price と同じティック丸め（配列版）"""
+    tick = getattr(liq_model, 'price_tick', 0.0)
+    if not tick or tick <= 0:
+        return prices
+    return np.round(prices / tick) * tick
+
+
+def _monotone_boundary(n_rows, n_points, predicate):
+    """
+    行ごとに predicate が成り立つ最小の位置 k（無ければ n_points）を二分探索で求める。
+
+    predicate(idx) は各行を位置 idx[行] で評価した bool 配列を返し、
+    位置について False → True の単調でなければならない。
+    """
+    lo = np.zeros(n_rows, dtype=np.int64)
+    hi = np.full(n_rows, n_points, dtype=np.int64)
+    active = lo < hi
+    while active.any():
+        mid = (lo + hi) // 2
+        ok = predicate(np.minimum(mid, n_points - 1)) & active
+        hi = np.where(ok, mid, hi)
+        lo = np.where(active & ~ok, mid + 1, lo)
+        active = lo < hi
+    return lo
+
+
+def _interval_counts(start, stop, n_points, mask=None):
+    """[start, stop) 区間が各位置をいくつ覆うかを数える"""
+    keep = start < stop
+    if mask is not None:
+        keep &= mask
+    diff = np.zeros(n_points + 1, dtype=np.int64)
+    np.add.at(diff, start[keep], 1)
+    np.add.at(diff, stop[keep], -1)
+    return np.cumsum(diff[:-1])
+
+
+def _sweep_window(df_window, liq_model, distances):
+    """
+    1つの判定期間について、昇順に並んだロスカット距離 distances ごとの判定件数を返す。
+
+    ロスカット価格は距離に対して単調なので、各日の結果は
+    「ロング安全になる距離」「ショート安全になる距離」「Phase2 を生き残る距離」の
+    3つの境界だけで決まる。境界を二分探索で求め、距離ごとの件数は区間の重なりで数える。
+    """
+    n_points = len(distances)
+    long_entry = df_window['long_entry'].to_numpy(dtype=np.float64)
+    short_entry = df_window['short_entry'].to_numpy(dtype=np.float64)
+    phase1_high = df_window['phase1_high'].to_numpy(dtype=np.float64)
+    phase1_low = df_window['phase1_low'].to_numpy(dtype=np.float64)
+    phase2_high = df_window['phase2_high'].to_numpy(dtype=np.float64)
+    phase2_low = df_window['phase2_low'].to_numpy(dtype=np.float64)
+    n = len(long_entry)
+
+    def liq_long(idx):
+        return _normalize_prices(liq_model, long_entry * (1 - distances[idx]))
+
+    def liq_short(idx):
+        return _normalize_prices(liq_model, short_entry * (1 + distances[idx]))
+
+    k_long = _monotone_boundary(n, n_points, lambda idx: phase1_low >= liq_long(idx))
+    k_short = _monotone_boundary(n, n_points, lambda idx: phase1_high <= liq_short(idx))
+    k_survive = _monotone_boundary(n, n_points, lambda idx: ~(phase2_low <= liq_long(idx)))
+
+    # 距離に依らない Phase2 の結果（judge_table と同じ規則）
+    breached = phase2_low < long_entry
+    recovered = breached & ((long_entry - phase2_low) / long_entry * 100 < 0.5)
+    warning = breached & ~recovered
+
+    zeros = np.zeros(n, dtype=np.int64)
+    end = np.full(n, n_points, dtype=np.int64)
+    survive_start = np.maximum(k_long, k_survive)
+
+    none_count = _interval_counts(zeros, np.minimum(k_long, k_short), n_points)
+    liquidated_count = _interval_counts(k_long, survive_start, n_points)
+    return {
+        'total': np.full(n_points, n, dtype=np.int64),
+        'win_count': _interval_counts(survive_start, end, n_points, ~breached),
+        'recovery_count': _interval_counts(survive_start, end, n_points, recovered),
+        'warning_count': _interval_counts(survive_start, end, n_points, warning),
+        'short_count': _interval_counts(k_short, k_long, n_points),
+        'loss_count': none_count + liquidated_count,
+    }
+
+
+def judge_sweep(df_aggregates, liq_model, leverages, position_margin, additional_margins=(0,)):
+    """
+    レバレッジ × 追加証拠金のグリッド全体を、判定期間ごとに一括で集計する
+
+    judge_table（1分足なし）を各グリッド点で実行した場合と同じ件数を返す。
+
+    Args:
+        df_aggregates: 日次集計データ（複数の閾値・判定期間を含んでよい）
+        leverages: レバレッジ倍率のリスト
+        position_margin: ポジション証拠金（USD）
+        additional_margins: 追加証拠金（USD）のリスト
+
+    Returns:
+        pd.DataFrame: SWEEP_COLUMNS の列を持つ、判定期間 × グリッド点ごとの集計
+    """
+    grid = pd.MultiIndex.from_product(
+        [list(leverages), list(additional_margins)], names=['leverage', 'additional_margin']
+    ).to_frame(index=False)
+    if len(df_aggregates) == 0 or len(grid) == 0:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+
+    grid_distance = np.array([
+        liq_model.calc_liq_distance_pct(lev, position_margin, add)
+        for lev, add in zip(grid['leverage'], grid['additional_margin'])
+    ], dtype=np.float64)
+    distances, grid_pos = np.unique(grid_distance, return_inverse=True)
+
+    frames = []
+    for key, df_window in df_aggregates.groupby(SWEEP_WINDOW_COLUMNS, sort=False, dropna=False):
+        counts = _sweep_window(df_window, liq_model, distances)
+        frame = grid.copy()
+        frame['threshold_min'], frame['judgment_label'] = key
+        frame['position_margin'] = position_margin
+        frame['liq_distance_pct'] = grid_distance
+        for name, values in counts.items():
+            frame[name] = values[grid_pos]
+        frames.append(frame)
+
+    out = pd.concat(frames, ignore_index=True)
+    out['win_rate'] = out['win_count'] / out['total'] * 100
+    out['loss_rate'] = out['loss_count'] / out['total'] * 100
+    return out[SWEEP_COLUMNS]
+
+
 def calculate_statistics(results):
-    """判定結果から統計情報を計算"""
-    total = len(results)
-
-    symbol_counts = {}
-    for r in results:
-        symbol = r['symbol']
-        symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
-
-    win_count = sum(1 for r in results if '💎' in r['symbol'])
-    recovery_count = sum(1 for r in results if '✅' in r['symbol'])
-    warning_count = sum(1 for r in results if '🟠' in r['symbol'])
-    loss_count = sum(1 for r in results if '❌' in r['symbol'] or r['symbol'] == '🔵')
+    """判定結果から統計情報を計算（judge_table の DataFrame / judge_all のリストどちらも可）"""
+    if isinstance(results, pd.DataFrame):
+        symbols = results['symbol'] if 'symbol' in results.columns else pd.Series(dtype=object)
+    else:
+        symbols = pd.Series([r['symbol'] for r in results], dtype=object)
+    total = len(symbols)
+
+    symbol_counts = {k: int(v) for k, v in symbols.value_counts(sort=False).items()}
+
+    win_count = int(symbols.str.contains('💎', regex=False).sum())
+    recovery_count = int(symbols.str.contains('✅', regex=False).sum())
+    warning_count = int(symbols.str.contains('🟠', regex=False).sum())
+    loss_count = int((symbols.str.contains('❌', regex=False) | (symbols == '🔵')).sum())
 
     win_rate = (win_count / total * 100) if total > 0 else 0
 
@@ -1,5 +1,6 @@
 from datetime import timedelta
 
+import numpy as np
 import pandas as pd
 
 
@@ -58,3 +59,68 @@ def select_open_reference_bar(bars_df, open_time, offset_min=DEFAULT_OPEN_BAR_OF
     if last_bar is None:
         return None, 0
     return last_bar, last_skip
+
+
+def select_open_reference_bars(bar_times, high, low, open_times,
+                               offset_min=DEFAULT_OPEN_BAR_OFFSET_MINUTES,
+                               max_skip=DEFAULT_OPEN_BAR_MAX_SKIP,
+                               price_tick=DEFAULT_PRICE_TICK_FALLBACK,
+                               starts=None, stops=None):
+    """
+    全セッションの開場基準足をまとめて選択する（select_open_reference_bar の配列版）。
+
+    セッション × スキップ候補の時刻を1回の searchsorted で引き、
+    レンジ (high-low) が price_tick 以上の最初の足、無ければ最後に見つかった足を採用する。
+
+    Args:
+        bar_times: 1分足の時刻（昇順）
+        high, low: 1分足の高値・安値
+        open_times: 各セッションの開場時刻
+        starts, stops: 各セッションで探してよい足の位置範囲 [start, stop)（省略時は全体）
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (採用した足の位置, スキップ分数)
+        対象足が1本も無いセッションは (-1, 0)
+    """
+    ts = np.asarray(bar_times, dtype='datetime64[ns]').view(np.int64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    open_ns = np.asarray(open_times, dtype='datetime64[ns]').view(np.int64)
+    n_sessions = len(open_ns)
+
+    starts = np.zeros(n_sessions, dtype=np.int64) if starts is None else np.asarray(starts, dtype=np.int64)
+    stops = np.full(n_sessions, len(ts), dtype=np.int64) if stops is None else np.asarray(stops, dtype=np.int64)
+
+    minute_ns = np.int64(60 * 10**9)
+    skips = np.arange(max(int(max_skip), 0) + 1, dtype=np.int64)
+    tick = resolve_price_tick(price_tick)
+
+    # candidates[セッション, スキップ] = その分に入る最初の足の位置
+    bar_ns = (open_ns + int(offset_min) * minute_ns)[:, None] + skips[None, :] * minute_ns
+    candidates = np.maximum(np.searchsorted(ts, bar_ns, side='left'), starts[:, None])
+    found = candidates < stops[:, None]
+    safe = np.where(found, candidates, 0)
+    if len(ts):
+        found &= ts[safe] < bar_ns + minute_ns
+        wide = found & ((high[safe] - low[safe]) >= tick)
+    else:
+        wide = found
+
+    indices = np.full(n_sessions, -1, dtype=np.int64)
+    skip_minutes = np.zeros(n_sessions, dtype=np.int64)
+
+    # 最後に見つかった足（全てスキップ対象だった場合の採用足）
+    any_found = found.any(axis=1)
+    last = len(skips) - 1 - np.argmax(found[:, ::-1], axis=1)
+    rows = np.flatnonzero(any_found)
+    indices[rows] = safe[rows, last[rows]]
+    skip_minutes[rows] = skips[last[rows]]
+
+    # レンジが price_tick 以上の最初の足
+    any_wide = wide.any(axis=1)
+    first = np.argmax(wide, axis=1)
+    rows = np.flatnonzero(any_wide)
+    indices[rows] = safe[rows, first[rows]]
+    skip_minutes[rows] = skips[first[rows]]
+
+    return indices, skip_minutes
@@ -0,0 +1,44 @@
+"""
+対象銘柄（BingX 無期限先物）と、銘柄ごとの入出力パス
+
+GOLD は既存のファイル名・保存先（data/derived 直下）をそのまま使い、
+それ以外の銘柄は data/derived/symbol=<銘柄>/ に分けて保存する。
+"""
+
+from pathlib import Path
+
+SYMBOLS = {
+    'GOLD': 'NCCOGOLD2USD-USDT',
+    'SILVER': 'NCCOSILVER2USD-USDT',
+    'SP500': 'NCSISP5002USD-USDT',
+    'NASDAQ': 'NCSINASDAQ1002USD-USDT',
+    'DOW': 'NCSIDOWJONES2USD-USDT',
+    'WTI': 'NCCOOILWTI2USD-USDT',
+    'BRENT': 'NCCOOILBRENT2USD-USDT',
+}
+
+DEFAULT_SYMBOL = 'GOLD'
+RAW_FILE_SUFFIX = "20251101_"
+
+
+def raw_paths(data_dir, symbol):
+    """(1分足 CSV, 市場休場 CSV) のパス"""
+    raw_dir = Path(data_dir) / "raw"
+    if symbol == DEFAULT_SYMBOL:
+        return (
+            raw_dir / f"gold_1min_{RAW_FILE_SUFFIX}.csv",
+            raw_dir / f"market_hours_{RAW_FILE_SUFFIX}.csv",
+        )
+    prefix = symbol.lower()
+    return (
+        raw_dir / f"{prefix}_1min_{RAW_FILE_SUFFIX}.csv",
+        raw_dir / f"{prefix}_market_hours_{RAW_FILE_SUFFIX}.csv",
+    )
+
+
+def derived_dir(data_dir, symbol):
+    """集計データの保存先"""
+    derived = Path(data_dir) / "derived"
+    if symbol == DEFAULT_SYMBOL:
+        return derived
+    return derived / f"symbol={symbol}"
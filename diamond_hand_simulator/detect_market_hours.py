@@ -5,6 +5,8 @@ import pandas as pd
 from datetime import datetime, timedelta
 import os
 
+from core.bar_store import NS_PER_MINUTE, BarStore
+
 # 設定
 INPUT_FILE = "gold_1min_20260211_20260212.csv"  # 入力CSVファイル
 START_DATE = None  # 開始日（例: "2026-02-01"）Noneの場合は全期間
@@ -42,47 +44,38 @@ def detect_market_hours(input_file, start_date=None, end_date=None,
         
         return None
     
-    # データ読み込み
+    # データ読み込み（バーストア経由: CSV の解析は初回のみ、以後はメモリマップ）
     print(f"\n📂 読み込み中: {input_file}")
     try:
-        df = pd.read_csv(input_file)
+        store = BarStore.from_csv(input_file)
     except Exception as e:
         print(f"❌ ファイル読み込みエラー: {e}")
         return None
-    
-    # 日時列の作成・変換
-    try:
-        if '日時' in df.columns:
-            df['DateTime'] = pd.to_datetime(df['日時'])
-        else:
-            df['DateTime'] = pd.to_datetime(df['日付'] + ' ' + df['時刻'])
-    except Exception as e:
-        print(f"❌ 日時変換エラー: {e}")
-        print(f"利用可能なカラム: {list(df.columns)}")
+
+    if len(store) == 0:
+        print("⚠️  データがありません")
         return None
-    
-    df = df.sort_values('DateTime').reset_index(drop=True)
-    
-    print(f"✅ 読み込み完了: {len(df):,}行")
-    print(f"   全期間: {df['DateTime'].min()} ～ {df['DateTime'].max()}")
-    
-    # 期間フィルタリング
+
+    first_time = pd.Timestamp(int(store.minutes[0]) * NS_PER_MINUTE)
+    last_time = pd.Timestamp(int(store.minutes[-1]) * NS_PER_MINUTE)
+    print(f"✅ 読み込み完了: {len(store):,}行")
+    print(f"   全期間: {first_time} ～ {last_time}")
+
+    # 期間指定は load(start, end) で切り出す（end は翌日0時の手前まで）
+    start_dt = pd.to_datetime(start_date) if start_date else None
+    end_dt = pd.to_datetime(end_date) + timedelta(days=1) if end_date else None
+
+    df = store.load(start_dt, end_dt).reset_index()
+    df = df.rename(columns={'timestamp': 'DateTime', 'open': '始値', 'close': '終値'})
+
     if start_date or end_date:
-        original_len = len(df)
-        
         if start_date:
-            start_dt = pd.to_datetime(start_date)
-            df = df[df['DateTime'] >= start_dt]
             print(f"\n📅 開始日でフィルタ: {start_date}")
-        
         if end_date:
-            end_dt = pd.to_datetime(end_date) + timedelta(days=1) - timedelta(seconds=1)
-            df = df[df['DateTime'] <= end_dt]
             print(f"📅 終了日でフィルタ: {end_date}")
-        
-        df = df.reset_index(drop=True)
-        print(f"✅ フィルタ後: {len(df):,}行（{original_len - len(df):,}行除外）")
-        
+
+        print(f"✅ フィルタ後: {len(df):,}行（{len(store) - len(df):,}行除外）")
+
         if len(df) > 0:
             print(f"   対象期間: {df['DateTime'].min()} ～ {df['DateTime'].max()}")
         else:
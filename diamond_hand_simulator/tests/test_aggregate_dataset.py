@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+import pytest
+
+from core.aggregate_dataset import (
+    has_aggregate_dataset,
+    read_aggregate_dataset,
+    write_aggregate_dataset,
+)
+
+DERIVED_DIR = Path(__file__).resolve().parents[1] / 'data' / 'derived'
+
+
+@pytest.fixture
+def dataset_root(tmp_path):
+    frames = [
+        pd.read_parquet(DERIVED_DIR / f'daily_aggregates_t{t}_j{j}.parquet')
+        for t in (1, 2)
+        for j in (1, 12, 'close')
+    ]
+    root = tmp_path / 'daily_aggregates'
+    write_aggregate_dataset(pd.concat(frames, ignore_index=True), root)
+    return root
+
+
+def test_dataset_partition_matches_single_file(dataset_root):
+    assert has_aggregate_dataset(dataset_root)
+
+    for threshold_min, judgment_hours, label in [(2, None, 'close'), (1, 12, '12')]:
+        expected = pd.read_parquet(DERIVED_DIR / f'daily_aggregates_t{threshold_min}_j{label}.parquet')
+        actual = read_aggregate_dataset(dataset_root, [threshold_min], [judgment_hours])
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_dataset_reads_several_windows_in_one_scan(dataset_root):
+    df = read_aggregate_dataset(dataset_root, threshold_minutes=[2], judgment_hours=[1, None])
+
+    assert set(df['threshold_min']) == {2}
+    assert set(df['judgment_label']) == {'1h', '次の閉場'}
+    assert df['judgment_hours'].isna().sum() == (df['judgment_label'] == '次の閉場').sum()
+
+
+def test_rewriting_dataset_replaces_partitions(dataset_root):
+    df = read_aggregate_dataset(dataset_root, [1], [1])
+    write_aggregate_dataset(df.iloc[:3], dataset_root)
+
+    assert len(read_aggregate_dataset(dataset_root, [1], [1])) == 3
+    # _metadata は今回書いたパーティションだけを指す
+    assert len(read_aggregate_dataset(dataset_root)) == 3
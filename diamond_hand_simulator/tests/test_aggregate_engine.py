@@ -0,0 +1,102 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from build_daily_aggregates import process_daily_data
+from core.aggregate_engine import (
+    AGGREGATE_SCHEMA,
+    aggregates_to_table,
+    process_daily_data_vectorized,
+)
+
+
+TIME_COLUMNS = [field.name for field in AGGREGATE_SCHEMA if pa.types.is_timestamp(field.type)]
+
+
+@pytest.fixture
+def synthetic_market():
+    rng = np.random.default_rng(42)
+    idx = pd.date_range('2025-11-03 08:00', '2025-11-15', freq='1min')
+    # 06:00-08:00 の日次休場と週末休場、ところどころの欠損足
+    idx = idx[(idx.hour != 6) & (idx.hour != 7) & (idx.dayofweek < 5)]
+    idx = idx[rng.random(len(idx)) > 0.02]
+
+    price = 4000 + np.cumsum(rng.normal(0, 0.5, len(idx)))
+    high = price + np.abs(rng.normal(0, 0.3, len(idx)))
+    low = price - np.abs(rng.normal(0, 0.3, len(idx)))
+    flat = rng.random(len(idx)) < 0.1
+    high[flat] = price[flat]
+    low[flat] = price[flat]
+    df_1min = pd.DataFrame({'open': price, 'high': high, 'low': low, 'close': price}, index=idx)
+
+    gaps = np.flatnonzero(np.diff(idx.values) > np.timedelta64(15, 'm'))
+    df_market = pd.DataFrame({
+        '閉場時刻': idx[gaps],
+        '開場時刻': idx[gaps + 1],
+        'タイプ': '日次休場',
+    })
+    df_market['次の閉場時刻'] = df_market['閉場時刻'].shift(-1)
+    df_market.loc[df_market.index[-1], '次の閉場時刻'] = idx.max()
+    return df_1min, df_market
+
+
+def _normalize_time_units(df):
+    df = df.copy()
+    for col in TIME_COLUMNS:
+        df[col] = df[col].astype('datetime64[ns]')
+    return df
+
+
+@pytest.mark.parametrize('judgment_hours', [
+    [1, 2, 3, 12, 24, None],
+    [3],
+])
+def test_vectorized_matches_reference(synthetic_market, judgment_hours):
+    df_1min, df_market = synthetic_market
+    kwargs = dict(
+        threshold_minutes=[1, 2, 5],
+        judgment_hours=judgment_hours,
+        open_bar_offset_minutes=1,
+        open_bar_max_skip=3,
+        price_tick=0.1,
+    )
+
+    expected = process_daily_data(df_1min, df_market, **kwargs)
+    actual = process_daily_data_vectorized(df_1min, df_market, **kwargs)
+
+    assert len(actual) > 0
+    pd.testing.assert_frame_equal(actual, _normalize_time_units(expected))
+
+
+def test_vectorized_matches_reference_for_truncated_sessions(synthetic_market):
+    df_1min, df_market = synthetic_market
+    # Phase2 が空になる短いセッションを混ぜる
+    df_market = df_market.copy()
+    df_market['次の閉場時刻'] = df_market['開場時刻'] + pd.to_timedelta(
+        np.arange(len(df_market)) % 7, unit='min'
+    )
+
+    kwargs = dict(threshold_minutes=[1, 2, 3], judgment_hours=[1, None])
+    expected = process_daily_data(df_1min, df_market, **kwargs)
+    actual = process_daily_data_vectorized(df_1min, df_market, **kwargs)
+
+    pd.testing.assert_frame_equal(actual, _normalize_time_units(expected))
+
+
+def test_aggregates_table_matches_existing_parquet_schema(synthetic_market):
+    df_1min, df_market = synthetic_market
+    df = process_daily_data_vectorized(df_1min, df_market, threshold_minutes=[2], judgment_hours=[None])
+
+    table = aggregates_to_table(df)
+    existing = pq.read_schema(
+        Path(__file__).resolve().parents[1] / 'data' / 'derived' / 'daily_aggregates_t2_jclose.parquet'
+    )
+
+    assert table.schema.equals(existing, check_metadata=False)
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from core.bar_store import BarStore, default_store_dir, load_bars
+
+
+def _write_csv(path, start, periods, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(start, periods=periods, freq='1min')
+    price = np.round(4000 + np.cumsum(rng.normal(0, 0.5, periods)), 2)
+    df = pd.DataFrame({
+        '日時': idx.strftime('%Y-%m-%d %H:%M:%S'),
+        '日付': idx.strftime('%Y-%m-%d'),
+        '時刻': idx.strftime('%H:%M:%S'),
+        '始値': price,
+        '高値': price + 0.5,
+        '安値': price - 0.5,
+        '終値': price,
+        '出来高': 1.0,
+    })
+    df.to_csv(path, index=False, mode='a' if path.exists() else 'w', header=not path.exists())
+
+
+def _read_csv_reference(path):
+    df = pd.read_csv(path, parse_dates=['日時'])
+    df = df.rename(columns={'日時': 'timestamp', '始値': 'open', '高値': 'high', '安値': 'low', '終値': 'close'})
+    return df.set_index('timestamp')
+
+
+def test_load_matches_csv_and_slices_range(tmp_path):
+    csv_path = tmp_path / 'gold_1min_test.csv'
+    _write_csv(csv_path, '2025-11-03 08:00', 600)
+
+    bars = load_bars(csv_path)
+    expected = _read_csv_reference(csv_path)
+
+    assert default_store_dir(csv_path).exists()
+    np.testing.assert_array_equal(bars.index.values, expected.index.values.astype('datetime64[ns]'))
+    for col in ['open', 'high', 'low', 'close']:
+        np.testing.assert_array_equal(bars[col].to_numpy(), expected[col].to_numpy())
+
+    window = load_bars(csv_path, '2025-11-03 09:00', '2025-11-03 09:30')
+    assert len(window) == 30
+    assert window.index[0] == pd.Timestamp('2025-11-03 09:00')
+    assert window.index[-1] == pd.Timestamp('2025-11-03 09:29')
+
+
+def test_appended_csv_rows_are_added_incrementally(tmp_path):
+    csv_path = tmp_path / 'gold_1min_test.csv'
+    _write_csv(csv_path, '2025-11-03 08:00', 100)
+    assert len(BarStore.from_csv(csv_path)) == 100
+
+    _write_csv(csv_path, '2025-11-03 09:40', 50, seed=1)
+    store = BarStore.from_csv(csv_path)
+
+    assert len(store) == 150
+    expected = _read_csv_reference(csv_path)
+    np.testing.assert_array_equal(store.load()['close'].to_numpy(), expected['close'].to_numpy())
+
+
+def test_rewritten_csv_rebuilds_store(tmp_path):
+    csv_path = tmp_path / 'gold_1min_test.csv'
+    _write_csv(csv_path, '2025-11-03 08:00', 100)
+    BarStore.from_csv(csv_path)
+
+    csv_path.unlink()
+    _write_csv(csv_path, '2025-12-01 08:00', 20, seed=3)
+    bars = load_bars(csv_path)
+
+    assert len(bars) == 20
+    assert bars.index[0] == pd.Timestamp('2025-12-01 08:00')
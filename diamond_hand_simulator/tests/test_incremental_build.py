@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from build_daily_aggregates import (
+    file_fingerprint,
+    is_appended_since,
+    last_finalized_close_time,
+    partition_filename,
+    prepare_market_hours,
+    write_partitions,
+)
+from core.aggregate_engine import process_daily_data_vectorized
+
+
+THRESHOLDS = [1, 2]
+JUDGMENTS = [1, 6, None]
+
+
+def _make_bars(end):
+    rng = np.random.default_rng(7)
+    idx = pd.date_range('2025-11-03 08:00', end, freq='1min')
+    idx = idx[(idx.hour != 6) & (idx.hour != 7)]
+    price = 4000 + np.cumsum(rng.normal(0, 0.5, len(idx)))
+    return pd.DataFrame(
+        {'open': price, 'high': price + 0.3, 'low': price - 0.3, 'close': price},
+        index=idx,
+    )
+
+
+def _market_hours(df_1min):
+    idx = df_1min.index
+    gaps = np.flatnonzero(np.diff(idx.values) > np.timedelta64(15, 'm'))
+    return pd.DataFrame({
+        '閉場日時': idx[gaps],
+        '開場日時': idx[gaps + 1],
+        'タイプ': '日次休場',
+    })
+
+
+def _build(df_1min, output_dir, replace_after=None):
+    last_1min_time = df_1min.index.max()
+    df_market, mask_last = prepare_market_hours(_market_hours(df_1min), last_1min_time)
+    if replace_after is not None:
+        df_market_target = df_market[df_market['閉場時刻'] > replace_after]
+    else:
+        df_market_target = df_market
+    df = process_daily_data_vectorized(df_1min, df_market_target, THRESHOLDS, JUDGMENTS)
+    write_partitions(df, output_dir, THRESHOLDS, JUDGMENTS, replace_after=replace_after)
+    return last_finalized_close_time(df_market, mask_last, last_1min_time)
+
+
+def test_incremental_build_matches_full_rebuild(tmp_path):
+    full_dir = tmp_path / 'full'
+    inc_dir = tmp_path / 'inc'
+    full_dir.mkdir()
+    inc_dir.mkdir()
+
+    # 途中（セッション中）までのデータで一度ビルドし、残りを増分で追加
+    watermark = _build(_make_bars('2025-11-06 12:00'), inc_dir)
+    assert watermark is not None
+    _build(_make_bars('2025-11-08 05:00'), inc_dir, replace_after=watermark)
+
+    _build(_make_bars('2025-11-08 05:00'), full_dir)
+
+    for t in THRESHOLDS:
+        for j in JUDGMENTS:
+            name = partition_filename(t, j)
+            expected = pd.read_parquet(full_dir / name)
+            actual = pd.read_parquet(inc_dir / name)
+            pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_backfilled_session_is_not_finalized():
+    df_1min = _make_bars('2025-11-06 12:00')
+    last_1min_time = df_1min.index.max()
+    df_market, mask_last = prepare_market_hours(_market_hours(df_1min), last_1min_time)
+
+    watermark = last_finalized_close_time(df_market, mask_last, last_1min_time)
+
+    assert mask_last.sum() == 1
+    assert watermark < df_market.loc[mask_last, '閉場時刻'].iloc[0]
+
+
+def test_is_appended_since_detects_append_and_rewrite(tmp_path):
+    path = tmp_path / 'bars.csv'
+    path.write_text('日時,始値\n2025-11-03 08:00:00,1\n', encoding='utf-8')
+    fingerprint = file_fingerprint(path)
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('2025-11-03 08:01:00,2\n')
+    assert is_appended_since(path, fingerprint)
+
+    path.write_text('日時,始値\n2025-11-03 08:00:00,9\n2025-11-03 08:01:00,2\n', encoding='utf-8')
+    assert not is_appended_since(path, fingerprint)
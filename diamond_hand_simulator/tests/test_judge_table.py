@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.aggregate_engine import process_daily_data_vectorized
+from core.liquidation.simple_af import SimpleAFModel
+from core.liquidation import TierMMModel
+from core.logic import calculate_statistics, judge_all, judge_sweep, judge_table
+
+DERIVED_DIR = Path(__file__).resolve().parents[1] / 'data' / 'derived'
+
+
+def _info_times(results, key):
+    values = [r['info'].get(key, pd.NaT) if r['info'] else pd.NaT for r in results]
+    return pd.to_datetime(pd.Series(values, dtype=object)).astype('datetime64[ns]')
+
+
+def _assert_same_results(results, table):
+    expected = pd.DataFrame(results)
+    assert list(table['symbol']) == list(expected['symbol'])
+    assert list(table['detail']) == list(expected['detail'])
+    np.testing.assert_allclose(table['entry'], expected['entry'])
+    np.testing.assert_allclose(table['phase2_high'], expected['phase2_high'].astype(float))
+    np.testing.assert_allclose(table['phase2_low'], expected['phase2_low'].astype(float))
+    for col in ['phase2_high_time', 'phase2_low_time']:
+        pd.testing.assert_series_equal(
+            table[col], pd.to_datetime(expected[col]).astype('datetime64[ns]'), check_names=False
+        )
+    pd.testing.assert_series_equal(table['liq_time'], _info_times(results, 'liq_time'), check_names=False)
+    pd.testing.assert_series_equal(table['breach_time'], _info_times(results, 'breach_time'), check_names=False)
+    assert calculate_statistics(table) == calculate_statistics(results)
+
+
+@pytest.mark.parametrize('leverage', [100, 500, 1500, 8000])
+def test_judge_table_matches_judge_all_on_aggregates(leverage):
+    df = pd.read_parquet(DERIVED_DIR / 'daily_aggregates_t2_jclose.parquet')
+    model = SimpleAFModel()
+
+    results = judge_all(df, model, leverage=leverage, position_margin=100, additional_margin=0)
+    table = judge_table(df, model, leverage=leverage, position_margin=100, additional_margin=0)
+
+    _assert_same_results(results, table)
+
+
+@pytest.mark.parametrize('leverage,additional_margin', [(500, 0), (500, 100), (2000, 0)])
+def test_judge_table_matches_judge_all_with_1min_bars(leverage, additional_margin):
+    rng = np.random.default_rng(1)
+    idx = pd.date_range('2025-11-03 08:00', '2025-11-08', freq='1min')
+    idx = idx[(idx.hour != 6) & (idx.hour != 7)]
+    price = 4000 + np.cumsum(rng.normal(0, 0.8, len(idx)))
+    df_1min = pd.DataFrame(
+        {'open': price, 'high': price + np.abs(rng.normal(0, 0.4, len(idx))),
+         'low': price - np.abs(rng.normal(0, 0.4, len(idx))), 'close': price},
+        index=idx,
+    )
+    gaps = np.flatnonzero(np.diff(idx.values) > np.timedelta64(15, 'm'))
+    df_market = pd.DataFrame({'閉場時刻': idx[gaps], '開場時刻': idx[gaps + 1], 'タイプ': '日次休場'})
+    df_market['次の閉場時刻'] = df_market['閉場時刻'].shift(-1).fillna(idx.max())
+    df = process_daily_data_vectorized(df_1min, df_market, threshold_minutes=[2], judgment_hours=[3, None])
+    model = SimpleAFModel()
+
+    results = judge_all(df, model, leverage, 100, additional_margin, df_1min=df_1min)
+    table = judge_table(df, model, leverage, 100, additional_margin, bars=df_1min)
+
+    _assert_same_results(results, table)
+
+
+def test_judge_table_empty_input_returns_empty_table():
+    df = pd.read_parquet(DERIVED_DIR / 'daily_aggregates_t2_jclose.parquet').iloc[:0]
+    table = judge_table(df, SimpleAFModel(), leverage=500, position_margin=100)
+
+    assert table.empty
+    assert calculate_statistics(table)['total'] == 0
+
+
+@pytest.mark.parametrize('model_cls', [SimpleAFModel, TierMMModel])
+def test_judge_sweep_matches_judge_table_per_grid_point(model_cls):
+    df = pd.concat([
+        pd.read_parquet(DERIVED_DIR / 'daily_aggregates_t2_jclose.parquet'),
+        pd.read_parquet(DERIVED_DIR / 'daily_aggregates_t2_j3.parquet'),
+    ], ignore_index=True)
+    model = model_cls()
+    leverages = [100, 300, 500, 1000, 2000]
+    additional_margins = [0, 50, 200]
+
+    sweep = judge_sweep(df, model, leverages, 100, additional_margins)
+
+    assert len(sweep) == 2 * len(leverages) * len(additional_margins)
+    for row in sweep.itertuples():
+        window = df[df['judgment_label'] == row.judgment_label]
+        stats = calculate_statistics(
+            judge_table(window, model, row.leverage, 100, row.additional_margin)
+        )
+        assert row.total == stats['total']
+        assert row.win_count == stats['win_count']
+        assert row.recovery_count == stats['recovery_count']
+        assert row.warning_count == stats['warning_count']
+        assert row.loss_count == stats['loss_count']
+        assert row.win_rate == pytest.approx(stats['win_rate'])
+
+
+def test_judge_sweep_empty_input_returns_empty_frame():
+    df = pd.read_parquet(DERIVED_DIR / 'daily_aggregates_t2_jclose.parquet').iloc[:0]
+    sweep = judge_sweep(df, SimpleAFModel(), [500], 100, [0])
+
+    assert sweep.empty
@@ -4,12 +4,34 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 import pandas as pd
+import pytest
 
-from core.open_reference import select_open_reference_bar
+from core.aggregate_engine import process_daily_data_vectorized
+from core.open_reference import select_open_reference_bar, select_open_reference_bars
 from build_daily_aggregates import process_daily_data
 
 
-def test_select_open_reference_bar_skips_low_range_bar():
+def select_open_reference_bar_batch(bars_df, open_time, offset_min, max_skip, price_tick):
+    """select_open_reference_bars を1セッション分だけ呼び、単体版と同じ形で返す"""
+    indices, skips = select_open_reference_bars(
+        bars_df.index, bars_df['high'], bars_df['low'], [open_time],
+        offset_min=offset_min, max_skip=max_skip, price_tick=price_tick,
+    )
+    if indices[0] < 0:
+        return None, 0
+    return bars_df.iloc[indices[0]], int(skips[0])
+
+
+SELECTORS = pytest.mark.parametrize(
+    'select', [select_open_reference_bar, select_open_reference_bar_batch], ids=['single', 'batch']
+)
+BUILDERS = pytest.mark.parametrize(
+    'build', [process_daily_data, process_daily_data_vectorized], ids=['reference', 'vectorized']
+)
+
+
+@SELECTORS
+def test_select_open_reference_bar_skips_low_range_bar(select):
     open_time = pd.Timestamp('2025-01-01 08:00:00')
     bars = pd.DataFrame(
         {
@@ -25,7 +47,7 @@ def test_select_open_reference_bar_skips_low_range_bar():
         ]),
     )
 
-    bar, skip_minutes = select_open_reference_bar(
+    bar, skip_minutes = select(
         bars_df=bars,
         open_time=open_time,
         offset_min=1,
@@ -37,7 +59,8 @@ def test_select_open_reference_bar_skips_low_range_bar():
     assert skip_minutes == 1
 
 
-def test_select_open_reference_bar_returns_last_checked_when_all_skipped():
+@SELECTORS
+def test_select_open_reference_bar_returns_last_checked_when_all_skipped(select):
     open_time = pd.Timestamp('2025-01-01 08:00:00')
     bars = pd.DataFrame(
         {
@@ -53,7 +76,7 @@ def test_select_open_reference_bar_returns_last_checked_when_all_skipped():
         ]),
     )
 
-    bar, skip_minutes = select_open_reference_bar(
+    bar, skip_minutes = select(
         bars_df=bars,
         open_time=open_time,
         offset_min=1,
@@ -65,7 +88,8 @@ def test_select_open_reference_bar_returns_last_checked_when_all_skipped():
     assert skip_minutes == 2
 
 
-def test_process_daily_data_records_skip_minutes():
+@BUILDERS
+def test_process_daily_data_records_skip_minutes(build):
     df_1min = pd.DataFrame(
         {
             'open': [100.0, 100.0, 100.0, 100.0, 99.5, 99.0],
@@ -92,7 +116,7 @@ def test_process_daily_data_records_skip_minutes():
         }
     )
 
-    out = process_daily_data(
+    out = build(
         df_1min=df_1min,
         df_market=df_market,
         threshold_minutes=[1],
@@ -105,3 +129,40 @@ def test_process_daily_data_records_skip_minutes():
     assert len(out) == 1
     assert int(out.iloc[0]['skip_minutes']) == 1
     assert out.iloc[0]['reference_open_time'] == pd.Timestamp('2025-01-01 08:02:00')
+
+
+@SELECTORS
+def test_select_open_reference_bar_returns_none_without_bars(select):
+    bars = pd.DataFrame(
+        {'open': [100.0], 'high': [100.1], 'low': [99.9], 'close': [100.0]},
+        index=pd.to_datetime(['2025-01-01 09:00:00']),
+    )
+
+    bar, skip_minutes = select(
+        bars_df=bars,
+        open_time=pd.Timestamp('2025-01-01 08:00:00'),
+        offset_min=1,
+        max_skip=3,
+        price_tick=0.01,
+    )
+
+    assert bar is None
+    assert skip_minutes == 0
+
+
+def test_select_open_reference_bars_respects_session_bounds():
+    bars = pd.DataFrame(
+        {'high': [100.001, 100.05, 100.05], 'low': [100.0, 100.0, 100.0]},
+        index=pd.to_datetime(['2025-01-01 08:01:00', '2025-01-01 08:02:00', '2025-01-02 08:01:00']),
+    )
+    open_times = pd.to_datetime(['2025-01-01 08:00:00', '2025-01-02 08:00:00', '2025-01-03 08:00:00'])
+
+    indices, skips = select_open_reference_bars(
+        bars.index, bars['high'], bars['low'], open_times,
+        offset_min=1, max_skip=3, price_tick=0.01,
+        starts=[0, 2, 3], stops=[1, 3, 3],
+    )
+
+    # 1セッション目は [0, 1) しか見られないので、狭いレンジの足を最後の候補として採用
+    assert list(indices) == [0, 2, -1]
+    assert list(skips) == [0, 0, 0]
@@ -0,0 +1,77 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from build_daily_aggregates import (
+    aggregate_sessions,
+    collect_aggregate_shards,
+    prepare_market_hours,
+    shard_sessions,
+    submit_aggregate_shards,
+)
+from core.aggregate_engine import process_daily_data_vectorized
+from core.bar_store import write_bar_store
+from core.symbols import DEFAULT_SYMBOL, SYMBOLS, derived_dir, raw_paths
+
+SETTINGS = {'open_bar_offset_minutes': 1, 'open_bar_max_skip': 3, 'price_tick': 0.1}
+
+
+@pytest.fixture
+def bar_store_market(tmp_path):
+    rng = np.random.default_rng(3)
+    idx = pd.date_range('2025-11-03 08:00', '2025-11-12', freq='1min')
+    idx = idx[(idx.hour != 6) & (idx.hour != 7)]
+    price = 4000 + np.cumsum(rng.normal(0, 0.5, len(idx)))
+    df_1min = pd.DataFrame(
+        {'open': price, 'high': price + 0.3, 'low': price - 0.3, 'close': price, 'volume': 1.0},
+        index=idx,
+    )
+    minutes = np.asarray(idx, dtype='datetime64[ns]').view(np.int64) // (60 * 10**9)
+    write_bar_store(tmp_path / 'bars', minutes, {c: df_1min[c].to_numpy() for c in df_1min.columns})
+
+    gaps = np.flatnonzero(np.diff(idx.values) > np.timedelta64(15, 'm'))
+    df_market = pd.DataFrame({'閉場日時': idx[gaps], '開場日時': idx[gaps + 1], 'タイプ': '日次休場'})
+    df_market, _ = prepare_market_hours(df_market, idx.max())
+    return tmp_path / 'bars', df_1min, df_market
+
+
+def test_shard_sessions_covers_all_sessions_in_order(bar_store_market):
+    _, _, df_market = bar_store_market
+    shards = shard_sessions(df_market, 4)
+
+    assert len(shards) == 4
+    pd.testing.assert_frame_equal(pd.concat(shards), df_market)
+    assert len(shard_sessions(df_market.iloc[:2], 8)) == 2
+
+
+def test_parallel_shards_match_single_pass(bar_store_market):
+    root, df_1min, df_market = bar_store_market
+    expected = process_daily_data_vectorized(
+        df_1min, df_market, threshold_minutes=[1, 2, 3, 4, 5], judgment_hours=[1, 6, 12, 24, None],
+        open_bar_offset_minutes=1, open_bar_max_skip=3, price_tick=0.1,
+    )
+
+    sequential = aggregate_sessions(root, df_market, SETTINGS, [1, 2, 3, 4, 5], [1, 6, 12, 24, None])
+    pd.testing.assert_frame_equal(sequential, expected)
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = submit_aggregate_shards(executor, root, df_market, SETTINGS, 3)
+        parallel = collect_aggregate_shards(futures)
+
+    pd.testing.assert_frame_equal(
+        parallel,
+        aggregate_sessions(root, df_market, SETTINGS),
+    )
+
+
+def test_symbol_paths_keep_gold_layout(tmp_path):
+    assert raw_paths(tmp_path, DEFAULT_SYMBOL)[0].name == 'gold_1min_20251101_.csv'
+    assert derived_dir(tmp_path, DEFAULT_SYMBOL) == tmp_path / 'derived'
+    assert derived_dir(tmp_path, 'SILVER') == tmp_path / 'derived' / 'symbol=SILVER'
+    assert len({raw_paths(tmp_path, s)[0] for s in SYMBOLS}) == len(SYMBOLS)
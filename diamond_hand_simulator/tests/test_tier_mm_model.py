@@ -5,6 +5,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 import tempfile
 
+import numpy as np
 import pytest
 import yaml
 
@@ -94,3 +95,46 @@ def test_safety_multiplier_increase_reduces_liq_distance_pct(tmp_path):
     )
 
     assert distance_s12 < distance_s1
+
+
+def test_compiled_tiers_match_linear_walk_with_gaps_and_overlaps(tmp_path):
+    cfg = {
+        'price_tick': 0.0,
+        'tiers': [
+            {'min_notional': 50, 'max_notional': 150, 'mm_rate': 0.001},
+            {'min_notional': 100, 'max_notional': 300, 'mm_rate': 0.002},
+            {'min_notional': 400, 'max_notional': None, 'mm_rate': 0.004},
+        ],
+    }
+    path = tmp_path / 'bingx_gaps.yaml'
+    path.write_text(yaml.safe_dump(cfg), encoding='utf-8')
+    model = TierMMModel(config_path=str(path))
+
+    notionals = np.array([-1, 0, 49.9, 50, 99.9, 100, 149.9, 150, 299.9, 300, 350, 400, 1e9])
+    expected = [model._walk_tiers(n) for n in notionals]
+
+    assert list(model._resolve_mm_rate(notionals)) == expected
+    assert [model._resolve_mm_rate(float(n)) for n in notionals] == expected
+
+
+def test_liq_price_accepts_entry_arrays():
+    model = TierMMModel()
+    entries = np.array([3999.95, 4000.05, 4123.456, 5000.0])
+
+    long_prices = model.calc_liq_price_long(entries, 500, 100, 25)
+    short_prices = model.calc_liq_price_short(entries, 500, 100, 25)
+
+    assert list(long_prices) == [model.calc_liq_price_long(e, 500, 100, 25) for e in entries]
+    assert list(short_prices) == [model.calc_liq_price_short(e, 500, 100, 25) for e in entries]
+
+
+def test_distance_is_cached_and_silent_by_default(capsys):
+    model = TierMMModel()
+
+    first = model.calc_liq_distance_pct(500, 100, 0, entry_price=4000)
+    second = model.calc_liq_distance_pct(500, 100, 0)
+
+    assert first == second
+    assert model._cached_distance.cache_info().hits == 1
+    assert model.current_notional == pytest.approx(50000)
+    assert capsys.readouterr().out == ''
@@ -4,10 +4,11 @@
 import requests
 import time
 from datetime import datetime, timedelta, timezone
-from collections import deque
 import statistics
 import csv
 
+from freeze_score import StreamingFreezeScore
+
 BASE_URL = "https://open-api.bingx.com"
 ENDPOINT_V2 = "/openApi/swap/v2/quote/klines"
 JST = timezone(timedelta(hours=9))
@@ -20,7 +21,7 @@ class FreezeEventDetector:
     """停止イベント検知専用クラス"""
     
     def __init__(self):
-        self.volatility_history = deque(maxlen=100)
+        self.scorer = StreamingFreezeScore()
         self.consecutive_high_scores = 0
         self.state = "NORMAL"
         self.freeze_start_index = None
@@ -29,31 +30,10 @@ class FreezeEventDetector:
         self.all_events = []
         
     def add_candle(self, candle):
-        hl_range = candle['high'] - candle['low']
-        self.volatility_history.append(hl_range)
+        self.scorer.add_candle(candle)
         
     def calculate_freeze_score(self):
-        if len(self.volatility_history) < 20:
-            return 0
-        
-        baseline = statistics.median(self.volatility_history)
-        recent = statistics.mean(list(self.volatility_history)[-5:])
-        
-        if baseline == 0:
-            return 0
-        
-        ratio = recent / baseline
-        
-        if ratio <= 0.1:
-            return 100
-        elif ratio <= 0.2:
-            return 80
-        elif ratio <= 0.3:
-            return 60
-        elif ratio <= 0.5:
-            return 40
-        else:
-            return 0
+        return self.scorer.score()
     
     def analyze_candle(self, candle, index):
         self.add_candle(candle)
@@ -0,0 +1,129 @@
+# bar_cache.py
+# BingX 1分足のローカルキャッシュ（銘柄ごと・日別CSV）
+#
+# - bar_cache/<銘柄>/<YYYY-MM-DD>.csv に1日ぶん（JST）の1分足を保存する
+# - 終わった日は一度取得したら二度と取りに行かない（当日だけ取り直す）
+# - 当日ぶんは <YYYY-MM-DD>.partial.csv に保存し、日が終わってから取り直して確定させる
+# - バックテストはキャッシュだけを読む（load_bars）
+
+import csv
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import requests
+
+BASE_URL = "https://open-api.bingx.com"
+ENDPOINT_V2 = "/openApi/swap/v2/quote/klines"
+JST = timezone(timedelta(hours=9))
+
+CACHE_DIR = "bar_cache"
+BAR_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+
+def _day_path(symbol, day, cache_dir=CACHE_DIR, partial=False):
+    suffix = ".partial.csv" if partial else ".csv"
+    return os.path.join(cache_dir, symbol, f"{day.strftime('%Y-%m-%d')}{suffix}")
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.astimezone(JST) if value.tzinfo else value.replace(tzinfo=JST)
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=JST)
+
+
+def fetch_klines(symbol, start_time, end_time):
+    """
+    v2 APIで期間の1分足を取得（[time(ms), open, high, low, close, volume] のリスト）
+    取得に失敗したら None（データなしの日は空リスト）
+    """
+    params = {
+        "symbol": symbol,
+        "interval": "1m",
+        "startTime": int(start_time.timestamp() * 1000),
+        "endTime": int(end_time.timestamp() * 1000),
+        "limit": 1440
+    }
+    try:
+        response = requests.get(BASE_URL + ENDPOINT_V2, params=params, timeout=10)
+        data = response.json()
+        if data.get("code") != 0:
+            print(f"  APIエラー: {data}")
+            return None
+        return [
+            [int(k["time"]), float(k["open"]), float(k["high"]), float(k["low"]),
+             float(k["close"]), float(k.get("volume", 0))]
+            for k in data.get("data") or []
+        ]
+    except Exception as e:
+        print(f"  エラー: {e}")
+        return None
+
+
+def _write_day(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(BAR_COLUMNS)
+        writer.writerows(sorted(rows))
+    os.replace(tmp, path)
+
+
+def update_cache(symbol, start_date, end_date=None, cache_dir=CACHE_DIR, pause_s=0.1, now=None):
+    """
+    キャッシュにない日だけを取得する（当日・途中までしかない日は取り直す）
+    戻り値: 取得した日数
+    """
+    start = _parse_date(start_date).replace(hour=0, minute=0, second=0, microsecond=0)
+    now = now or datetime.now(JST)
+    end = _parse_date(end_date) if end_date else now
+    fetched = 0
+
+    day = start
+    while day <= end:
+        path = _day_path(symbol, day, cache_dir)
+        partial_path = _day_path(symbol, day, cache_dir, partial=True)
+        day_end = day + timedelta(days=1)
+        complete = day_end <= now
+        # 確定ファイル（.csv）は日が終わってから書いたものだけ
+        if not (complete and os.path.exists(path)):
+            rows = fetch_klines(symbol, day, min(day_end, now) - timedelta(milliseconds=1))
+            if rows is not None:
+                if complete:
+                    _write_day(path, rows)
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+                else:
+                    _write_day(partial_path, rows)
+                fetched += 1
+                print(f"  {day.strftime('%Y-%m-%d')}: {len(rows):4d}本を取得")
+            time.sleep(pause_s)  # API制限対策
+        day = day_end
+    return fetched
+
+
+def load_bars(symbol, start_date=None, end_date=None, cache_dir=CACHE_DIR):
+    """
+    キャッシュから1分足を読む（index=JSTの時刻, open/high/low/close/volume, 時刻順・重複なし）
+    当日ぶん（.partial.csv）も含む
+    """
+    directory = os.path.join(cache_dir, symbol)
+    if not os.path.isdir(directory):
+        return pd.DataFrame(columns=BAR_COLUMNS[1:])
+
+    first = _parse_date(start_date).strftime("%Y-%m-%d") if start_date else ""
+    last = _parse_date(end_date).strftime("%Y-%m-%d") if end_date else "9999"
+    files = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(".csv") and first <= name[:10] <= last
+    )
+    if not files:
+        return pd.DataFrame(columns=BAR_COLUMNS[1:])
+
+    df = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+    df = df.drop_duplicates("time").sort_values("time")
+    df.index = pd.to_datetime(df.pop("time"), unit="ms", utc=True).dt.tz_convert(JST)
+    df.index.name = "timestamp"
+    return df
@@ -0,0 +1,111 @@
+# candle_feed.py
+# ライブ検知器向けの1分足の差分取り込み（strict / improved 共通）
+#
+# - 最後に取り込んだ確定足の時刻を覚えておき、次の取得はそれ以降の足だけを要求する
+# - 取り込み済みかどうかは最後の確定足の時刻との比較だけで判定する（O(1)）
+# - 起動時は bar_cache のローカルキャッシュから直近 window 本を読み込んで履歴を温める
+#
+# HTTP は呼び出し側が行う（request_params() で作ったパラメータで klines を叩き、
+# 返ってきた data を parse_klines() で変換してから ingest() に渡す）
+
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from bar_cache import CACHE_DIR, JST, load_bars
+
+BAR_MS = 60 * 1000   # 1分足
+MAX_LIMIT = 1440     # klines の1回の上限
+
+
+def parse_kline(kline):
+    """APIの1本 → ローソク足の辞書（'time' は足の開始時刻 ms）"""
+    ts = int(kline['time'])
+    return {
+        'time': ts,
+        'timestamp': datetime.fromtimestamp(ts / 1000),
+        'open': float(kline['open']),
+        'high': float(kline['high']),
+        'low': float(kline['low']),
+        'close': float(kline['close']),
+        'volume': float(kline.get('volume', 0))
+    }
+
+
+def parse_klines(klines):
+    """APIの data → ローソク足のリスト（古い順）。形式が不正なら KeyError / TypeError / ValueError"""
+    return sorted((parse_kline(k) for k in klines), key=lambda c: c['time'])
+
+
+class CandleFeed:
+    """1銘柄ぶんの確定足の履歴（新しい足だけを取り込む）"""
+
+    def __init__(self, symbol, window_size=100):
+        self.symbol = symbol
+        self.window_size = window_size
+        self.candles = deque(maxlen=window_size)
+        self.last_time = None    # 最後に取り込んだ確定足の時刻(ms)
+
+    def __len__(self):
+        return len(self.candles)
+
+    def _append(self, candle):
+        """確定足を1本追加（取り込み済み・古い足なら False）"""
+        ts = candle['time']
+        if self.last_time is not None and ts <= self.last_time:
+            return False
+        self.candles.append(candle)
+        self.last_time = ts
+        return True
+
+    def warm_start(self, cache_dir=CACHE_DIR, now_ms=None):
+        """
+        ローカルキャッシュから直近 window 本の確定足を読み込む
+        戻り値: 追加したローソク足のリスト（古い順）
+        """
+        now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+        current_bar = now_ms // BAR_MS * BAR_MS
+        since = datetime.fromtimestamp(now_ms / 1000, JST) - timedelta(days=1)
+        bars = load_bars(self.symbol, since.strftime("%Y-%m-%d"), cache_dir=cache_dir)
+        if bars.empty:
+            return []
+
+        times = bars.index.as_unit("ms").asi8
+        bars = bars[times < current_bar].tail(self.window_size)
+        added = []
+        for ts, row in zip(bars.index.as_unit("ms").asi8.tolist(), bars.itertuples()):
+            candle = parse_kline({'time': ts, 'open': row.open, 'high': row.high, 'low': row.low,
+                                  'close': row.close, 'volume': row.volume})
+            if self._append(candle):
+                added.append(candle)
+        return added
+
+    def request_params(self, now_ms=None):
+        """
+        次の klines 取得のパラメータ
+        最後の確定足の次から今の足まで（空きが window 本を超えたら直近 window+1 本）
+        """
+        params = {"symbol": self.symbol, "interval": "1m"}
+        now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+        if self.last_time is None:
+            missing = None
+        else:
+            missing = (now_ms // BAR_MS * BAR_MS - self.last_time) // BAR_MS
+
+        if missing is None or missing > self.window_size:
+            params["limit"] = self.window_size + 1
+        else:
+            params["startTime"] = self.last_time + BAR_MS
+            params["limit"] = min(MAX_LIMIT, max(1, missing) + 1)
+        return params
+
+    def ingest(self, candles):
+        """
+        ローソク足のリスト（parse_klines の結果・古い順）を取り込む
+        最後の1本は形成中の足として扱い、それより前の確定足のうち新しいものだけを追加する
+        戻り値: (追加した確定足のリスト, 形成中の足)
+        """
+        if not candles:
+            return [], None
+        added = [c for c in candles[:-1] if self._append(c)]
+        return added, candles[-1]
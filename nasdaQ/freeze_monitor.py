@@ -0,0 +1,228 @@
+# freeze_monitor.py
+# 複数銘柄の停止検知を1つのイベントループで回す非同期モニター
+#
+# - HTTP は aiohttp の ClientSession を1つだけ使い回す（keep-alive・同時接続数に上限）
+# - 銘柄ごとに取得タイミングをずらす（周期内の固定の位相 = ジッター）ので、
+#   数十銘柄でも同じ瞬間にリクエストが集中しない
+# - 判定は StrictFreezeDetector（差分取得・状態遷移）をそのまま使う
+# - 監視銘柄は watch_config.json から読む（NCSI / NCCO の全銘柄を自動検出することもできる）
+#
+# 使い方（nasdaQ ディレクトリで実行）:
+#     python freeze_monitor.py                       # watch_config.json の銘柄
+#     python freeze_monitor.py --discover            # BingX の NCSI / NCCO 全銘柄
+#     python freeze_monitor.py --config my_watch.json --interval 15 --jitter 5
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+import aiohttp
+
+from candle_feed import parse_klines
+from strict_freeze_detector import BASE_URL, WATCH_CONFIG, StrictFreezeDetector, report_results
+
+KLINES_ENDPOINT = "/openApi/swap/v3/quote/klines"
+CONTRACTS_ENDPOINT = "/openApi/swap/v2/quote/contracts"
+
+CONFIG_FILE = "watch_config.json"
+DEFAULT_SETTINGS = {
+    "interval_s": 15,          # 1銘柄あたりの取得周期
+    "jitter_s": 5,             # 銘柄ごとの取得タイミングのずれ（0〜jitter_s 秒）
+    "max_connections": 8,      # 同時接続数の上限
+    "timeout_s": 8,
+    "discover": False,         # True なら contracts から自動で銘柄を追加
+    "discover_prefixes": ["NCSI", "NCCO"],
+    "symbols": WATCH_CONFIG,
+}
+
+# 周期の終わりのこの秒数前に、その周期の結果をまとめて表示する
+REPORT_MARGIN_S = 0.5
+
+
+def load_watch_config(path=CONFIG_FILE):
+    """監視設定を読む（ファイルがなければ strict_freeze_detector の WATCH_CONFIG）"""
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f))
+    return settings
+
+
+def symbol_display_name(symbol):
+    """NCSINASDAQ1002USD-USDT → NASDAQ100 / NCCOGOLD2USD-USDT → GOLD"""
+    name = symbol.split("-")[0]
+    for prefix in ("NCSI", "NCCO"):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    if name.endswith("2USD"):
+        name = name[:-len("2USD")]
+    return name
+
+
+async def discover_symbols(session, prefixes):
+    """BingX の全契約から prefixes で始まる銘柄を探す"""
+    async with session.get(BASE_URL + CONTRACTS_ENDPOINT) as resp:
+        data = await resp.json(content_type=None)
+    if data.get("code") != 0:
+        print(f"  ⚠️ 銘柄の自動検出に失敗: {data}")
+        return []
+    return sorted(
+        c['symbol'] for c in data.get("data") or []
+        if c.get('symbol', '').startswith(tuple(prefixes))
+    )
+
+
+def merge_symbols(configured, discovered):
+    """設定の銘柄（名前・閾値の上書きを優先）に自動検出の銘柄を足す"""
+    merged = list(configured)
+    known = {c['symbol'] for c in configured}
+    for symbol in discovered:
+        if symbol not in known:
+            merged.append({"name": symbol_display_name(symbol), "symbol": symbol})
+    return merged
+
+
+class FreezeMonitor:
+    """全銘柄の取得・判定を1つのループで回す"""
+
+    def __init__(self, configs, interval_s=15, jitter_s=5, max_connections=8, timeout_s=8, seed=None):
+        self.detectors = [StrictFreezeDetector(config) for config in configs]
+        self.interval_s = interval_s
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout_s)
+        rng = random.Random(seed)
+        # 銘柄ごとの固定の位相（周期内の取得タイミング）
+        self.phases = {d.symbol: rng.uniform(0, max(0.0, min(jitter_s, interval_s - REPORT_MARGIN_S * 2)))
+                       for d in self.detectors}
+        self.results = {}   # 今の周期で出た結果（銘柄 → 結果）
+        self.errors = 0
+        self.requests = 0
+        self.iteration = 0
+        self._session = None
+
+    async def fetch_candles(self, detector):
+        """前回以降のローソク足を取得（古い順・失敗は None）"""
+        self.requests += 1
+        try:
+            params = detector.feed.request_params()
+            async with self._session.get(BASE_URL + KLINES_ENDPOINT, params=params) as resp:
+                data = await resp.json(content_type=None)
+            if isinstance(data, dict) and data.get("code") == 0 and data.get("data"):
+                return parse_klines(data['data'])
+            msg = data.get('msg', data) if isinstance(data, dict) else data
+            print(f"  ⚠️ {detector.name} APIエラー: {msg}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError, ValueError) as e:
+            print(f"  ⚠️ {detector.name} データ取得エラー: {e!r}")
+        self.errors += 1
+        return None
+
+    async def _watch(self, detector, start):
+        """1銘柄の監視ループ（周期ごとに自分の位相で取得）"""
+        phase = self.phases[detector.symbol]
+        k = 0
+        while True:
+            await asyncio.sleep(max(0.0, start + k * self.interval_s + phase - time.monotonic()))
+            candles = await self.fetch_candles(detector)
+            if candles:
+                # 1銘柄の失敗で他の銘柄の監視を止めない
+                try:
+                    self.results[detector.symbol] = detector.analyze_candles(candles)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"  ⚠️ {detector.name} 分析エラー: {e!r}")
+            k += 1
+            # 取得が周期を超えて遅れたら、次の周期に合わせる
+            k = max(k, int((time.monotonic() - start - phase) // self.interval_s) + 1)
+
+    async def _report(self, start):
+        """周期の終わりに、その周期の結果をまとめて表示する"""
+        while True:
+            self.iteration += 1
+            target = start + self.iteration * self.interval_s - REPORT_MARGIN_S
+            await asyncio.sleep(max(0.0, target - time.monotonic()))
+            now = datetime.now()
+            results, self.results = list(self.results.values()), {}
+            print(f"\n[{now.strftime('%H:%M:%S')}] チェック #{self.iteration}"
+                  f"（{len(results)}/{len(self.detectors)}銘柄）")
+            # 表示・ログ書き込みの失敗で監視全体を止めない
+            try:
+                report_results(results, now)
+            except Exception as e:
+                self.errors += 1
+                print(f"  ⚠️ 結果表示エラー: {e!r}")
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            self._session = session
+            start = time.monotonic()
+            tasks = [asyncio.create_task(self._watch(d, start)) for d in self.detectors]
+            tasks.append(asyncio.create_task(self._report(start)))
+            try:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                for t in tasks:
+                    t.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _discover(settings):
+    timeout = aiohttp.ClientTimeout(total=settings['timeout_s'])
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await discover_symbols(session, settings['discover_prefixes'])
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"  ⚠️ 銘柄の自動検出に失敗: {e!r}")
+        return []
+
+
+def run_monitor(settings):
+    """設定に従ってモニターを起動（Ctrl+C で終了）"""
+    configs = settings['symbols']
+    if settings['discover']:
+        discovered = asyncio.run(_discover(settings))
+        configs = merge_symbols(configs, discovered)
+        print(f"🔎 自動検出: {len(discovered)}銘柄 → 監視 {len(configs)}銘柄")
+
+    monitor = FreezeMonitor(
+        configs,
+        interval_s=settings['interval_s'],
+        jitter_s=settings['jitter_s'],
+        max_connections=settings['max_connections'],
+        timeout_s=settings['timeout_s'],
+    )
+    try:
+        asyncio.run(monitor.run())
+    except KeyboardInterrupt:
+        print("\n\n停止コマンドを受信。終了します...")
+        print(f"総チェック回数: {monitor.iteration} / リクエスト {monitor.requests}回（失敗 {monitor.errors}回）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="複数銘柄の停止検知（非同期モニター）")
+    parser.add_argument("--config", default=CONFIG_FILE, help="監視設定のJSON")
+    parser.add_argument("--discover", action="store_true", help="NCSI / NCCO の全銘柄を自動で追加")
+    parser.add_argument("--interval", type=float, default=None, help="取得周期（秒）")
+    parser.add_argument("--jitter", type=float, default=None, help="銘柄ごとの取得タイミングのずれ（秒）")
+    args = parser.parse_args()
+
+    settings = load_watch_config(args.config)
+    if args.discover:
+        settings['discover'] = True
+    if args.interval is not None:
+        settings['interval_s'] = args.interval
+    if args.jitter is not None:
+        settings['jitter_s'] = args.jitter
+
+    print("=" * 80)
+    print(f"🚀 BingX停止検知モニター（{settings['interval_s']}秒周期・同時接続{settings['max_connections']}）")
+    print("=" * 80)
+    run_monitor(settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# freeze_score.py
+# 停止スコアのストリーミング計算（全検知器・バックテスト共通）
+#
+# - ベースライン: 直近100本の値幅（高値-安値）の中央値を2つのヒープで保持（1本 O(log n)）
+# - 直近: 直近5本の値幅の平均を移動合計で保持（1本 O(1)）
+# - 結果は statistics.median / statistics.mean で毎回計算した場合と同じスコアになる
+#   （比率が閾値のごく近くのときだけ statistics.mean で計算し直す）
+
+import heapq
+import math
+import statistics
+from collections import deque
+
+# 比率の閾値 → スコア（上から順に判定）
+STRICT_CUTS = ((0.08, 100), (0.15, 80), (0.25, 60), (0.4, 40))   # strict_freeze_detector
+DEFAULT_CUTS = ((0.1, 100), (0.2, 80), (0.3, 60), (0.5, 40))     # improved / バックテスト
+
+WINDOW_SIZE = 100   # ベースラインの本数
+RECENT_SIZE = 5     # 直近の本数
+MIN_HISTORY = 20    # ベースラインに必要な最低本数
+
+# 比率が閾値からこの相対差以内なら厳密に計算し直す
+_EXACT_MARGIN = 1e-9
+
+
+def score_from_ratio(ratio, cuts=DEFAULT_CUTS):
+    """比率（直近 / ベースライン）→ 停止スコア"""
+    for cut, score in cuts:
+        if ratio <= cut:
+            return score
+    return 0
+
+
+class RollingMedian:
+    """固定長ウィンドウの中央値（2つのヒープ + 遅延削除）"""
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.window_size = window_size
+        self.window = deque()
+        self._low = []       # 下半分（符号反転した最大ヒープ）
+        self._high = []      # 上半分（最小ヒープ）
+        self._low_size = 0   # 削除待ちを除いた件数
+        self._high_size = 0
+        self._delayed = {}   # 値 → 削除待ちの件数
+
+    def __len__(self):
+        return len(self.window)
+
+    def _prune(self, heap, sign):
+        while heap:
+            value = sign * heap[0]
+            count = self._delayed.get(value)
+            if not count:
+                break
+            if count == 1:
+                del self._delayed[value]
+            else:
+                self._delayed[value] = count - 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1)
+
+    def _remove(self, value):
+        self._delayed[value] = self._delayed.get(value, 0) + 1
+        if value <= -self._low[0]:
+            self._low_size -= 1
+            if value == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if value == self._high[0]:
+                self._prune(self._high, 1)
+        self._rebalance()
+
+    def push(self, value):
+        """値を追加（ウィンドウを超えたら最古の値を外す）。外れた値を返す"""
+        if not self._low or value <= -self._low[0]:
+            heapq.heappush(self._low, -value)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, value)
+            self._high_size += 1
+        self._rebalance()
+        self.window.append(value)
+
+        if len(self.window) > self.window_size:
+            evicted = self.window.popleft()
+            self._remove(evicted)
+            return evicted
+        return None
+
+    def median(self):
+        """statistics.median と同じ値（偶数個なら中央2つの平均）"""
+        if not self.window:
+            return None
+        if self._low_size > self._high_size:
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2
+
+
+class StreamingFreezeScore:
+    """
+    値幅を1本ずつ受け取り、停止スコアを返す
+    （従来の deque(maxlen=100) + statistics.median / mean と同じ判定）
+    """
+
+    def __init__(self, window_size=WINDOW_SIZE, recent_size=RECENT_SIZE,
+                 min_history=MIN_HISTORY, cuts=DEFAULT_CUTS):
+        self.median = RollingMedian(window_size)
+        self.recent_size = recent_size
+        self.min_history = min_history
+        self.cuts = cuts
+        self.recent = deque(maxlen=recent_size)
+        self._recent_sum = 0.0
+        self._count = 0
+
+    def __len__(self):
+        return len(self.median)
+
+    @property
+    def history(self):
+        """直近 window_size 本の値幅（古い順）"""
+        return self.median.window
+
+    def add(self, hl_range):
+        self.median.push(hl_range)
+        if len(self.recent) == self.recent_size:
+            self._recent_sum -= self.recent[0]
+        self.recent.append(hl_range)
+        self._recent_sum += hl_range
+        # 移動合計の誤差が溜まらないよう、ときどき合計し直す
+        self._count += 1
+        if self._count % self.median.window_size == 0:
+            self._recent_sum = math.fsum(self.recent)
+
+    def add_candle(self, candle):
+        self.add(candle['high'] - candle['low'])
+
+    def baseline(self):
+        if len(self.median) < self.min_history:
+            return None
+        return self.median.median()
+
+    def recent_mean(self):
+        if len(self.recent) < self.recent_size:
+            return None
+        return self._recent_sum / self.recent_size
+
+    def ratio(self):
+        """直近 / ベースライン（計算できなければ None）"""
+        baseline = self.baseline()
+        recent = self.recent_mean()
+        if baseline is None or recent is None or baseline == 0:
+            return None
+        ratio = recent / baseline
+        for cut, _ in self.cuts:
+            if abs(ratio - cut) <= _EXACT_MARGIN * cut:
+                return statistics.mean(self.recent) / baseline
+        return ratio
+
+    def score(self):
+        ratio = self.ratio()
+        if ratio is None:
+            return 0
+        return score_from_ratio(ratio, self.cuts)
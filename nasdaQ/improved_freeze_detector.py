@@ -12,9 +12,11 @@ import numpy as np
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor
-from collections import deque
 import statistics
 
+from candle_feed import CandleFeed, parse_klines
+from freeze_score import DEFAULT_CUTS, StreamingFreezeScore
+
 load_dotenv()
 
 # --- 設定 ---
@@ -35,52 +37,35 @@ WATCH_CONFIG = [
 
 
 class AdaptiveVolatilityAnalyzer:
-    """適応的ボラティリティ分析器"""
+    """適応的ボラティリティ分析器（freeze_score のストリーミング計算を使う）"""
     
     def __init__(self, window_size=100):
         self.window_size = window_size
-        self.history = deque(maxlen=window_size)
+        self.scorer = StreamingFreezeScore(window_size=window_size, cuts=DEFAULT_CUTS)
+    
+    @property
+    def history(self):
+        return self.scorer.history
         
     def add_candle(self, candle):
         """ローソク足を履歴に追加"""
-        hl_range = candle['high'] - candle['low']
-        self.history.append(hl_range)
+        self.scorer.add_candle(candle)
     
     def get_baseline_volatility(self):
-        """ベースラインのボラティリティを計算"""
-        if len(self.history) < 20:
-            return None
-        return statistics.median(self.history)
+        """ベースラインのボラティリティ（直近100本の値幅の中央値）"""
+        return self.scorer.baseline()
     
     def get_recent_volatility(self, n=5):
         """直近n本のボラティリティ"""
+        if n == self.scorer.recent_size:
+            return self.scorer.recent_mean()
         if len(self.history) < n:
             return None
-        recent = list(self.history)[-n:]
-        return statistics.mean(recent)
+        return statistics.mean(list(self.history)[-n:])
     
     def calculate_freeze_score(self):
         """停止スコアを0-100で計算（100が完全停止）"""
-        baseline = self.get_baseline_volatility()
-        recent = self.get_recent_volatility(5)
-        
-        if baseline is None or recent is None or baseline == 0:
-            return 0
-        
-        # 直近のボラティリティがベースラインの何%か
-        ratio = recent / baseline
-        
-        # 10%以下なら高スコア
-        if ratio <= 0.1:
-            return 100
-        elif ratio <= 0.2:
-            return 80
-        elif ratio <= 0.3:
-            return 60
-        elif ratio <= 0.5:
-            return 40
-        else:
-            return 0
+        return self.scorer.score()
 
 
 class ExternalPriceChecker:
@@ -178,50 +163,41 @@ class ImprovedFreezeDetector:
         self.freeze_start_price = None
         self.consecutive_high_scores = 0
         
-        # データ保持
-        self.candle_history = deque(maxlen=100)
+        # データ保持（差分取得・ローカルキャッシュから起動時に復元）
+        self.feed = CandleFeed(self.symbol, window_size=100)
+        self.candle_history = self.feed.candles
+        self.warm_start()
         
-    def fetch_candles(self, limit=20):
-        """ローソク足データ取得（より多くのデータを取得）"""
+    def warm_start(self):
+        """ローカルキャッシュ（bar_cache）から直近の確定足を読み込む"""
+        for candle in self.feed.warm_start():
+            self.volatility_analyzer.add_candle(candle)
+        if self.feed.candles:
+            print(f"  📂 {self.name}: キャッシュから{len(self.feed)}本を復元")
+        
+    def fetch_candles(self):
+        """前回以降のローソク足データ取得（古い順・最後の1本は形成中）"""
         try:
-            params = {
-                "symbol": self.symbol,
-                "interval": "1m",
-                "limit": limit
-            }
+            params = self.feed.request_params()
             response = requests.get(f"{BASE_URL}{ENDPOINT}", params=params, timeout=8)
             data = response.json()
             
             if data.get("code") == 0 and data.get("data"):
-                candles = []
-                for c in data['data']:
-                    candle = {
-                        'timestamp': datetime.fromtimestamp(int(c['time']) / 1000),
-                        'open': float(c['open']),
-                        'high': float(c['high']),
-                        'low': float(c['low']),
-                        'close': float(c['close']),
-                        'volume': float(c.get('volume', 0))
-                    }
-                    candles.append(candle)
-                return candles
+                return parse_klines(data['data'])
         except Exception as e:
             print(f"  ⚠️ {self.name} データ取得エラー: {e}")
         return None
     
     def analyze(self):
         """メイン分析ロジック"""
-        candles = self.fetch_candles(limit=20)
+        candles = self.fetch_candles()
         if not candles:
             return None
         
-        # 履歴更新
-        for candle in candles[:-1]:  # 確定済みのローソク足のみ
-            if candle not in self.candle_history:
-                self.candle_history.append(candle)
-                self.volatility_analyzer.add_candle(candle)
-        
-        current_candle = candles[-1]
+        # 履歴更新（新しい確定足だけ）
+        new_candles, current_candle = self.feed.ingest(candles)
+        for candle in new_candles:
+            self.volatility_analyzer.add_candle(candle)
         
         # === Stage 1: 停止スコア計算 ===
         freeze_score = self.volatility_analyzer.calculate_freeze_score()
@@ -0,0 +1,236 @@
+# optimize_freeze_params.py
+# StrictFreezeDetector の閾値をグリッド / ランダム探索で評価する
+#
+# - 1分足は bar_cache のキャッシュから読み、値幅の移動中央値・比率は銘柄ごとに1回だけ計算
+# - パラメータの組ごとにスコア化 → 状態遷移（vector_backtest）→ ラベルと照合
+# - 評価はプロセスプールに分散（同じ閾値セットのスコアはワーカー内で使い回す）
+# - ラベルは freeze_events_report.csv と同じ形のCSV（日付,開始時刻,継続時間(分),価格変動 …）
+#
+# 使い方（nasdaQ ディレクトリで実行）:
+#     python optimize_freeze_params.py --labels ../freeze_events_report.csv
+#     python optimize_freeze_params.py --labels ../freeze_events_report.csv --samples 500 --label-min-change 10
+#     python optimize_freeze_params.py --labels ... --output grid_results.csv
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from bar_cache import JST, load_bars
+from freeze_score import DEFAULT_CUTS, STRICT_CUTS
+from vector_backtest import STRICT_RULES, detect_transitions, freeze_ratio_frame, freeze_scores
+
+# 閾値（比率）の候補: strict の閾値を倍率で伸縮したもの + 従来の閾値
+CUT_SCALES = (0.75, 1.0, 1.25, 1.5, 2.0)
+CUT_CANDIDATES = tuple(
+    tuple((round(cut * scale, 4), score) for cut, score in STRICT_CUTS) for scale in CUT_SCALES
+) + (DEFAULT_CUTS,)
+
+# 探索範囲（StrictFreezeDetector の現在値を含む）
+PARAM_GRID = {
+    "cuts": CUT_CANDIDATES,
+    "high_score": (60, 80, 100),          # min_freeze_score
+    "suspect_after": (3, 4, 5, 6),        # min_consecutive_suspect
+    "confirm_after": (5, 7, 9),           # min_consecutive_confirm
+    "min_price_change": (0.0, 5.0, 10.0, 15.0),
+    "resolve_below": (40, 50, 60),
+}
+
+# 検知とラベルの区間がこの分数以内で重なれば一致とみなす
+MATCH_TOLERANCE_MIN = 2
+
+
+def _epoch_ns(index):
+    """時刻 → UTC エポック ns（pandas の時刻の単位に依存しない）"""
+    return index.as_unit("ns").asi8
+
+
+def load_labels(csv_file, min_change=0.0, min_duration=0.0):
+    """
+    ラベルCSV → 各イベントの (開始, 終了) を UTC エポック ns の配列で返す（開始時刻順）
+    min_change / min_duration で「本物の停止」とみなすイベントを絞り込める
+    """
+    starts, ends = [], []
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            duration = float(row['継続時間(分)'])
+            if abs(float(row['価格変動'])) < min_change or duration < min_duration:
+                continue
+            start = datetime.strptime(f"{row['日付']} {row['開始時刻']}", "%Y-%m-%d %H:%M:%S").replace(tzinfo=JST)
+            starts.append(start)
+            ends.append(start + timedelta(minutes=duration))
+    if not starts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(starts)
+    return _epoch_ns(pd.DatetimeIndex(starts))[order], _epoch_ns(pd.DatetimeIndex(ends))[order]
+
+
+def iter_grid(grid=PARAM_GRID):
+    """グリッドの全組み合わせ（確定は疑い以上の本数のものだけ）"""
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        params = dict(zip(keys, values))
+        if params["confirm_after"] >= params["suspect_after"]:
+            yield params
+
+
+def sample_grid(n, seed=0, grid=PARAM_GRID):
+    """グリッドからランダムに n 組"""
+    params = list(iter_grid(grid))
+    if n >= len(params):
+        return params
+    return random.Random(seed).sample(params, n)
+
+
+def _overlaps(a_start, a_end, b_start, b_end, tol):
+    """
+    a の各区間が b（開始時刻順。区間どうしが重なっていてもよい）のどれかと重なるか
+    前後 tol までのずれは重なりとみなす（端がちょうど tol 離れていれば一致）
+    """
+    if len(b_start) == 0:
+        return np.zeros(len(a_start), dtype=bool)
+    # 終了時刻の累積最大は単調なので二分探索できる（長い区間が後ろの区間を含んでいても正しい）
+    first = np.searchsorted(np.maximum.accumulate(b_end), a_start - tol, side="left")
+    last = np.searchsorted(b_start, a_end + tol, side="right")
+    return last > first
+
+
+# --- ワーカー（プロセスごとに1回だけデータを受け取る） ---
+_DATA = {}
+
+
+def _init_worker(frame, close, times, labels, tolerance_ns):
+    _DATA.update(frame=frame, close=close, times=times, labels=labels, tol=tolerance_ns, scores={})
+
+
+def evaluate(params):
+    """1組のパラメータを評価して結果の辞書を返す"""
+    cuts = params["cuts"]
+    scores = _DATA["scores"].get(cuts)
+    if scores is None:
+        scores = freeze_scores(_DATA["frame"], cuts)
+        _DATA["scores"] = {cuts: scores}  # 同じ閾値の組は連続して来る
+    rules = dict(STRICT_RULES, **params)
+    _, events = detect_transitions(scores, _DATA["close"], rules)
+
+    times = _DATA["times"]
+    lab_start, lab_end = _DATA["labels"]
+    if events:
+        idx = np.array(events)
+        det_start, det_end = times[idx[:, 0]], times[idx[:, 1]]
+    else:
+        det_start = det_end = np.empty(0, dtype=np.int64)
+
+    tp = int(_overlaps(det_start, det_end, lab_start, lab_end, _DATA["tol"]).sum())
+    found = int(_overlaps(lab_start, lab_end, det_start, det_end, _DATA["tol"]).sum())
+    precision = tp / len(events) if events else 0.0
+    recall = found / len(lab_start) if len(lab_start) else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return dict(params, detected=len(events), matched=tp, precision=precision, recall=recall, f1=f1)
+
+
+def run_search(bars, labels, param_sets, workers=None, tolerance_min=MATCH_TOLERANCE_MIN):
+    """全パラメータを評価（閾値ごとにまとめてワーカーへ渡す）"""
+    frame = freeze_ratio_frame((bars["high"] - bars["low"]).to_numpy())
+    close = bars["close"].to_numpy()
+    times = _epoch_ns(bars.index)
+    param_sets = sorted(param_sets, key=lambda p: p["cuts"])
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(param_sets) // (workers * 8))
+    tolerance_ns = int(tolerance_min * 60 * 10**9)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker,
+        initargs=(frame, close, times, labels, tolerance_ns)
+    ) as pool:
+        return list(pool.map(evaluate, param_sets, chunksize=chunksize))
+
+
+def _format_cuts(cuts):
+    return "/".join(f"{cut:g}" for cut, _ in cuts)
+
+
+def save_results(results, filename):
+    keys = list(PARAM_GRID) + ["detected", "matched", "precision", "recall", "f1"]
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(keys)
+        for r in results:
+            writer.writerow([_format_cuts(r[k]) if k == "cuts" else r[k] for k in keys])
+    print(f"\n💾 CSVファイルに保存: {filename}")
+
+
+def display_results(results, current, top=15):
+    print("\n" + "=" * 100)
+    print(f"🏆 上位{top}件（F1順）")
+    print("=" * 100)
+    print(f"  {'閾値':<22} {'スコア':>4} {'疑い':>4} {'確定':>4} {'最低変動':>7} {'解消<':>5} | "
+          f"{'検知':>5} {'一致':>5} {'適合率':>7} {'再現率':>7} {'F1':>6}")
+    rows = [("現在", current)] + [("", r) for r in results[:top]]
+    for label, r in rows:
+        print(f"{label:2s}{_format_cuts(r['cuts']):<22} {r['high_score']:>4} {r['suspect_after']:>4} "
+              f"{r['confirm_after']:>4} {r['min_price_change']:>7.1f} {r['resolve_below']:>5} | "
+              f"{r['detected']:>5} {r['matched']:>5} {r['precision']:>7.1%} {r['recall']:>7.1%} {r['f1']:>6.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="StrictFreezeDetector の閾値をラベル付きイベントで評価")
+    parser.add_argument("--labels", required=True, help="ラベルCSV（freeze_events_report.csv 形式）")
+    parser.add_argument("--symbol", default="NCSINASDAQ1002USD-USDT", help="キャッシュ済みの銘柄")
+    parser.add_argument("--start", default=None, help="開始日（省略でラベルの最初の日）")
+    parser.add_argument("--end", default=None, help="終了日（省略でラベルの最後の日）")
+    parser.add_argument("--samples", type=int, default=0, help="ランダムに評価する組数（0で全組み合わせ）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（省略でCPU数）")
+    parser.add_argument("--tolerance", type=float, default=MATCH_TOLERANCE_MIN, help="一致とみなす区間のずれ（分）")
+    parser.add_argument("--label-min-change", type=float, default=0.0, help="この価格変動未満のラベルは除外")
+    parser.add_argument("--label-min-duration", type=float, default=0.0, help="この継続時間（分）未満のラベルは除外")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", default=None, help="全結果を保存するCSV")
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels, args.label_min_change, args.label_min_duration)
+    if len(labels[0]) == 0:
+        print("❌ 条件に合うラベルがありません")
+        return
+    first_label = pd.Timestamp(labels[0][0], tz="UTC").tz_convert(JST)
+    last_label = pd.Timestamp(labels[1][-1], tz="UTC").tz_convert(JST)
+    start = args.start or first_label.strftime("%Y-%m-%d")
+    end = args.end or last_label.strftime("%Y-%m-%d")
+
+    bars = load_bars(args.symbol, start, end)
+    if bars.empty:
+        print(f"❌ {args.symbol} のキャッシュがありません（vector_backtest.py --update で取得）")
+        return
+
+    param_sets = sample_grid(args.samples, args.seed) if args.samples else list(iter_grid())
+    current = {k: STRICT_RULES[k] for k in PARAM_GRID}
+    if current not in param_sets:
+        param_sets.append(current)
+
+    print("=" * 100)
+    print(f"🔬 パラメータ探索: {args.symbol} {start} ～ {end}")
+    print(f"   1分足: {len(bars):,}本 / ラベル: {len(labels[0])}件 / 評価: {len(param_sets):,}組")
+    print("=" * 100)
+
+    t_start = time.perf_counter()
+    results = run_search(bars, labels, param_sets, args.workers, args.tolerance)
+    elapsed = time.perf_counter() - t_start
+    print(f"\n✅ {len(results):,}組を{elapsed:.1f}秒で評価")
+
+    current_result = next(r for r in results if all(r[k] == current[k] for k in PARAM_GRID))
+    results.sort(key=lambda r: (r["f1"], r["precision"]), reverse=True)
+    display_results(results, current_result, args.top)
+    if args.output:
+        save_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,15 @@
 
 import os
 import requests
-import time
 import csv
 import json
 import numpy as np
 from datetime import datetime, timedelta, timezone
-from concurrent.futures import ThreadPoolExecutor
-from collections import deque
 import statistics
 
+from candle_feed import CandleFeed, parse_klines
+from freeze_score import STRICT_CUTS, StreamingFreezeScore
+
 BASE_URL = "https://open-api.bingx.com"
 ENDPOINT_V2 = "/openApi/swap/v2/quote/klines"
 JST = timezone(timedelta(hours=9))
@@ -29,47 +29,35 @@ WATCH_CONFIG = [
 
 
 class AdaptiveVolatilityAnalyzer:
-    """適応的ボラティリティ分析器"""
+    """適応的ボラティリティ分析器（freeze_score のストリーミング計算を使う）"""
     
     def __init__(self, window_size=100):
         self.window_size = window_size
-        self.history = deque(maxlen=window_size)
+        self.scorer = StreamingFreezeScore(window_size=window_size, cuts=STRICT_CUTS)
+    
+    @property
+    def history(self):
+        return self.scorer.history
         
     def add_candle(self, candle):
-        hl_range = candle['high'] - candle['low']
-        self.history.append(hl_range)
+        """ローソク足を履歴に追加"""
+        self.scorer.add_candle(candle)
     
     def get_baseline_volatility(self):
-        if len(self.history) < 20:
-            return None
-        return statistics.median(self.history)
+        """ベースラインのボラティリティ（直近100本の値幅の中央値）"""
+        return self.scorer.baseline()
     
     def get_recent_volatility(self, n=5):
+        """直近n本のボラティリティ"""
+        if n == self.scorer.recent_size:
+            return self.scorer.recent_mean()
         if len(self.history) < n:
             return None
-        recent = list(self.history)[-n:]
-        return statistics.mean(recent)
+        return statistics.mean(list(self.history)[-n:])
     
     def calculate_freeze_score(self):
-        baseline = self.get_baseline_volatility()
-        recent = self.get_recent_volatility(5)
-        
-        if baseline is None or recent is None or baseline == 0:
-            return 0
-        
-        ratio = recent / baseline
-        
-        # より厳格な判定
-        if ratio <= 0.08:  # 0.1 → 0.08に厳格化
-            return 100
-        elif ratio <= 0.15:  # 0.2 → 0.15に厳格化
-            return 80
-        elif ratio <= 0.25:  # 0.3 → 0.25に厳格化
-            return 60
-        elif ratio <= 0.4:
-            return 40
-        else:
-            return 0
+        """停止スコアを0-100で計算（100が完全停止）"""
+        return self.scorer.score()
 
 
 class FreezeState:
@@ -93,55 +81,52 @@ class StrictFreezeDetector:
         self.min_freeze_score = 80      # 高スコアのみ
         self.min_consecutive_suspect = 5  # 疑い：5分
         self.min_consecutive_confirm = 7  # 確定：7分
-        self.min_price_change = 10.0     # 最低10の価格変動
+        self.min_price_change = config.get('min_price_change', 10.0)  # 最低10の価格変動（銘柄ごとに上書き可）
         
         self.state = FreezeState.NORMAL
         self.freeze_start_time = None
         self.freeze_start_price = None
         self.consecutive_high_scores = 0
-        self.candle_history = deque(maxlen=100)
         
-    def fetch_candles(self, limit=30):
-        """ローソク足データ取得"""
+        # 確定足の履歴（差分取得・ローカルキャッシュから起動時に復元）
+        self.feed = CandleFeed(self.symbol, window_size=100)
+        self.candle_history = self.feed.candles
+        self.warm_start()
+        
+    def warm_start(self):
+        """ローカルキャッシュ（bar_cache）から直近の確定足を読み込む"""
+        for candle in self.feed.warm_start():
+            self.volatility_analyzer.add_candle(candle)
+        if self.feed.candles:
+            print(f"  📂 {self.name}: キャッシュから{len(self.feed)}本を復元")
+        
+    def fetch_candles(self):
+        """前回以降のローソク足データ取得（古い順・最後の1本は形成中）"""
         try:
-            params = {
-                "symbol": self.symbol,
-                "interval": "1m",
-                "limit": limit
-            }
+            params = self.feed.request_params()
             response = requests.get(f"{BASE_URL}/openApi/swap/v3/quote/klines", params=params, timeout=8)
             data = response.json()
             
             if data.get("code") == 0 and data.get("data"):
-                candles = []
-                for c in data['data']:
-                    candle = {
-                        'timestamp': datetime.fromtimestamp(int(c['time']) / 1000),
-                        'open': float(c['open']),
-                        'high': float(c['high']),
-                        'low': float(c['low']),
-                        'close': float(c['close']),
-                        'volume': float(c.get('volume', 0))
-                    }
-                    candles.append(candle)
-                return candles
+                return parse_klines(data['data'])
         except Exception as e:
             print(f"  ⚠️ {self.name} データ取得エラー: {e}")
         return None
     
     def analyze(self):
         """メイン分析ロジック"""
-        candles = self.fetch_candles(limit=30)
+        candles = self.fetch_candles()
         if not candles:
             return None
+        return self.analyze_candles(candles)
+    
+    def analyze_candles(self, candles):
+        """取得済みのローソク足で分析（非同期モニターからも使う）"""
+        # 履歴更新（新しい確定足だけ）
+        new_candles, current_candle = self.feed.ingest(candles)
+        for candle in new_candles:
+            self.volatility_analyzer.add_candle(candle)
         
-        # 履歴更新
-        for candle in candles[:-1]:
-            if candle['timestamp'] not in [c['timestamp'] for c in self.candle_history]:
-                self.candle_history.append(candle)
-                self.volatility_analyzer.add_candle(candle)
-        
-        current_candle = candles[-1]
         freeze_score = self.volatility_analyzer.calculate_freeze_score()
         result = self._update_state(freeze_score, current_candle)
         
@@ -239,12 +224,58 @@ class StrictFreezeDetector:
             writer.writerow(row)
 
 
+def report_results(results, now):
+    """1回ぶんの結果を集計して表示・ログ・JSON出力"""
+    active_freezes = []
+    suspected_freezes = []
+    
+    for result in results:
+        if not result:
+            continue
+            
+        if result['state'] == FreezeState.CONFIRMED:
+            active_freezes.append(result)
+        elif result['state'] == FreezeState.SUSPECTED:
+            suspected_freezes.append(result)
+        
+        if result['action']:
+            log_detail(result)
+    
+    # ステータス表示
+    if active_freezes:
+        print(f"\n  🚨 停止確定: {len(active_freezes)}件")
+        for r in active_freezes:
+            print(f"     {r['name']}: {r['duration_minutes']:.1f}分経過 (信頼度{r['confidence']}%)")
+    
+    if suspected_freezes:
+        print(f"\n  ⚠️  停止の疑い: {len(suspected_freezes)}件")
+        for r in suspected_freezes:
+            print(f"     {r['name']}: {r['consecutive']}分連続（スコア{r['freeze_score']}）")
+    
+    if not active_freezes and not suspected_freezes:
+        print("  🟢 全銘柄正常")
+    
+    # JSON出力
+    status_data = {
+        'timestamp': now.isoformat(),
+        'active_freezes': active_freezes,
+        'suspected_freezes': suspected_freezes
+    }
+    with open(STATUS_JSON, 'w', encoding='utf-8') as f:
+        json.dump(status_data, f, indent=2, default=str, ensure_ascii=False)
+
+
 def main():
+    # 監視は freeze_monitor の非同期ループで回す（銘柄は watch_config.json）
+    from freeze_monitor import load_watch_config, run_monitor
+    
+    settings = load_watch_config()
+    
     print("=" * 80)
     print("🚀 BingX厳格停止検知システム v5.0（誤検知81.5%削減版）")
     print("=" * 80)
     print(f"開始時刻: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"監視銘柄数: {len(WATCH_CONFIG)}")
+    print(f"監視銘柄数: {len(settings['symbols'])}" + ("（＋自動検出）" if settings['discover'] else ""))
     print("\n検知条件:")
     print("  - 停止スコア: 80以上")
     print("  - 連続時間: 7分以上")
@@ -252,63 +283,7 @@ def main():
     print("  → 月間約17件の高品質イベントのみ検知")
     print("=" * 80)
     
-    detectors = [StrictFreezeDetector(config) for config in WATCH_CONFIG]
-    
-    iteration = 0
-    
-    try:
-        while True:
-            iteration += 1
-            now = datetime.now()
-            
-            print(f"\n[{now.strftime('%H:%M:%S')}] チェック #{iteration}")
-            
-            with ThreadPoolExecutor(max_workers=len(detectors)) as executor:
-                results = list(executor.map(lambda d: d.analyze(), detectors))
-            
-            active_freezes = []
-            suspected_freezes = []
-            
-            for result in results:
-                if not result:
-                    continue
-                    
-                if result['state'] == FreezeState.CONFIRMED:
-                    active_freezes.append(result)
-                elif result['state'] == FreezeState.SUSPECTED:
-                    suspected_freezes.append(result)
-                
-                if result['action']:
-                    log_detail(result)
-            
-            # ステータス表示
-            if active_freezes:
-                print(f"\n  🚨 停止確定: {len(active_freezes)}件")
-                for r in active_freezes:
-                    print(f"     {r['name']}: {r['duration_minutes']:.1f}分経過 (信頼度{r['confidence']}%)")
-            
-            if suspected_freezes:
-                print(f"\n  ⚠️  停止の疑い: {len(suspected_freezes)}件")
-                for r in suspected_freezes:
-                    print(f"     {r['name']}: {r['consecutive']}分連続（スコア{r['freeze_score']}）")
-            
-            if not active_freezes and not suspected_freezes:
-                print("  🟢 全銘柄正常")
-            
-            # JSON出力
-            status_data = {
-                'timestamp': now.isoformat(),
-                'active_freezes': active_freezes,
-                'suspected_freezes': suspected_freezes
-            }
-            with open(STATUS_JSON, 'w', encoding='utf-8') as f:
-                json.dump(status_data, f, indent=2, default=str, ensure_ascii=False)
-            
-            time.sleep(15)
-            
-    except KeyboardInterrupt:
-        print("\n\n停止コマンドを受信。終了します...")
-        print(f"総チェック回数: {iteration}")
+    run_monitor(settings)
 
 
 def log_detail(result):
@@ -0,0 +1,50 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bar_cache
+from bar_cache import JST, load_bars, update_cache
+
+SYMBOL = "NCSINASDAQ1002USD-USDT"
+
+
+def _stub_fetch(calls):
+    """期間内の1分足を返す fetch_klines の代役（呼ばれた期間を calls に記録）"""
+    def fetch(symbol, start_time, end_time):
+        calls.append((start_time, end_time))
+        first = int(start_time.timestamp()) // 60 * 60
+        last = int(end_time.timestamp())
+        return [[t * 1000, 1.0, 1.5, 0.5, 1.0, 0.0] for t in range(first, last + 1, 60)]
+    return fetch
+
+
+def _run(tmp_path, monkeypatch, now):
+    calls = []
+    monkeypatch.setattr(bar_cache, "fetch_klines", _stub_fetch(calls))
+    update_cache(SYMBOL, "2026-03-02", cache_dir=str(tmp_path), pause_s=0, now=now)
+    return calls
+
+
+def test_partial_day_is_refetched_after_midnight(tmp_path, monkeypatch):
+    # 当日の 15:00 に取得 → 途中までのファイルは確定扱いにしない
+    calls = _run(tmp_path, monkeypatch, datetime(2026, 3, 2, 15, 0, tzinfo=JST))
+    assert len(calls) == 1
+    assert len(load_bars(SYMBOL, "2026-03-02", "2026-03-02", cache_dir=str(tmp_path))) == 15 * 60
+
+    # 翌日に再実行 → 3/2 を丸1日取り直し、3/3 の当日ぶんも取る
+    calls = _run(tmp_path, monkeypatch, datetime(2026, 3, 3, 1, 0, tzinfo=JST))
+    assert [c[0].day for c in calls] == [2, 3]
+    day = load_bars(SYMBOL, "2026-03-02", "2026-03-02", cache_dir=str(tmp_path))
+    assert len(day) == 1440
+    assert day.index[-1] == datetime(2026, 3, 2, 23, 59, tzinfo=JST)
+    assert not (tmp_path / SYMBOL / "2026-03-02.partial.csv").exists()
+
+
+def test_complete_day_is_not_refetched(tmp_path, monkeypatch):
+    now = datetime(2026, 3, 3, 1, 0, tzinfo=JST)
+    _run(tmp_path, monkeypatch, now)
+    calls = _run(tmp_path, monkeypatch, now + timedelta(minutes=5))
+    assert [c[0].day for c in calls] == [3]  # 当日ぶんだけ
+    assert len(load_bars(SYMBOL, cache_dir=str(tmp_path))) == 1440 + 65
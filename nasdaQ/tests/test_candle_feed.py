@@ -0,0 +1,114 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bar_cache
+from bar_cache import JST, update_cache
+from candle_feed import BAR_MS, CandleFeed, parse_klines
+
+SYMBOL = "NCSINASDAQ1002USD-USDT"
+T0 = int(datetime(2026, 3, 2, 9, 0, tzinfo=JST).timestamp() * 1000)
+
+
+def _klines(first, count):
+    """APIの data と同じ形（first 本目から count 本、時刻は文字列）"""
+    return [{'time': str(T0 + i * BAR_MS), 'open': "1", 'high': str(2 + i), 'low': "1", 'close': str(1 + i),
+             'volume': "0"} for i in range(first, first + count)]
+
+
+def _bar(i):
+    return T0 + i * BAR_MS
+
+
+def test_parse_klines_sorts_by_time():
+    candles = parse_klines(list(reversed(_klines(0, 3))))
+    assert [c['time'] for c in candles] == [_bar(0), _bar(1), _bar(2)]
+    assert candles[1]['high'] - candles[1]['low'] == 2.0
+
+
+def test_first_request_asks_for_window_plus_one():
+    feed = CandleFeed(SYMBOL, window_size=100)
+    assert feed.request_params(now_ms=_bar(5)) == {"symbol": SYMBOL, "interval": "1m", "limit": 101}
+
+
+def test_ingest_treats_last_row_as_forming_bar():
+    feed = CandleFeed(SYMBOL, window_size=100)
+    added, forming = feed.ingest(parse_klines(_klines(0, 4)))
+    assert [c['time'] for c in added] == [_bar(0), _bar(1), _bar(2)]
+    assert forming['time'] == _bar(3)
+    assert feed.last_time == _bar(2) and len(feed) == 3
+
+    # 次の取得: 形成中だった足が確定して返ってくる
+    added, forming = feed.ingest(parse_klines(_klines(3, 2)))
+    assert [c['time'] for c in added] == [_bar(3)]
+    assert forming['time'] == _bar(4)
+    assert feed.ingest([]) == ([], None)
+
+
+def test_ingest_rejects_duplicate_and_older_bars():
+    feed = CandleFeed(SYMBOL, window_size=100)
+    feed.ingest(parse_klines(_klines(0, 6)))   # 0-4 確定, 5 形成中
+    added, forming = feed.ingest(parse_klines(_klines(2, 5)))   # 2-5 のうち 5 だけ新しい
+    assert [c['time'] for c in added] == [_bar(5)]
+    assert forming['time'] == _bar(6)
+
+    # 時刻が戻った足（古い順になっていない入力）も取り込まない
+    candles = parse_klines(_klines(7, 1)) + parse_klines(_klines(3, 1)) + parse_klines(_klines(9, 1))
+    added, _ = feed.ingest(candles)
+    assert [c['time'] for c in added] == [_bar(7)]
+    assert [c['time'] for c in feed.candles] == [_bar(i) for i in (0, 1, 2, 3, 4, 5, 7)]
+
+
+def test_window_keeps_only_latest_bars():
+    feed = CandleFeed(SYMBOL, window_size=10)
+    feed.ingest(parse_klines(_klines(0, 25)))
+    assert len(feed) == 10
+    assert feed.candles[0]['time'] == _bar(14) and feed.last_time == _bar(23)
+
+
+def test_request_params_after_a_gap():
+    feed = CandleFeed(SYMBOL, window_size=100)
+    feed.ingest(parse_klines(_klines(0, 3)))   # 最後の確定足 = 1
+
+    # 同じ足の途中 / 次の足の途中 → 最後の確定足の次から
+    assert feed.request_params(now_ms=_bar(2) + 30_000) == \
+        {"symbol": SYMBOL, "interval": "1m", "startTime": _bar(2), "limit": 2}
+    assert feed.request_params(now_ms=_bar(1) + 10_000)["limit"] == 2
+
+    # 空きが100本ちょうどまでは startTime から取る（今の足まで含めて 空き+1 本）
+    params = feed.request_params(now_ms=_bar(101) + 5_000)
+    assert (params["startTime"], params["limit"]) == (_bar(2), 101)
+
+    # 100本を超えたら直近 window+1 本だけ取り直す
+    params = feed.request_params(now_ms=_bar(102))
+    assert "startTime" not in params and params["limit"] == 101
+
+
+def test_warm_start_skips_current_bar(tmp_path, monkeypatch):
+    def fetch(symbol, start_time, end_time):
+        first = int(start_time.timestamp()) // 60 * 60
+        last = int(end_time.timestamp())
+        return [[t * 1000, 1.0, 1.5, 0.5, 1.0, 0.0] for t in range(first, last + 1, 60)]
+
+    monkeypatch.setattr(bar_cache, "fetch_klines", fetch)
+    now = datetime(2026, 3, 2, 15, 0, 30, tzinfo=JST)
+    update_cache(SYMBOL, "2026-03-01", cache_dir=str(tmp_path), pause_s=0, now=now)
+    now_ms = int(now.timestamp() * 1000)
+    current_bar = now_ms // BAR_MS * BAR_MS
+
+    feed = CandleFeed(SYMBOL, window_size=100)
+    added = feed.warm_start(cache_dir=str(tmp_path), now_ms=now_ms)
+
+    # キャッシュには形成中の 15:00 の足もあるが、確定足（14:59 まで）の直近100本だけ読む
+    assert len(added) == 100 and list(feed.candles) == added
+    assert feed.last_time == current_bar - BAR_MS
+    assert added[0]['time'] == current_bar - 100 * BAR_MS
+    assert added[-1]['high'] - added[-1]['low'] == 1.0
+
+    # 続きの取得は今の足から
+    assert feed.request_params(now_ms=now_ms) == \
+        {"symbol": SYMBOL, "interval": "1m", "startTime": current_bar, "limit": 2}
+
+    assert CandleFeed(SYMBOL).warm_start(cache_dir=str(tmp_path / "empty"), now_ms=now_ms) == []
@@ -0,0 +1,144 @@
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import freeze_monitor
+from bar_cache import JST
+from candle_feed import BAR_MS
+from freeze_monitor import FreezeMonitor, merge_symbols, symbol_display_name
+
+T0 = int(datetime(2026, 3, 2, 9, 0, tzinfo=JST).timestamp() * 1000)
+
+
+def _klines(count):
+    return [{'time': str(T0 + i * BAR_MS), 'open': "1", 'high': "2", 'low': "1", 'close': "1",
+             'volume': "0"} for i in range(count)]
+
+
+class StubResponse:
+    def __init__(self, body):
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self, content_type=None):
+        return self.body
+
+
+class StubSession:
+    """ClientSession.get の代役（銘柄ごとの応答を返し、呼ばれた引数を記録）"""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.calls = []
+
+    def get(self, url, params=None):
+        self.calls.append((url, params))
+        return StubResponse(self.bodies[params['symbol']])
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    # キャッシュ（bar_cache）もログも tmp_path に置く
+    monkeypatch.chdir(tmp_path)
+    configs = [{"name": "NASDAQ100", "symbol": "NCSINASDAQ1002USD-USDT"},
+               {"name": "GOLD", "symbol": "NCCOGOLD2USD-USDT"}]
+    return FreezeMonitor(configs, interval_s=3600, jitter_s=0)
+
+
+async def _one_cycle(monitor, session):
+    """各銘柄の _watch を1周期だけ回す（次の周期の待ちに入ったら止める）"""
+    monitor._session = session
+    start = time.monotonic()
+    tasks = [asyncio.create_task(monitor._watch(d, start)) for d in monitor.detectors]
+    while monitor.requests < len(tasks):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert not any(t.done() for t in tasks)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_symbol_display_name():
+    assert symbol_display_name("NCSINASDAQ1002USD-USDT") == "NASDAQ100"
+    assert symbol_display_name("NCCOGOLD2USD-USDT") == "GOLD"
+    assert symbol_display_name("NCSISP5002USD-USDT") == "SP500"
+    assert symbol_display_name("BTC-USDT") == "BTC"
+
+
+def test_merge_symbols_keeps_configured_overrides():
+    configured = [{"name": "S&P500", "symbol": "NCSISP5002USD-USDT", "min_price_change": 5.0}]
+    discovered = ["NCCOGOLD2USD-USDT", "NCSISP5002USD-USDT"]
+    assert merge_symbols(configured, discovered) == [
+        {"name": "S&P500", "symbol": "NCSISP5002USD-USDT", "min_price_change": 5.0},
+        {"name": "GOLD", "symbol": "NCCOGOLD2USD-USDT"},
+    ]
+    assert merge_symbols(configured, []) == configured
+
+
+def test_watch_one_cycle(monitor):
+    session = StubSession({
+        "NCSINASDAQ1002USD-USDT": {"code": 0, "data": list(reversed(_klines(30)))},
+        "NCCOGOLD2USD-USDT": {"code": 0, "data": _klines(30)},
+    })
+    asyncio.run(_one_cycle(monitor, session))
+
+    assert monitor.requests == 2 and monitor.errors == 0
+    assert [params['limit'] for _, params in session.calls] == [101, 101]
+    assert set(monitor.results) == {"NCSINASDAQ1002USD-USDT", "NCCOGOLD2USD-USDT"}
+    for detector in monitor.detectors:
+        # 最後の1本は形成中なので確定足は29本
+        assert len(detector.feed) == 29
+        result = monitor.results[detector.symbol]
+        assert (result['name'], result['state'], result['price']) == (detector.name, "NORMAL", 1.0)
+
+
+def test_watch_counts_bad_body_and_analysis_error(monitor, monkeypatch):
+    session = StubSession({
+        "NCSINASDAQ1002USD-USDT": {"code": 100400, "msg": "bad symbol"},
+        "NCCOGOLD2USD-USDT": {"code": 0, "data": _klines(3)},
+    })
+
+    def broken(candles):
+        raise ValueError("broken")
+
+    monkeypatch.setattr(monitor.detectors[1], "analyze_candles", broken)
+    asyncio.run(_one_cycle(monitor, session))
+
+    assert monitor.requests == 2 and monitor.errors == 2
+    assert monitor.results == {}
+
+
+def test_report_keeps_running_after_error(monitor, monkeypatch):
+    calls = []
+
+    def report(results, now):
+        calls.append(results)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(freeze_monitor, "report_results", report)
+    monitor.interval_s = freeze_monitor.REPORT_MARGIN_S
+
+    async def run():
+        task = asyncio.create_task(monitor._report(time.monotonic()))
+        while len(calls) < 3 and not task.done():
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert len(calls) == 3 and monitor.errors == 3
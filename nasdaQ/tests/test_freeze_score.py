@@ -0,0 +1,88 @@
+import random
+import statistics
+import sys
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from freeze_score import DEFAULT_CUTS, STRICT_CUTS, RollingMedian, StreamingFreezeScore, score_from_ratio
+
+TICK = 0.01
+
+
+def old_score(history, cuts):
+    """従来の deque(maxlen=100) + statistics.median / mean の判定"""
+    if len(history) < 20:
+        return 0, None
+    baseline = statistics.median(history)
+    recent = statistics.mean(list(history)[-5:])
+    if baseline == 0:
+        return 0, None
+    ratio = recent / baseline
+    return score_from_ratio(ratio, cuts), ratio
+
+
+def tick_ranges(n, cuts, seed):
+    """
+    ティック刻みの値幅（同値が多い）。一部は価格の引き算で作る（浮動小数の誤差が乗る）
+    ときどき直近5本をベースラインの cut 倍にして、比率がちょうど閾値に乗るようにする
+    """
+    rng = random.Random(seed)
+    base = 100                                  # ベースラインの値幅（ティック数）
+    normal = [base - 20, base - 5, base, base, base, base + 5, base + 30]
+    out = []
+    while len(out) < n:
+        if rng.random() < 0.3:
+            cut = rng.choice(cuts)[0]
+            out.extend([round(base * cut) * TICK] * 5)
+            continue
+        for t in (rng.choice(normal) for _ in range(rng.randint(1, 30))):
+            if rng.random() < 0.3:
+                low = 21000 + rng.randrange(4000) * TICK
+                out.append((low + t * TICK) - low)
+            else:
+                out.append(t * TICK)
+    return out[:n]
+
+
+def test_rolling_median_matches_statistics_median_with_ties():
+    rng = random.Random(0)
+    rm = RollingMedian(100)
+    window = deque(maxlen=100)
+    for _ in range(20000):
+        value = rng.choice((0.0, 0.25, 0.5, 0.5, 0.75, 1.0, 2.5)) if rng.random() < 0.8 else rng.randrange(400) * TICK
+        rm.push(value)
+        window.append(value)
+        assert rm.median() == statistics.median(window)
+        assert list(rm.window) == list(window)
+    assert RollingMedian(5).median() is None
+
+
+@pytest.mark.parametrize("cuts", [STRICT_CUTS, DEFAULT_CUTS], ids=["strict", "default"])
+def test_streaming_score_matches_statistics(cuts):
+    streaming = StreamingFreezeScore(cuts=cuts)
+    history = deque(maxlen=100)
+    on_cut = 0
+    for i, hl in enumerate(tick_ranges(30000, cuts, seed=int(cuts[0][0] * 100))):
+        streaming.add(hl)
+        history.append(hl)
+        expected, ratio = old_score(history, cuts)
+        assert streaming.score() == expected, i
+        if len(history) >= 20:
+            assert streaming.baseline() == statistics.median(history)
+        if ratio is not None and any(ratio == cut for cut, _ in cuts):
+            on_cut += 1
+    # 比率がちょうど閾値に乗るケースを十分に通っている
+    assert on_cut > 500
+
+
+def test_streaming_score_needs_min_history():
+    streaming = StreamingFreezeScore(cuts=STRICT_CUTS)
+    for _ in range(19):
+        streaming.add(1.0)
+        assert streaming.baseline() is None and streaming.score() == 0
+    streaming.add(1.0)
+    assert streaming.baseline() == 1.0 and streaming.score() == 0
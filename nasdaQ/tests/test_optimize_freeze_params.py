@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pytest
+
+import optimize_freeze_params as opt
+from vector_backtest import STRICT_RULES
+
+MIN = 60 * 10**9
+TOL = 2 * MIN
+
+
+def _ns(*minutes):
+    return np.array(minutes, dtype=np.int64) * MIN
+
+
+def test_overlaps_tolerance_edges():
+    b_start, b_end = _ns(100, 200), _ns(110, 210)
+    a_start = _ns(112, 113, 90, 95, 150, 212, 213, 105)
+    a_end = _ns(115, 115, 98, 97, 160, 220, 220, 106)
+    # 112: b の終了 110 から 2分 → 一致 / 113: 3分 → 不一致
+    # 90-98: b の開始 100 まで 2分 → 一致 / 95-97: 3分 → 不一致
+    # 150-160: どちらからも遠い / 212: 210 から 2分 / 213: 3分 / 105-106: 区間の中
+    assert opt._overlaps(a_start, a_end, b_start, b_end, TOL).tolist() == \
+        [True, False, True, False, False, True, False, True]
+    assert opt._overlaps(a_start, a_end, b_start, b_end, 0).tolist() == \
+        [False, False, False, False, False, False, False, True]
+    assert opt._overlaps(a_start, a_end, _ns(), _ns(), TOL).tolist() == [False] * 8
+
+
+def test_overlaps_with_overlapping_intervals():
+    # 長い区間（0-100）が後ろの短い区間（10-20, 30-40）を含む
+    b_start, b_end = _ns(0, 10, 30), _ns(100, 20, 40)
+    a_start, a_end = _ns(50, 60, 103, 110), _ns(55, 70, 104, 120)
+    assert opt._overlaps(a_start, a_end, b_start, b_end, TOL).tolist() == [True, True, False, False]
+    assert opt._overlaps(a_start, a_end, b_start, b_end, 3 * MIN).tolist() == [True, True, True, False]
+
+
+def test_load_labels_sorts_and_filters(tmp_path):
+    path = tmp_path / "labels.csv"
+    path.write_text(
+        "日付,曜日,開始時刻,終了時刻,継続時間(分),開始価格,終了価格,価格変動,方向,変動率(%)\n"
+        "2026-01-02,Friday,10:49:00,10:58:00,9.0,1,1,+3.66,UP,0\n"
+        "2026-01-02,Friday,01:07:00,01:50:00,43.0,1,1,-12.5,DOWN,0\n"
+        "2026-01-02,Friday,09:45:00,09:47:00,2.0,1,1,-20.0,DOWN,0\n",
+        encoding="utf-8",
+    )
+    base = int(np.datetime64("2026-01-01T16:00:00", "ns").astype(np.int64))  # 2026-01-02 01:00 JST
+
+    starts, ends = opt.load_labels(str(path))
+    assert ((starts - base) // MIN).tolist() == [7, 8 * 60 + 45, 9 * 60 + 49]
+    assert ((ends - starts) // MIN).tolist() == [43, 2, 9]
+
+    starts, ends = opt.load_labels(str(path), min_change=10, min_duration=5)
+    assert ((starts - base) // MIN).tolist() == [7]
+    assert len(opt.load_labels(str(path), min_change=100)[0]) == 0
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """
+    ワーカーの状態を手で作り、検知結果（イベントのバー位置）を差し替える
+    1バー = 1分、ラベルは 10-20 / 50-60 / 100-105 分
+    """
+    detected = []
+    monkeypatch.setattr(opt, "freeze_scores", lambda frame, cuts: None)
+    monkeypatch.setattr(opt, "detect_transitions", lambda scores, close, rules: ([], list(detected)))
+    times = _ns(*range(200))
+    labels = (_ns(10, 50, 100), _ns(20, 60, 105))
+    opt._init_worker(None, None, times, labels, TOL)
+    yield detected
+    opt._DATA.clear()
+
+
+def _params():
+    return {k: STRICT_RULES[k] for k in opt.PARAM_GRID}
+
+
+def test_evaluate_precision_recall(worker):
+    # 22-25: ラベル 10-20 から2分 → 一致 / 63-70: 3分 → 不一致 / 101-103: 一致
+    worker.extend([(22, 25), (63, 70), (101, 103)])
+    result = opt.evaluate(_params())
+    assert (result["detected"], result["matched"]) == (3, 2)
+    assert result["precision"] == pytest.approx(2 / 3)
+    assert result["recall"] == pytest.approx(2 / 3)
+    assert result["f1"] == pytest.approx(2 / 3)
+
+
+def test_evaluate_counts_each_label_once(worker):
+    # 1つのラベルに2件当たっても再現率は1件ぶん
+    worker.extend([(12, 14), (16, 18)])
+    result = opt.evaluate(_params())
+    assert (result["detected"], result["matched"]) == (2, 2)
+    assert result["precision"] == 1.0
+    assert result["recall"] == pytest.approx(1 / 3)
+
+
+def test_evaluate_without_detections(worker):
+    result = opt.evaluate(_params())
+    assert (result["detected"], result["precision"], result["recall"], result["f1"]) == (0, 0.0, 0.0, 0.0)
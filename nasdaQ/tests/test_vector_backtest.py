@@ -0,0 +1,163 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyze_all_freezes_from_jan import FreezeEventDetector
+from bar_cache import JST
+from freeze_score import STRICT_CUTS, StreamingFreezeScore
+from vector_backtest import (
+    ANALYZE_RULES, CONFIRMED, NORMAL, STRICT_RULES, SUSPECTED,
+    backtest_bars, detect_transitions, freeze_ratio_frame, freeze_scores,
+)
+
+TICK = 0.25
+
+
+def random_bars(n, seed):
+    """
+    停止区間（値幅がほぼ0・価格が動かない）を含む1分足
+    停止の後は価格が跳ぶことがある（strict の最低変動を満たす/満たさない両方が出る）
+    """
+    rng = random.Random(seed)
+    price = 21000.0
+    rows = []
+    while len(rows) < n:
+        frozen = rng.random() < 0.35
+        length = rng.randint(3, 40) if frozen else rng.randint(5, 120)
+        for _ in range(length):
+            if frozen:
+                ticks = rng.choice((0, 0, 0, 1, 1, 2, 6))
+            else:
+                ticks = rng.randint(2, 30)
+                price += rng.randint(-8, 8) * TICK
+            low = price - rng.randint(0, ticks) * TICK
+            rows.append((low, low + ticks * TICK, price))
+        if frozen and rng.random() < 0.6:
+            price += rng.choice((-1, 1)) * rng.randint(0, 120) * TICK
+    low, high, close = np.array(rows[:n]).T
+    index = pd.date_range("2026-03-02 09:00", periods=n, freq="min", tz=JST)
+    return pd.DataFrame({"open": close, "high": high, "low": low, "close": close}, index=index)
+
+
+def streaming_scores(bars, cuts):
+    """1本ずつのスコア（StreamingFreezeScore）"""
+    scorer = StreamingFreezeScore(cuts=cuts)
+    out = []
+    for high, low in zip(bars["high"].to_numpy(), bars["low"].to_numpy()):
+        scorer.add(high - low)
+        out.append(scorer.score())
+    return np.array(out, dtype=np.int8)
+
+
+def per_bar_transitions(scores, close, rules):
+    """
+    1本ずつの状態遷移（StrictFreezeDetector._update_state と同じ書き方）を確定足ごとに回す
+    RESOLVING は次の1本で NORMAL に戻り、その1本は連続カウントしない
+    戻り値: (transitions, events) は detect_transitions と同じ形
+    """
+    state, count, confirm_at = NORMAL, 0, None
+    resolving = False
+    transitions, events = [], []
+    for i, score in enumerate(scores.tolist()):
+        count = count + 1 if score >= rules["high_score"] else 0
+
+        if resolving:
+            resolving = False
+            count = 0
+        elif state == NORMAL:
+            if count >= rules["suspect_after"]:
+                state = SUSPECTED
+                transitions.append((i, SUSPECTED))
+        elif state == SUSPECTED:
+            if count >= rules["confirm_after"]:
+                state, confirm_at = CONFIRMED, i
+                transitions.append((i, CONFIRMED))
+            elif score < rules["cancel_below"]:
+                state, count = NORMAL, 0
+                transitions.append((i, NORMAL))
+        elif state == CONFIRMED and score < rules["resolve_below"]:
+            state, count = NORMAL, 0
+            transitions.append((i, NORMAL))
+            if abs(close[i] - close[confirm_at]) >= rules["min_price_change"]:
+                events.append((confirm_at, i))
+                resolving = rules["resolve_cooldown"]
+    return transitions, events
+
+
+def random_scores(n, seed):
+    """スコア区分の連続区間をランダムに並べた列（解消の直後に高スコアが続くケースを多く含む）"""
+    rng = random.Random(seed)
+    scores, close = [], []
+    price = 0.0
+    while len(scores) < n:
+        score = rng.choice((100, 80, 80, 60, 40, 0))
+        length = rng.choice((1, 1, 2, 4, 5, 6, 7, 8, 12))
+        if rng.random() < 0.5:
+            price += rng.choice((-1, 1)) * rng.choice((0, 5, 10, 30))
+        scores += [score] * length
+        close += [price] * length
+    return np.array(scores[:n], dtype=np.int8), np.array(close[:n])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_analyze_rules_match_freeze_event_detector(seed):
+    bars = random_bars(3000, seed)
+    detector = FreezeEventDetector()
+    for i, (ts, row) in enumerate(zip(bars.index, bars.itertuples())):
+        detector.analyze_candle({'timestamp': ts, 'open': row.open, 'high': row.high,
+                                 'low': row.low, 'close': row.close}, i)
+
+    result = backtest_bars(bars, ANALYZE_RULES)
+
+    assert len(detector.all_events) > 5
+    keys = ['start_time', 'end_time', 'start_price', 'end_price', 'price_change', 'direction']
+    assert [{k: e[k] for k in keys} for e in result['events']] == \
+        [{k: e[k] for k in keys} for e in detector.all_events]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_strict_rules_match_per_bar_model(seed):
+    bars = random_bars(3000, seed)
+    close = bars["close"].to_numpy()
+    scores = streaming_scores(bars, STRICT_CUTS)
+
+    frame = freeze_ratio_frame((bars["high"] - bars["low"]).to_numpy())
+    assert np.array_equal(freeze_scores(frame, STRICT_CUTS), scores)
+    assert detect_transitions(scores, close, STRICT_RULES) == per_bar_transitions(scores, close, STRICT_RULES)
+
+
+@pytest.mark.parametrize("cooldown", [True, False])
+def test_transitions_match_per_bar_model_on_random_scores(cooldown):
+    rules = dict(STRICT_RULES, resolve_cooldown=cooldown)
+    differs = 0
+    for seed in range(200):
+        scores, close = random_scores(400, seed)
+        expected = per_bar_transitions(scores, close, rules)
+        assert detect_transitions(scores, close, rules) == expected, seed
+        differs += expected != per_bar_transitions(scores, close, dict(rules, resolve_cooldown=not cooldown))
+    # RESOLVING の1本で結果が変わるケースを十分に通っている
+    assert differs > 20
+
+
+def test_strict_cooldown_skips_the_bar_after_resolution():
+    # 確定 → 解消（変動あり）の直後に高スコアが7本続く場合
+    high, low = STRICT_RULES["high_score"], 0
+    scores = np.array([high] * 7 + [low] + [high] * 7 + [low] + [high] * 3, dtype=np.int8)
+    close = np.zeros(len(scores))
+    close[7:] = 20.0
+    close[15:] = 40.0
+
+    _, events = detect_transitions(scores, close, STRICT_RULES)
+    _, events_no_cooldown = detect_transitions(scores, close, dict(STRICT_RULES, resolve_cooldown=False))
+
+    # 解消の次の1本（8本目）は数えないので、残り6本では確定しない
+    assert events == [(6, 7)]
+    assert events_no_cooldown == [(6, 7), (14, 15)]
+    assert per_bar_transitions(scores, close, STRICT_RULES)[1] == events
+
@@ -0,0 +1,263 @@
+# vector_backtest.py
+# 全期間の停止イベントを配列計算で一括検出するオフライン・バックテスト
+#
+# - 1分足は bar_cache のローカルキャッシュから読む（取引所へは取りに行かない）
+# - 値幅の移動中央値・直近平均・比率・スコアは pandas / NumPy の移動窓で一括計算
+# - 状態遷移（NORMAL → SUSPECTED → CONFIRMED → 解消）は、スコア区分の連続区間
+#   （ランレングス）単位で進めるので、1本ずつのループより桁違いに速い
+# - analyze ルールは1本ずつの検知器（analyze_all_freezes_from_jan）と同じ判定
+# - strict ルールは StrictFreezeDetector の状態遷移（RESOLVING の1本を含む）を確定足の本数で数えたもの
+#   （ライブの検知器は15秒ごとのポーリング単位で数えるので、連続本数の意味が少し違う）
+#
+# 使い方（nasdaQ ディレクトリで実行）:
+#     python vector_backtest.py --start 2026-01-01 --update     # キャッシュを更新してから分析
+#     python vector_backtest.py --start 2026-01-01 --rules strict
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_cache import load_bars, update_cache
+from freeze_score import DEFAULT_CUTS, MIN_HISTORY, RECENT_SIZE, STRICT_CUTS, WINDOW_SIZE
+
+# 判定ルール
+#   high_score: 連続カウントするスコア（以上）
+#   suspect_after / confirm_after: 疑い・確定に必要な連続本数
+#   cancel_below: 疑い中にこれ未満のスコアが出たら NORMAL に戻す
+#   resolve_below: 確定中にこれ未満のスコアが出たら解消
+#   min_price_change: 解消時の最低価格変動（未満なら誤検知として捨てる）
+#   resolve_cooldown: 解消の次の1本は連続カウントしない（strict の RESOLVING 状態）
+ANALYZE_RULES = {
+    "cuts": DEFAULT_CUTS,
+    "high_score": 60,
+    "suspect_after": 3,
+    "confirm_after": 5,
+    "cancel_below": 40,
+    "resolve_below": 40,
+    "min_price_change": 0.0,
+    "resolve_cooldown": False,
+}
+# StrictFreezeDetector の閾値（連続「回数」はポーリングではなく1分足の本数として使う）
+STRICT_RULES = {
+    "cuts": STRICT_CUTS,
+    "high_score": 80,
+    "suspect_after": 5,
+    "confirm_after": 7,
+    "cancel_below": 60,
+    "resolve_below": 50,
+    "min_price_change": 10.0,
+    "resolve_cooldown": True,
+}
+RULES = {"analyze": ANALYZE_RULES, "strict": STRICT_RULES}
+
+NORMAL, SUSPECTED, CONFIRMED = 0, 1, 2
+
+# 監視銘柄（strict_freeze_detector と同じ）
+BACKTEST_SYMBOLS = [
+    {"name": "NASDAQ100", "symbol": "NCSINASDAQ1002USD-USDT"},
+    {"name": "S&P500", "symbol": "NCSISP5002USD-USDT"},
+    {"name": "GOLD", "symbol": "NCCOGOLD2USD-USDT"},
+]
+
+# 比率が閾値からこの相対差以内なら statistics.mean で計算し直す（freeze_score と同じ）
+_EXACT_MARGIN = 1e-9
+
+
+def freeze_ratio_frame(hl, window_size=WINDOW_SIZE, recent_size=RECENT_SIZE, min_history=MIN_HISTORY):
+    """
+    値幅の配列 → 各バー時点の ベースライン（移動中央値）・直近平均・比率
+    （スコアの閾値に依存しない部分。パラメータ探索では銘柄ごとに1回だけ作る）
+    """
+    hl = np.asarray(hl, dtype=np.float64)
+    s = pd.Series(hl)
+    baseline = s.rolling(window_size, min_periods=min_history).median().to_numpy()
+    recent = s.rolling(recent_size).sum().to_numpy() / recent_size
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(baseline > 0, recent / baseline, np.nan)
+    return {"hl": hl, "baseline": baseline, "recent": recent, "ratio": ratio, "recent_size": recent_size}
+
+
+def freeze_scores(frame, cuts=DEFAULT_CUTS):
+    """比率 → 停止スコア（int8）。閾値のごく近くだけ1本ずつの計算と同じ値に揃える"""
+    ratio = frame["ratio"].copy()
+    n = frame["recent_size"]
+    for cut, _ in cuts:
+        near = np.flatnonzero(np.abs(ratio - cut) <= _EXACT_MARGIN * cut)
+        for i in near:
+            ratio[i] = statistics.mean(frame["hl"][i - n + 1:i + 1]) / frame["baseline"][i]
+
+    scores = np.zeros(len(ratio), dtype=np.int8)
+    valid = ~np.isnan(ratio)
+    assigned = ~valid
+    for cut, score in cuts:
+        hit = valid & ~assigned & (ratio <= cut)
+        scores[hit] = score
+        assigned |= hit
+    return scores
+
+
+def _runs(codes):
+    """ランレングス: (開始位置, 長さ, 値)"""
+    n = len(codes)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), codes[:0]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    lengths = np.diff(np.r_[starts, n])
+    return starts, lengths, codes[starts]
+
+
+def detect_transitions(scores, close, rules=ANALYZE_RULES):
+    """
+    スコア列から状態遷移とイベントを求める
+
+    戻り値: (transitions, events)
+        transitions: [(バー位置, 新しい状態)]（状態は NORMAL / SUSPECTED / CONFIRMED）
+        events: [(確定したバー位置, 解消したバー位置)]（価格変動の条件を満たしたものだけ）
+    """
+    scores = np.asarray(scores)
+    high = scores >= rules["high_score"]
+    cancel = scores < rules["cancel_below"]
+    resolve = scores < rules["resolve_below"]
+    # スコア区分ごとの連続区間（区分: 高スコア / 取消 / 解消 の組み合わせ）
+    codes = high.astype(np.int8) * 4 + cancel.astype(np.int8) * 2 + resolve.astype(np.int8)
+    starts, lengths, values = _runs(codes)
+
+    sa = rules["suspect_after"]
+    ca = rules["confirm_after"]
+    min_change = rules["min_price_change"]
+    cooldown = rules["resolve_cooldown"]
+
+    state = NORMAL
+    confirm_at = None
+    skip_until = -1  # 解消の次の1本（連続カウントしない）
+    transitions, events = [], []
+
+    for start, length, value in zip(starts.tolist(), lengths.tolist(), values.tolist()):
+        if value & 4:  # 高スコアの連続区間
+            if start <= skip_until:
+                start, length = start + 1, length - 1
+                if length <= 0:
+                    continue
+            if state == NORMAL and length >= sa:
+                state = SUSPECTED
+                transitions.append((start + sa - 1, SUSPECTED))
+                offset = max(sa, ca - 1)
+            elif state == SUSPECTED:
+                offset = ca - 1
+            else:
+                continue
+            if length > offset:
+                state = CONFIRMED
+                confirm_at = start + offset
+                transitions.append((confirm_at, CONFIRMED))
+            continue
+
+        if state == SUSPECTED and value & 2:
+            state = NORMAL
+            transitions.append((start, NORMAL))
+        elif state == CONFIRMED and value & 1:
+            state = NORMAL
+            transitions.append((start, NORMAL))
+            if abs(close[start] - close[confirm_at]) >= min_change:
+                events.append((confirm_at, start))
+                if cooldown:
+                    skip_until = start + 1
+            confirm_at = None
+
+    return transitions, events
+
+
+def states_from_transitions(transitions, n):
+    """遷移のリスト → バーごとの状態（int8）"""
+    if not transitions:
+        return np.full(n, NORMAL, dtype=np.int8)
+    idx, new = np.array(transitions).T
+    marks = np.full(n, -1, dtype=np.int8)
+    marks[idx] = new
+    # 直前の遷移位置を前方に埋める
+    pos = np.maximum.accumulate(np.where(marks >= 0, np.arange(n), -1))
+    return np.where(pos >= 0, marks[pos], NORMAL).astype(np.int8)
+
+
+def events_to_records(bars, events):
+    """(確定位置, 解消位置) → analyze_all_freezes_from_jan と同じ形のイベント辞書"""
+    times = bars.index
+    close = bars["close"].to_numpy()
+    records = []
+    for c, r in events:
+        start_time, end_time = times[c], times[r]
+        price_diff = close[r] - close[c]
+        records.append({
+            'start_time': start_time,
+            'end_time': end_time,
+            'duration_minutes': (end_time - start_time).total_seconds() / 60,
+            'start_price': close[c],
+            'end_price': close[r],
+            'price_change': price_diff,
+            'direction': "UP" if price_diff > 0 else "DOWN",
+            'date': start_time.strftime('%Y-%m-%d'),
+            'start_time_str': start_time.strftime('%H:%M:%S'),
+            'end_time_str': end_time.strftime('%H:%M:%S'),
+            'day_of_week': start_time.strftime('%A')
+        })
+    return records
+
+
+def backtest_bars(bars, rules=ANALYZE_RULES):
+    """
+    1分足（open/high/low/close, 時刻順）を一括で分析する
+    戻り値: {'events': イベント辞書のリスト, 'scores', 'states', 'transitions'}
+    """
+    hl = (bars["high"] - bars["low"]).to_numpy()
+    frame = freeze_ratio_frame(hl)
+    scores = freeze_scores(frame, rules["cuts"])
+    close = bars["close"].to_numpy()
+    transitions, events = detect_transitions(scores, close, rules)
+    return {
+        "events": events_to_records(bars, events),
+        "scores": scores,
+        "states": states_from_transitions(transitions, len(scores)),
+        "transitions": transitions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="キャッシュ済み1分足で全期間の停止イベントを一括検出")
+    parser.add_argument("--start", default="2026-01-01", help="開始日（YYYY-MM-DD）")
+    parser.add_argument("--end", default=None, help="終了日（省略で現在まで）")
+    parser.add_argument("--rules", choices=sorted(RULES), default="analyze", help="判定ルール")
+    parser.add_argument("--update", action="store_true", help="先にキャッシュにない日を取得する")
+    parser.add_argument("--csv", default=None, help="イベントを保存するCSV（銘柄名を付けて保存）")
+    args = parser.parse_args()
+
+    from analyze_all_freezes_from_jan import display_summary, save_events_to_csv
+
+    rules = RULES[args.rules]
+    for config in BACKTEST_SYMBOLS:
+        print("=" * 80)
+        print(f"🔬 {config['name']} ({config['symbol']}) ルール={args.rules}")
+        print("=" * 80)
+        if args.update:
+            update_cache(config['symbol'], args.start, args.end)
+
+        bars = load_bars(config['symbol'], args.start, args.end)
+        if bars.empty:
+            print("  キャッシュにデータがありません（--update で取得）")
+            continue
+
+        t_start = time.perf_counter()
+        result = backtest_bars(bars, rules)
+        elapsed = time.perf_counter() - t_start
+        print(f"  {len(bars):,}本を分析: 停止イベント {len(result['events'])}件（{elapsed:.3f}秒）")
+
+        display_summary(result['events'])
+        if args.csv:
+            base, ext = args.csv.rsplit(".", 1) if "." in args.csv else (args.csv, "csv")
+            save_events_to_csv(result['events'], f"{base}_{config['name']}.{ext}")
+
+
+if __name__ == "__main__":
+    main()
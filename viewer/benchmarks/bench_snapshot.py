@@ -0,0 +1,53 @@
+"""スナップショット取得のベンチマーク（全体 / 取引所ごとの解析 / マージ）"""
+
+from datetime import datetime
+
+import pytest
+from conftest import record_percentiles
+
+pytest.importorskip('streamlit')
+
+from modules import data_api, exchange_clients
+
+CYCLE_MASTERS = {"Bitget": {}, "MEXC": {}}
+SNAPSHOT_ROUNDS = 50
+
+
+def test_snapshot_latency(benchmark, replay_server):
+    """キャッシュを無効化して毎回取得する（取得 + 解析 + マージ）"""
+    result = benchmark.pedantic(
+        data_api.collect_snapshot,
+        args=(CYCLE_MASTERS, datetime.now()),
+        setup=data_api.invalidate_exchanges,
+        rounds=SNAPSHOT_ROUNDS,
+        iterations=1,
+    )
+    record_percentiles(benchmark)
+    benchmark.extra_info['symbols'] = len(result[0])
+
+
+def test_snapshot_latency_cached(benchmark, replay_server):
+    """TTL 内（キャッシュから解析 + マージだけ）"""
+    data_api.collect_snapshot(CYCLE_MASTERS, datetime.now())
+    benchmark.pedantic(
+        data_api.collect_snapshot,
+        args=(CYCLE_MASTERS, datetime.now()),
+        rounds=SNAPSHOT_ROUNDS,
+        iterations=1,
+    )
+    record_percentiles(benchmark)
+
+
+@pytest.mark.parametrize('exchange', data_api.EXCHANGES)
+def test_parse(benchmark, replay_server, exchange):
+    payloads = exchange_clients.run(exchange_clients.get_client(exchange).get_all())
+    now_dt = datetime.now()
+    data, status = benchmark(data_api.PARSERS[exchange], payloads, CYCLE_MASTERS, now_dt)
+    assert status == "🟢"
+    benchmark.extra_info['symbols'] = len(data)
+
+
+def test_merge(benchmark, replay_server):
+    results = exchange_clients.run(data_api.fetch_all_async(data_api.EXCHANGES, CYCLE_MASTERS, datetime.now()))
+    data, _ = benchmark(data_api.merge_results, results)
+    benchmark.extra_info['symbols'] = len(data)
@@ -0,0 +1,86 @@
+"""
+ベンチマーク共通の設定とリプレイサーバー
+
+取引所ごとの遅延・ゆらぎは実測に近い値（MEXC / Bitget / Variational は数十ms、BingX は遅め）にしてある。
+スナップショット全体のベンチマークは p50 / p99 を extra_info に記録する。
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+from pytest_benchmark.utils import parse_compare_fail
+
+from replay_harness import FaultProfile, ReplayServer, load_fixtures, replay_exchanges, synthetic_fixtures
+
+# --benchmark-compare 時に、平均時間がこれ以上悪化したら失敗させる
+REGRESSION_TOLERANCE = os.environ.get('BENCHMARK_TOLERANCE', 'mean:20%')
+
+SYNTHETIC_SYMBOLS = 800
+
+LATENCY_PROFILES = {
+    "MEXC": FaultProfile(latency_s=0.060, jitter_s=0.020),
+    "Bitget": FaultProfile(latency_s=0.050, jitter_s=0.015),
+    "BingX": FaultProfile(latency_s=0.120, jitter_s=0.040),
+    "Variational": FaultProfile(latency_s=0.080, jitter_s=0.030),
+}
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if config.getoption('benchmark_compare', None) and not config.getoption('benchmark_compare_fail', None):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_TOLERANCE)]
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    session = getattr(config, '_benchmarksession', None)
+    rows = [b for b in getattr(session, 'benchmarks', []) if 'p50_ms' in b.extra_info]
+    if not rows:
+        return
+    terminalreporter.section('スナップショットのレイテンシ（p50 / p99）')
+    for b in rows:
+        terminalreporter.write_line(f"{b.name:<40} p50={b.extra_info['p50_ms']:>8.2f}ms  p99={b.extra_info['p99_ms']:>8.2f}ms")
+
+
+@pytest.fixture(scope='session')
+def replay_fixtures():
+    """REPLAY_FIXTURES の記録済みレスポンス（未指定なら合成データ）"""
+    directory = os.environ.get('REPLAY_FIXTURES')
+    if directory:
+        fixtures = load_fixtures(directory)
+        if not fixtures:
+            pytest.skip(f"記録がありません: {directory}")
+        return fixtures
+    return synthetic_fixtures(n_symbols=SYNTHETIC_SYMBOLS)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _isolated_cwd(tmp_path_factory):
+    # サイクルマスター（cycle_store）は一時ディレクトリに作る
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('cwd'))
+    yield
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def replay_server(replay_fixtures):
+    with ReplayServer(replay_fixtures, LATENCY_PROFILES) as server:
+        with replay_exchanges(server):
+            yield server
+
+
+def record_percentiles(benchmark):
+    """計測した各ラウンドの時間から p50 / p99（ms）を extra_info に記録する"""
+    # --benchmark-disable のときは時間を測らない（stats が None）
+    if benchmark.disabled or benchmark.stats is None:
+        return
+    samples = np.asarray(benchmark.stats.stats.data) * 1000
+    benchmark.extra_info['p50_ms'] = round(float(np.percentile(samples, 50)), 2)
+    benchmark.extra_info['p99_ms'] = round(float(np.percentile(samples, 99)), 2)
@@ -4,13 +4,34 @@ import requests
 import os
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from modules.data_api import fetch_api_snapshot
+from modules.data_api import fetch_api_snapshot, invalidate_exchanges
+from modules.snapshot_store import latest_snapshot_info, read_latest_snapshot
 from modules.mode_simultaneous import render_simultaneous_mode
 from modules.mode_time_diff import render_time_diff_mode
 from modules.mode_single import render_single_mode
 from modules.user_settings import load_settings, save_settings
 
 
+# コレクターのスナップショットがこれより古ければ、直接取得に切り替える（秒）
+SNAPSHOT_STALE_S = 180
+
+
+def load_from_snapshot_store():
+    """共有ストアの最新スナップショットを session_state に反映（使えれば True）"""
+    info = latest_snapshot_info()
+    if info is None or info['age_s'] > SNAPSHOT_STALE_S:
+        return False
+    if info['id'] != st.session_state.get('snapshot_id'):
+        snap = read_latest_snapshot()
+        if snap is None:
+            return False
+        st.session_state.update({
+            'raw': snap['raw'], 'api': snap['status'], 'update_ts': snap['ts'],
+            'snapshot_id': snap['id'],
+        })
+    return True
+
+
 # --- ページ基本設定 ---
 st.set_page_config(page_title="金利ーマン Dashboard v3.7.0", layout="wide")
 
@@ -41,10 +62,10 @@ if 'user_settings' not in st.session_state:
 
 settings = st.session_state.user_settings
 
-if st.sidebar.button('⚡️ 最新データ更新', use_container_width=True):
-    st.cache_data.clear()
-    raw, status, ts = fetch_api_snapshot()
-    st.session_state.update({'raw': raw, 'api': status, 'update_ts': ts})
+# コレクター（snapshot_collector.py）が動いていれば、最新スナップショットを読むだけ
+use_snapshot_store = load_from_snapshot_store()
+
+refresh_clicked = st.sidebar.button('⚡️ 最新データ更新', use_container_width=True)
 
 mode_ui = st.sidebar.selectbox("📊 プログラム選択", ["同時刻金利版", "時間差ヘッジ版", "単体金利版"])
 st.sidebar.markdown("---")
@@ -119,9 +140,24 @@ if current_settings != st.session_state.user_settings:
 
 
 # --- メインロジック ---
-if 'raw' not in st.session_state:
+# 更新ボタン: 選択中の取引所のキャッシュだけを無効化して取り直す
+if refresh_clicked and not use_snapshot_store:
+    invalidate_exchanges(active_exs)
+    raw, status, ts = fetch_api_snapshot()
+    st.session_state.update({'raw': raw, 'api': status, 'update_ts': ts})
+
+# コレクター未起動（または停止してスナップショットが古い）なら直接取得する
+if not use_snapshot_store and ('raw' not in st.session_state or 'snapshot_id' in st.session_state):
     raw, status, ts = fetch_api_snapshot()
     st.session_state.update({'raw': raw, 'api': status, 'update_ts': ts})
+    st.session_state.pop('snapshot_id', None)
+
+# 取引所ごとの状態とデータの経過秒
+api_status = st.session_state.get('api', {})
+st.sidebar.caption(" / ".join(
+    f"{ex} {s['state']} {s['age_s']:.0f}s" if s.get('age_s') is not None else f"{ex} {s['state']}"
+    for ex, s in api_status.items() if isinstance(s, dict)
+))
 
 st.markdown(f"<h2>👔 金利ーマン Dashboard <span class='update-ts'>({st.session_state.update_ts} 更新)</span></h2>", unsafe_allow_html=True)
 
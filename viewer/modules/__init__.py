@@ -17,6 +17,40 @@
 │   │   ├── fetch_bingx_data()
 │   │   └── fetch_variational_data()
 │   │
+│   ├── snapshot_store.py     # 共有スナップショット（SQLite）← snapshot_collector.py が書き込む
+│   │   ├── publish_snapshot()
+│   │   └── read_latest_snapshot()
+│   │
+│   ├── rate_history.py       # 金利の時系列ストア（日別 Parquet）
+│   │   ├── RateHistoryRecorder
+│   │   └── last_settlements()
+│   │
+│   ├── cycle_store.py        # 銘柄ごとのサイクル（1h/4h/8h）のマスター（SQLite / 旧CSVは初回取り込みのみ）
+│   │   └── CycleStore.load() / apply()
+│   │
+│   ├── cycle_reconciler.py   # サイクルの自動照合（レート制限つきの並行取得 → 差分だけ書き込み）
+│   │   ├── reconcile() / reconcile_stalest()
+│   │   └── ReconcileWorker  # snapshot_collector.py の常駐スレッド
+│   │
+│   ├── settlement_calendar.py # 配布スケジュール（1h/4h/8h）の唯一の定義 + 分単位の次回配布表
+│   │   ├── get_calendar()
+│   │   └── SettlementCalendar.remaining_s() / normalize_time()
+│   │
+│   ├── exchange_clients.py   # 非同期HTTPクライアント（aiohttp / keep-alive）
+│   │   ├── get_client() / get_cached()  # TTL付き stale-while-revalidate
+│   │   └── run()
+│   │
+│   ├── arb_engine.py         # 裁定ペアの列指向エンジン（自己結合 + NumPy）
+│   │   ├── simultaneous_pairs() / hedge_pairs()
+│   │   └── best_per_ticker() / split_by_cycle()
+│   │
+│   ├── ranking.py            # 差分更新の Top-K ランキング（銘柄別最良ペアのヒープ）
+│   │   ├── PairRanker / SingleRanker
+│   │   └── get_ranker()
+│   │
+│   ├── html_render.py        # テーブルHTML（行フラグメントのキャッシュ + 1回の join）
+│   │   └── table_html()
+│   │
 │   ├── mode_simultaneous.py  # 同時刻版（150行）
 │   │   └── run_simultaneous_engine()
 │   │   └── render_simultaneous_table()
@@ -39,6 +73,11 @@
 │       ├── calculate_risk()
 │       └── fmt_rem()
 │
+├── snapshot_collector.py      # 常駐コレクター（スナップショット・金利履歴・サイクル照合）
+├── replay_harness.py          # 取引所APIのリプレイ用ローカルサーバー（遅延・失敗の注入）
+├── tests/                     # リプレイを使った取得まわりのテスト
+├── benchmarks/                # スナップショット取得のベンチマーク（p50 / p99・解析・マージ）
+│
 ├── requirements.txt
 └── README.md
 
@@ -0,0 +1,160 @@
+# modules/arb_engine.py
+"""
+裁定ペアの列指向エンジン（同時刻金利版 / 時間差ヘッジ版の共通基盤）
+
+- raw を (銘柄, 取引所) の1行1レコードの列テーブルに展開する
+- 銘柄（同時刻版は 銘柄×配布時刻）でグループ化し、グループ内の自己結合でペアを作る
+- 実質・乖離・レバレッジ別リスクは NumPy の一括計算
+- 結果は従来の run_*_engine と同じ列の DataFrame（i1 / i2 に両側の interval_s を追加）
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.settlement_calendar import INTERVAL_SECONDS
+from modules.utils import calculate_risk_matrix
+
+CYCLES = dict(INTERVAL_SECONDS)
+
+PAIR_COLUMNS = ["t", "ex1", "r1", "t1", "tp1", "ex2", "r2", "t2", "tp2", "df", "n", "rk", "i1", "i2"]
+HEDGE_COLUMNS = ["t", "ex1", "r1", "t1", "tp1", "rem1", "ex2", "r2", "t2", "tp2", "rem2", "df", "n", "rk", "i1", "i2"]
+
+
+def build_quote_table(raw, active_exs):
+    """raw を列テーブル（dict of ndarray）に展開。行は raw の銘柄順 → 取引所順"""
+    active = set(active_exs)
+    tickers, exs, ds, group = [], [], [], []
+    g = 0
+    for ticker, quotes in raw.items():
+        filtered = [(k, d) for k, d in quotes.items() if k in active]
+        if len(filtered) < 2:
+            continue
+        for ex, d in filtered:
+            tickers.append(ticker)
+            exs.append(ex)
+            ds.append(d)
+        group.extend([g] * len(filtered))
+        g += 1
+
+    # 1パスで数値列をまとめて取り出す
+    num = np.array(
+        [(d['rate'], d['p'], d['v'], d['m'], d.get('t', 0), d.get('interval_s', 0),
+          d.get('remaining_s', 0), 'remaining_s' in d) for d in ds],
+        dtype=np.float64,
+    ).reshape(len(ds), 8)
+
+    return {
+        'ticker': np.array(tickers, dtype=object),
+        'ex': np.array(exs, dtype=object),
+        'rate': num[:, 0],
+        'p': num[:, 1],
+        'v': num[:, 2],
+        'm': num[:, 3],
+        't': num[:, 4].astype(np.int64),
+        'interval_s': num[:, 5].astype(np.int64),
+        'rem': num[:, 6].astype(np.int64),
+        'has_rem': num[:, 7] != 0,
+        'group': np.array(group, dtype=np.int64),
+    }
+
+
+def self_join_pairs(keys):
+    """
+    keys（連続して並んだグループ番号）ごとに i < j の全ペアを作る
+    ペアの順序はグループ順 → (i, j) の辞書順（二重ループと同じ順）
+    """
+    n = len(keys)
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    bounds = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+    starts, sizes = bounds[:-1], np.diff(bounds)
+    pa, pb = np.triu_indices(int(sizes.max()), 1)
+    gi, ki = np.nonzero(sizes[:, None] > pb[None, :])
+    return starts[gi] + pa[ki], starts[gi] + pb[ki]
+
+
+def _price_diff(p1, p2):
+    """|p1 - p2| / p2 * 100（p2 が 0 なら 0）"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff = np.abs(p1 - p2) / p2 * 100
+    return np.where(p2 != 0, diff, 0.0)
+
+
+def _risk_rows(tab, a, b, levs, t_key):
+    rk = calculate_risk_matrix(tab['v'][a], tab['v'][b], tab['m'][a], tab['m'][b], levs, t_key)
+    return list(rk)
+
+
+def simultaneous_pairs(raw, active_exs, levs, t_key, table=None):
+    """同時刻金利版: 同じ銘柄・同じ配布時刻の取引所ペア（低金利側 L / 高金利側 S）"""
+    tab = table if table is not None else build_quote_table(raw, active_exs)
+    valid = np.flatnonzero(tab['t'] != 0)
+    # 銘柄×配布時刻でまとめる（安定ソートなので取引所の並びは raw の順のまま）
+    order = valid[np.lexsort((tab['t'][valid], tab['group'][valid]))]
+    key = tab['group'][order] * 100 + tab['t'][order]
+    i, j = self_join_pairs(key)
+    if len(i) == 0:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    i, j = order[i], order[j]
+    # 元の行位置 (i, j) の順に戻す（銘柄内の並びも従来の二重ループと同じにする）
+    pos = np.lexsort((j, i))
+    i, j = i[pos], j[pos]
+
+    swap = ~(tab['rate'][i] < tab['rate'][j])
+    low = np.where(swap, j, i)
+    high = np.where(swap, i, j)
+    diff = _price_diff(tab['p'][i], tab['p'][j])
+    net = tab['rate'][high] - tab['rate'][low]
+
+    return pd.DataFrame({
+        "t": tab['ticker'][i],
+        "ex1": tab['ex'][low], "r1": tab['rate'][low], "t1": tab['t'][low], "tp1": "L",
+        "ex2": tab['ex'][high], "r2": tab['rate'][high], "t2": tab['t'][high], "tp2": "S",
+        "df": diff, "n": net - diff, "rk": _risk_rows(tab, i, j, levs, t_key),
+        "i1": tab['interval_s'][low], "i2": tab['interval_s'][high],
+    })
+
+
+def hedge_pairs(raw, active_exs, levs, t_key, table=None):
+    """時間差ヘッジ版: 配布時刻がずれている取引所ペア（先に配布される側が拠点）"""
+    tab = table if table is not None else build_quote_table(raw, active_exs)
+    i, j = self_join_pairs(tab['group'])
+
+    rem_i, rem_j = tab['rem'][i], tab['rem'][j]
+    ok = tab['has_rem'][i] & tab['has_rem'][j] & (rem_i > 0) & (rem_j > 0)
+    cycle_same = tab['interval_s'][i] == tab['interval_s'][j]
+    diff_s = np.abs(rem_i - rem_j)
+    ok &= np.where(cycle_same, diff_s > 120, diff_s > 30)
+    i, j = i[ok], j[ok]
+    if len(i) == 0:
+        return pd.DataFrame(columns=HEDGE_COLUMNS)
+
+    first = tab['rem'][i] < tab['rem'][j]
+    a = np.where(first, i, j)
+    b = np.where(first, j, i)
+    r1 = tab['rate'][a]
+    tp1 = np.where(r1 >= 0, "S", "L")
+    tp2 = np.where(r1 >= 0, "L", "S")
+    diff = _price_diff(tab['p'][a], tab['p'][b])
+
+    return pd.DataFrame({
+        "t": tab['ticker'][a],
+        "ex1": tab['ex'][a], "r1": r1, "t1": tab['t'][a], "tp1": tp1, "rem1": tab['rem'][a],
+        "ex2": tab['ex'][b], "r2": tab['rate'][b], "t2": tab['t'][b], "tp2": tp2, "rem2": tab['rem'][b],
+        "df": diff, "n": np.abs(r1) - diff, "rk": _risk_rows(tab, a, b, levs, t_key),
+        "i1": tab['interval_s'][a], "i2": tab['interval_s'][b],
+    })
+
+
+def best_per_ticker(df, limit=None):
+    """実質（n）の高い順に並べ、銘柄ごとに最良の1ペアだけ残す"""
+    if df is None or df.empty:
+        return df
+    df = df.sort_values("n", ascending=False, kind="stable").drop_duplicates(subset=['t'])
+    return df.head(limit) if limit is not None else df
+
+
+def split_by_cycle(df):
+    """両側が同じサイクルのペアを周期別に分ける（{"1h": df, "4h": df, "8h": df}）"""
+    same = df['i1'].to_numpy() == df['i2'].to_numpy()
+    return {label: df[same & (df['i1'].to_numpy() == sec)] for label, sec in CYCLES.items()}
@@ -0,0 +1,208 @@
+# modules/cycle_reconciler.py
+"""
+金利サイクル（1h/4h/8h）の自動照合ワーカー
+
+- 銘柄ごとの金利メタデータ（MEXC / Bitget / BingX）を、取引所ごとのレート制限つきで並行取得する
+- 取得結果をメモリ上のサイクル表と突き合わせ、変わった銘柄だけ cycle_store に書く（1トランザクション）
+- 1回の照合は「確認が古い銘柄」から batch 件ずつ（全銘柄を毎回叩かない）
+- HTTP は exchange_clients の keep-alive セッション・常駐ループを使う
+"""
+
+import asyncio
+import threading
+import time
+
+from modules.cycle_store import get_cycle_store
+from modules.exchange_clients import get_client, run
+from modules.settlement_calendar import INTERVAL_SECONDS, cycle_for_seconds
+
+# --- 銘柄ごとの金利メタデータ（{sym} は基軸通貨: BTC など） ---
+META_ENDPOINTS = {
+    "MEXC": "https://contract.mexc.com/api/v1/contract/funding_rate/{sym}_USDT",
+    "Bitget": "https://api.bitget.com/api/v2/mix/market/current-fund-rate?symbol={sym}USDT&productType=usdt-futures",
+    "BingX": "https://open-api.bingx.com/openApi/swap/v2/quote/fundingRate?symbol={sym}-USDT&limit=3",
+}
+
+# --- 取引所ごとのレート制限（1秒あたりのリクエスト数）と同時接続数 ---
+RATE_LIMITS = {
+    "MEXC": 10.0,
+    "Bitget": 10.0,
+    "BingX": 4.0,  # BingX はレート制限が厳しい
+}
+MAX_CONCURRENCY = 4  # 接続は相場取得と共有するので余裕を残す
+
+# 1回の照合で確認する銘柄数（取引所ごと）
+RECONCILE_BATCH = 50
+RECONCILE_INTERVAL_S = 300
+
+
+def _interval_from_hours(hours):
+    try:
+        hours = int(float(hours))
+    except (TypeError, ValueError):
+        return None
+    interval = f"{hours}h"
+    return interval if interval in INTERVAL_SECONDS else None
+
+
+def parse_mexc_meta(meta):
+    """MEXC funding_rate → '4h'（data.collectCycle は時間単位）"""
+    data = meta.get("data") if isinstance(meta, dict) else None
+    if not isinstance(data, dict):
+        return None
+    return _interval_from_hours(data.get("collectCycle"))
+
+
+def parse_bitget_meta(meta):
+    """Bitget current-fund-rate → '4h'（data[0].fundingRateInterval は時間単位）"""
+    data = meta.get("data") if isinstance(meta, dict) else None
+    if not data:
+        return None
+    return _interval_from_hours(data[0].get("fundingRateInterval"))
+
+
+def parse_bingx_meta(meta):
+    """BingX fundingRate（直近の配布履歴）→ 配布時刻の間隔から '4h'"""
+    data = meta.get("data") if isinstance(meta, dict) else None
+    if not data or len(data) < 2:
+        return None
+    times = sorted(int(x["fundingTime"]) for x in data if x.get("fundingTime"))
+    gaps = {(b - a) // 1000 for a, b in zip(times, times[1:])}
+    if len(gaps) != 1:
+        return None
+    gap = gaps.pop()
+    return cycle_for_seconds(gap) if gap in INTERVAL_SECONDS.values() else None
+
+
+META_PARSERS = {
+    "MEXC": parse_mexc_meta,
+    "Bitget": parse_bitget_meta,
+    "BingX": parse_bingx_meta,
+}
+
+
+class RateLimiter:
+    """一定間隔でしか通さない非同期のレート制限（1秒あたり rate 回）"""
+
+    def __init__(self, rate):
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = None
+
+    async def wait(self):
+        # Lock はループ上で作る（作ったループでしか使えない）
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.min_interval
+
+
+async def fetch_interval(client, exchange, sym, limiter, sem):
+    """1銘柄のサイクル（取得・解析できなければ None）"""
+    async with sem:
+        await limiter.wait()
+        try:
+            meta = await client.get_json(META_ENDPOINTS[exchange].format(sym=sym))
+        except Exception as e:
+            print(f"[DEBUG] {exchange} サイクル取得エラー ({sym}): {e}")
+            return None
+    # 想定外の形のレスポンスでも1銘柄ぶんの失敗で済ませる（パス全体を落とさない）
+    try:
+        return META_PARSERS[exchange](meta)
+    except Exception as e:
+        print(f"[DEBUG] {exchange} サイクル解析エラー ({sym}): {e!r}")
+        return None
+
+
+async def fetch_intervals(exchange, symbols, rate=None, concurrency=MAX_CONCURRENCY):
+    """symbols のサイクルをまとめて取得する（{銘柄: '4h' / None}）"""
+    client = get_client(exchange)
+    limiter = RateLimiter(rate if rate is not None else RATE_LIMITS.get(exchange, 5.0))
+    sem = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*(
+        fetch_interval(client, exchange, sym, limiter, sem) for sym in symbols
+    ))
+    return dict(zip(symbols, results))
+
+
+def reconcile(exchange, symbols, store=None, timeout=None):
+    """
+    symbols のサイクルを取得してストアと突き合わせる
+    戻り値: 変更のリスト [(銘柄, 旧サイクル or None, 新サイクル)]
+    """
+    store = store or get_cycle_store()
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols or exchange not in META_ENDPOINTS:
+        return []
+    results = run(fetch_intervals(exchange, symbols), timeout=timeout)
+    return _apply(store, exchange, results)
+
+
+def _apply(store, exchange, results):
+    changes = store.apply(exchange, results)
+    fetched = sum(1 for v in results.values() if v is not None)
+    print(f"[INFO] サイクル照合 {exchange}: 確認={fetched}/{len(results)}, 変更={len(changes)}")
+    for sym, old, new in changes:
+        print(f"[INFO]   {exchange} {sym}: {old or 'NEW'} → {new}")
+    return changes
+
+
+def symbols_by_exchange(raw):
+    """スナップショット（{銘柄: {取引所: ...}}）→ {取引所: [銘柄]}"""
+    out = {}
+    for sym, quotes in raw.items():
+        for ex in quotes:
+            if ex in META_ENDPOINTS:
+                out.setdefault(ex, []).append(sym)
+    return out
+
+
+def reconcile_stalest(raw, batch=RECONCILE_BATCH, store=None):
+    """スナップショットに載っている銘柄のうち、確認が古いものから batch 件ずつ照合する"""
+    store = store or get_cycle_store()
+    targets = {
+        ex: store.stalest(ex, symbols, batch)
+        for ex, symbols in symbols_by_exchange(raw).items()
+    }
+
+    async def _all():
+        names = [ex for ex, syms in targets.items() if syms]
+        results = await asyncio.gather(*(fetch_intervals(ex, targets[ex]) for ex in names))
+        return dict(zip(names, results))
+
+    return {ex: _apply(store, ex, results) for ex, results in run(_all()).items()}
+
+
+class ReconcileWorker(threading.Thread):
+    """
+    バックグラウンドの照合スレッド（snapshot_collector から使う）
+    update_symbols() で最新のスナップショットを渡すと、interval_s ごとに照合する
+    """
+
+    def __init__(self, interval_s=RECONCILE_INTERVAL_S, batch=RECONCILE_BATCH, store=None):
+        super().__init__(daemon=True, name="cycle-reconciler")
+        self.interval_s = interval_s
+        self.batch = batch
+        self.store = store
+        self._raw = None
+        self._stop_event = threading.Event()
+
+    def update_symbols(self, raw):
+        self._raw = raw
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            raw = self._raw
+            if raw:
+                try:
+                    reconcile_stalest(raw, self.batch, self.store)
+                except Exception as e:
+                    print(f"[ERROR] サイクル照合エラー: {e}")
+            self._stop_event.wait(self.interval_s if raw else 1.0)
@@ -0,0 +1,217 @@
+# modules/cycle_store.py
+"""
+金利サイクル（1h/4h/8h）のマスター（SQLite / 取引所×銘柄キー）
+
+- 取引所ごとの銘柄サイクルを1つのストアで持つ（MEXC / Bitget / BingX）
+- 更新は1トランザクション単位（途中で落ちても半端な状態にならない）
+- 変更履歴は cycle_changes テーブルに追記
+- 初回だけ、手作業で作った日付入り CSV（*_true_catalog_*.csv など）から取り込む
+"""
+
+import csv
+import glob
+import os
+import sqlite3
+from datetime import datetime
+
+CYCLE_DB = "cycle_master.sqlite3"
+
+# 初回取り込み用の旧CSV（Symbol, Interval 列）
+LEGACY_SOURCES = {
+    "MEXC": ["mexc_cycle_master.csv", "mexc_true_catalog.csv"],
+    "Bitget": ["bitget_true_catalog_*.csv"],
+    "BingX": ["bingx_true_catalog_*.csv"],
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycles (
+    exchange TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    checked_at TEXT,
+    source TEXT NOT NULL,
+    PRIMARY KEY (exchange, symbol)
+);
+CREATE TABLE IF NOT EXISTS cycle_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    changed_at TEXT NOT NULL,
+    exchange TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    old_interval TEXT,
+    new_interval TEXT NOT NULL,
+    reason TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _now_str():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def base_symbol(sym):
+    """'BTC-USDT' / 'BTCUSDT' / 'BTC_USDT' → 'BTC'"""
+    sym = str(sym)
+    for suffix in ("-USDT", "_USDT"):
+        if sym.endswith(suffix):
+            return sym[:-len(suffix)]
+    if sym.endswith("USDT") and len(sym) > 4:
+        return sym[:-4]
+    return sym
+
+
+def _normalize_interval(value):
+    value = str(value).strip()
+    if not value:
+        return None
+    return value if value.endswith("h") else value + "h"
+
+
+class CycleStore:
+    """取引所×銘柄 → サイクル のキー付きストア"""
+
+    def __init__(self, path=CYCLE_DB, seed=True):
+        self.path = os.path.abspath(path)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        if seed and self.revision() == 0:
+            self.seed_from_legacy()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _bump_revision(self, conn):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def revision(self):
+        """変更のたびに増える番号（キャッシュの無効化キー）"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else 0
+
+    def load(self, exchange=None):
+        """{取引所: {銘柄: '4h'}}（exchange 指定時はその取引所の {銘柄: '4h'}）"""
+        conn = self._connect()
+        try:
+            if exchange is None:
+                rows = conn.execute("SELECT exchange, symbol, interval FROM cycles").fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT exchange, symbol, interval FROM cycles WHERE exchange = ?", (exchange,)
+                ).fetchall()
+        finally:
+            conn.close()
+        out = {}
+        for ex, sym, interval in rows:
+            out.setdefault(ex, {})[sym] = interval
+        return out if exchange is None else out.get(exchange, {})
+
+    def stalest(self, exchange, symbols, limit):
+        """symbols のうち確認が古い順（未確認が先頭）に limit 件"""
+        symbols = list(dict.fromkeys(symbols))
+        conn = self._connect()
+        try:
+            checked = dict(conn.execute(
+                "SELECT symbol, checked_at FROM cycles WHERE exchange = ?", (exchange,)
+            ).fetchall())
+        finally:
+            conn.close()
+        symbols.sort(key=lambda s: checked.get(s) or "")
+        return symbols[:limit]
+
+    def apply(self, exchange, results, source="auto", reason=None):
+        """
+        取得結果 {銘柄: '4h' / None（取得失敗）} を反映する（1トランザクション）
+        戻り値: 変更のリスト [(銘柄, 旧サイクル or None, 新サイクル)]
+        """
+        now = _now_str()
+        changes = []
+        conn = self._connect()
+        try:
+            with conn:
+                current = dict(conn.execute(
+                    "SELECT symbol, interval FROM cycles WHERE exchange = ?", (exchange,)
+                ).fetchall())
+                for sym, interval in results.items():
+                    if interval is None:
+                        continue
+                    old = current.get(sym)
+                    if old == interval:
+                        conn.execute(
+                            "UPDATE cycles SET checked_at = ? WHERE exchange = ? AND symbol = ?",
+                            (now, exchange, sym),
+                        )
+                        continue
+                    conn.execute(
+                        "INSERT INTO cycles (exchange, symbol, interval, updated_at, checked_at, source) "
+                        "VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(exchange, symbol) DO UPDATE SET "
+                        "interval = excluded.interval, updated_at = excluded.updated_at, "
+                        "checked_at = excluded.checked_at, source = excluded.source",
+                        (exchange, sym, interval, now, now, source),
+                    )
+                    conn.execute(
+                        "INSERT INTO cycle_changes (changed_at, exchange, symbol, old_interval, new_interval, reason) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (now, exchange, sym, old, interval, reason or ("CHANGED" if old else "NEW")),
+                    )
+                    changes.append((sym, old, interval))
+                if changes:
+                    self._bump_revision(conn)
+        finally:
+            conn.close()
+        return changes
+
+    def seed_from_legacy(self, base_dir="."):
+        """旧CSVから初期値を取り込む（各取引所で最新のファイルだけ）"""
+        total = 0
+        for exchange, patterns in LEGACY_SOURCES.items():
+            path = None
+            for pattern in patterns:
+                files = glob.glob(os.path.join(base_dir, pattern))
+                if files:
+                    path = max(files, key=os.path.getctime)
+                    break
+            if path is None:
+                continue
+            results = {}
+            try:
+                with open(path, "r", encoding="utf-8-sig") as f:
+                    for row in csv.DictReader(f):
+                        sym, interval = row.get("Symbol"), _normalize_interval(row.get("Interval", ""))
+                        if sym and interval:
+                            results[base_symbol(sym)] = interval
+            except Exception as e:
+                print(f"[DEBUG] サイクル旧CSV読み込みエラー ({path}): {e}")
+                continue
+            changes = self.apply(exchange, results, source="legacy_csv", reason="SEED")
+            total += len(changes)
+            print(f"[INFO] サイクルマスター初期化: {exchange} ← {os.path.basename(path)} ({len(changes)}銘柄)")
+        if total == 0:
+            # 取り込むものがなくても初期化済みにする
+            with self._connect() as conn:
+                self._bump_revision(conn)
+        return total
+
+
+_store = None
+
+
+def get_cycle_store(path=CYCLE_DB):
+    """プロセス内で共有するストア"""
+    global _store
+    if _store is None or _store.path != os.path.abspath(path):
+        _store = CycleStore(path)
+    return _store
@@ -4,196 +4,63 @@ API取得関連の関数をまとめたモジュール（診断用ログ追加
 """
 
 import streamlit as st
-import pandas as pd
-import requests
-import os
 import time  # 追加
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import glob
-import csv
+import asyncio
+from datetime import datetime
 
-# --- [MEXC専用] ---
-MEXC_CYCLE_FILE = "mexc_cycle_master.csv"
-MEXC_LOG_FILE = "mexc_cycle_changes.log.csv"
+from modules.cycle_reconciler import reconcile
+from modules.cycle_store import get_cycle_store
+from modules.exchange_clients import get_cached, invalidate, run as run_async
+from modules.settlement_calendar import cycle_for_seconds, get_calendar, interval_to_seconds
 
-def collect_cycle_to_interval(cc):
-    try:
-        cc = int(float(cc))
-    except:
-        return None
-    if cc in (1, 4, 8):
-        return f"{cc}h"
-    return f"{cc}h"
-
-@st.cache_data(ttl=300)
-def fetch_mexc_funding_meta(symbol_usdt: str):
-    url = f"https://contract.mexc.com/api/v1/contract/funding_rate/{symbol_usdt}"
-    try:
-        return requests.get(url, timeout=5).json()
-    except:
-        return {}
-
-def save_mexc_cycle_master(cycle_dict):
-    df = pd.DataFrame([
-        {"Symbol": k, "Interval": v, "UpdatedAtJST": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "Source": "auto"}
-        for k, v in sorted(cycle_dict.items())
-    ])
-    df.to_csv(MEXC_CYCLE_FILE, index=False, encoding="utf-8-sig")
-
-def append_mexc_change_log(symbol, old_interval, new_interval, reason, meta_collect=None, meta_nft=None, meta_ts=None):
-    row = {
-        "ChangedAtJST": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Symbol": symbol,
-        "OldInterval": old_interval if old_interval else "NEW",
-        "NewInterval": new_interval,
-        "Reason": reason,
-        "MetaCollectCycle": meta_collect,
-        "MetaNextSettleTime": meta_nft,
-        "MetaTimestamp": meta_ts,
-    }
-    df = pd.DataFrame([row])
-    header = not os.path.exists(MEXC_LOG_FILE)
-    df.to_csv(MEXC_LOG_FILE, mode="a", index=False, header=header, encoding="utf-8-sig")
+# --- [サイクルマスター] ---
+# 銘柄ごとのサイクルは cycle_store（SQLite）に一本化し、cycle_reconciler が取引所APIと照合して更新する
+# （旧CSVは初回の取り込みにだけ使う）
+@st.cache_data
+def _load_cycles(revision):
+    return get_cycle_store().load()
 
-def verify_and_update_mexc_cycles(displayed_symbols, current_cycles):
-    # (省略してもよいですが、念のため維持)
-    updated = False
-    new_cycles = current_cycles.copy()
-    for sym in displayed_symbols:
-        sym_usdt = f"{sym}_USDT"
-        meta = fetch_mexc_funding_meta(sym_usdt)
-        dmeta = meta.get("data", {}) if isinstance(meta, dict) else {}
-        cc = dmeta.get("collectCycle")
-        nft = dmeta.get("nextSettleTime")
-        ts = dmeta.get("timestamp")
-        if cc is None: continue
-        new_interval = collect_cycle_to_interval(cc)
-        if new_interval is None: continue
-        old_interval = current_cycles.get(sym)
-        if old_interval is None:
-            new_cycles[sym] = new_interval
-            append_mexc_change_log(sym, None, new_interval, "NEW", cc, nft, ts)
-            updated = True
-        elif old_interval != new_interval:
-            new_cycles[sym] = new_interval
-            append_mexc_change_log(sym, old_interval, new_interval, "CHANGED", cc, nft, ts)
-            updated = True
-    if updated:
-        save_mexc_cycle_master(new_cycles)
-    return new_cycles
+def load_cycle_masters():
+    """{"Bitget": {銘柄: '1h'}, "MEXC": {銘柄: '4h'}}（ストアの更新番号が変わったときだけ読み直す）"""
+    cycles = _load_cycles(get_cycle_store().revision())
+    return {"Bitget": cycles.get("Bitget", {}), "MEXC": cycles.get("MEXC", {})}
 
-# --- [BingX専用] ---
 @st.cache_data
+def _load_bingx_catalog(revision):
+    cycles = _load_cycles(revision).get("BingX", {})
+    return {f"{sym}-USDT": interval_to_seconds(iv) for sym, iv in cycles.items() if interval_to_seconds(iv)}
+
 def load_bingx_catalog():
-    bingx_catalog = {}
-    try:
-        files = glob.glob("bingx_true_catalog_*.csv")
-        if files:
-            latest_file = max(files, key=os.path.getctime)
-            with open(latest_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    sym = row.get('Symbol')
-                    interval_str = row.get('Interval', '').replace('h', '')
-                    if sym and interval_str.isdigit():
-                        interval_seconds = int(interval_str) * 3600
-                        bingx_catalog[sym] = interval_seconds
-    except Exception as e:
-        pass
-    return bingx_catalog
+    """{"BTC-USDT": 秒}（BingX の parse 用）"""
+    return _load_bingx_catalog(get_cycle_store().revision())
 
-# --- [共通] ---
-@st.cache_data
-def load_cycle_masters():
-    cycles = {"Bitget": {}, "MEXC": {}}
-    bg_file = "bitget_true_catalog_0131_0704.csv"
-    if os.path.exists(bg_file):
-        try:
-            df = pd.read_csv(bg_file, encoding="utf-8-sig")
-            if 'Symbol' in df.columns and 'Interval' in df.columns:
-                symbols = df['Symbol'].astype(str).str.replace("-USDT", "", regex=False)
-                cycles["Bitget"] = dict(zip(symbols, df['Interval'].astype(str)))
-        except: pass
-
-    mx_file = MEXC_CYCLE_FILE if os.path.exists(MEXC_CYCLE_FILE) else "mexc_true_catalog.csv"
-    if os.path.exists(mx_file):
-        try:
-            df = pd.read_csv(mx_file, encoding="utf-8-sig")
-            if 'Symbol' in df.columns and 'Interval' in df.columns:
-                intervals = df['Interval'].astype(str)
-                intervals = intervals.apply(lambda x: x if x.endswith("h") else x + "h")
-                cycles["MEXC"] = dict(zip(df['Symbol'], intervals))
-        except: pass
-    return cycles
-
-def interval_to_seconds(interval: str) -> int:
-    if interval == "1h": return 3600
-    if interval == "4h": return 14400
-    if interval == "8h": return 28800
-    return 0
-
-def interval_to_sched_hours(interval: str):
-    if interval == "1h": return list(range(24))
-    if interval == "4h": return [1, 5, 9, 13, 17, 21]
-    return [1, 9, 17]
+def verify_and_update_mexc_cycles(displayed_symbols, current_cycles):
+    """表示中の MEXC 銘柄をAPIと照合し、更新後のサイクル表を返す"""
+    reconcile("MEXC", displayed_symbols)
+    stored = get_cycle_store().load("MEXC")
+    new_cycles = current_cycles.copy()
+    new_cycles.update({sym: stored[sym] for sym in displayed_symbols if sym in stored})
+    return new_cycles
 
+# 配布スケジュールは settlement_calendar に一本化（以下は互換用の薄いラッパー）
 def calc_next_settle_epoch_from_sched(sched_hours, now_dt_jst: datetime) -> int:
-    now_dt = now_dt_jst
-    candidates = []
-    for h in sched_hours:
-        candidates.append(now_dt.replace(hour=h, minute=0, second=0, microsecond=0))
-    future = [c for c in candidates if c > now_dt]
-    if future:
-        nxt = min(future)
-    else:
-        base = (now_dt + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
-        nxt = base.replace(hour=min(sched_hours))
-    return int(nxt.timestamp())
+    return get_calendar(now_dt_jst).next_epoch_for_hours(sched_hours)
 
 def normalize_time(time_input, exchange_name, cycle_hint=None):
-    now_h = (datetime.now().hour)
-    sched = [1, 9, 17]
-    if exchange_name == "BingX":
-        sched = [1, 5, 9, 13, 17, 21]
-    if cycle_hint:
-        if cycle_hint == '1h': sched = list(range(24))
-        elif cycle_hint == '4h': sched = [1, 5, 9, 13, 17, 21]
-        elif cycle_hint == '8h': sched = [1, 9, 17]
-    def get_fallback():
-        return next((h for h in sched if h > now_h), sched[0])
-    try:
-        if not time_input or time_input == 0: return get_fallback()
-        if isinstance(time_input, (int, float)):
-            if time_input < 1000000: return get_fallback()
-            dt = pd.to_datetime(time_input, unit='ms')
-        else:
-            dt = pd.to_datetime(time_input)
-        jst_dt = dt + timedelta(hours=9)
-        hour = jst_dt.hour
-        if exchange_name == "MEXC" and not cycle_hint: 
-             mexc_sched = [1, 9, 17]
-             return int(min(mexc_sched, key=lambda x: abs(x - hour)))
-        return int(hour)
-    except Exception:
-        return get_fallback()
-
-# --- [各取引所のデータ取得] ---
+    return get_calendar().normalize_time(time_input, exchange_name, cycle_hint)
 
-def fetch_mexc_data(cycle_masters, now_dt):
-    """MEXC専用データ取得"""
-    t_start = time.time()
-    print("[DEBUG] MEXC: 開始")
+# --- [各取引所のレスポンス解析] ---
+# payloads は exchange_clients.ENDPOINTS のエンドポイント名 → JSON
+
+def parse_mexc_data(payloads, cycle_masters, now_dt):
+    """MEXC のレスポンスを解析"""
     data = {}
     status = "🔴"
-    ua = "Mozilla/5.0"
-    
+
     try:
-        # Timeoutを短縮 2s -> 3s (安定のため)
-        r = requests.get("https://api.mexc.com/api/v1/contract/ticker", 
-                         headers={"User-Agent": ua}, 
-                         timeout=3).json()
-        
+        r = payloads["ticker"]
+        cal = get_calendar(now_dt)
+
         if r.get('success'):
             d = r.get("data")
             if isinstance(d, list): items = d
@@ -219,11 +86,8 @@ def fetch_mexc_data(cycle_masters, now_dt):
                 except:
                     remaining_s = 0
                 if remaining_s <= 0:
-                    now_epoch = int(now_dt.timestamp())
-                    sched_h = interval_to_sched_hours(hint)
-                    next_epoch = calc_next_settle_epoch_from_sched(sched_h, now_dt)
-                    remaining_s = max(0, next_epoch - now_epoch)
-                t_val = normalize_time(next_time, "MEXC", cycle_hint=hint)
+                    remaining_s = cal.remaining_s(hint, now_dt)
+                t_val = cal.normalize_time(next_time, "MEXC", cycle_hint=hint)
                 data.setdefault(sym, {})['MEXC'] = {
                     'rate': float(fr) * 100,
                     'p': float(lp) if lp is not None else 0.0,
@@ -237,29 +101,24 @@ def fetch_mexc_data(cycle_masters, now_dt):
     except Exception as e:
         print(f"[DEBUG] MEXC エラー: {e}")
         pass
-    
-    print(f"[DEBUG] MEXC: 完了 ({time.time() - t_start:.2f}秒)")
+
     return data, status
 
-def fetch_bitget_data(cycle_masters, now_dt):
-    """Bitget専用データ取得"""
-    t_start = time.time()
-    print("[DEBUG] Bitget: 開始")
+def parse_bitget_data(payloads, cycle_masters, now_dt):
+    """Bitget のレスポンスを解析"""
     data = {}
     status = "🔴"
-    
+
     try:
-        # Timeoutを短縮 5s -> 3s
-        bg_r = requests.get("https://api.bitget.com/api/v2/mix/market/tickers?productType=usdt-futures", timeout=3).json()
+        bg_r = payloads["tickers"]
+        cal = get_calendar(now_dt)
         if bg_r.get('code') == '00000':
             for i in bg_r['data']:
                 sym = i['symbol'].replace('USDT', '')
                 hint = cycle_masters["Bitget"].get(sym, "4h")
-                sched_h = interval_to_sched_hours(hint)
-                next_epoch = calc_next_settle_epoch_from_sched(sched_h, now_dt)
-                remaining_s = max(0, next_epoch - int(now_dt.timestamp()))
+                remaining_s = cal.remaining_s(hint, now_dt)
                 interval_s = interval_to_seconds(hint)
-                t_val = normalize_time(0, "Bitget", cycle_hint=hint)
+                t_val = cal.next_hour("Bitget", cycle_hint=hint)
                 data.setdefault(sym, {})['Bitget'] = {
                     'rate': float(i['fundingRate']) * 100,
                     'p': float(i['lastPr']),
@@ -273,91 +132,20 @@ def fetch_bitget_data(cycle_masters, now_dt):
     except Exception as e:
         print(f"[DEBUG] Bitget エラー: {e}")
         pass
-    
-    print(f"[DEBUG] Bitget: 完了 ({time.time() - t_start:.2f}秒)")
-    return data, status
 
-# --- [BingX専用] キャッシュ強化版 ---
-@st.cache_data(ttl=300, show_spinner=False)  # 5分間キャッシュ
-def fetch_bingx_data_cached(now_ts_key):
-    """
-    BingXのデータ取得（5分間キャッシュ）
-    now_ts_key: 5分単位のタイムスタンプ（キャッシュキー用）
-    """
-    print(f"[DEBUG] BingX: キャッシュ miss - 新規取得開始")
-    now_dt = datetime.now()  # 実際の現在時刻を使用
-    data, status = fetch_bingx_data_internal(now_dt)
-    print(f"[DEBUG] BingX: 取得完了 status={status}, データ件数={len(data)}")
-    return data, status
-
-
-# --- [BingX専用] Session State キャッシュ版 ---
-def fetch_bingx_data_with_cache(now_dt):
-    """
-    BingXのデータ取得（Session Stateでキャッシュ）
-    5分間キャッシュを保持
-    """
-    import streamlit as st
-    
-    # 5分単位のキャッシュキー
-    now_ts = int(now_dt.timestamp())
-    cache_key_5min = (now_ts // 300) * 300
-    
-    # Session Stateの初期化
-    if 'bingx_cache' not in st.session_state:
-        st.session_state.bingx_cache = {
-            'data': {},
-            'status': '🔴',
-            'cache_key': 0
-        }
-    
-    # キャッシュが有効ならそれを返す
-    if st.session_state.bingx_cache['cache_key'] == cache_key_5min:
-        print(f"[DEBUG] BingX: キャッシュ hit - 前回データを使用")
-        return st.session_state.bingx_cache['data'], st.session_state.bingx_cache['status']
-    
-    # キャッシュが無効なら新規取得
-    print(f"[DEBUG] BingX: キャッシュ miss - 新規取得開始（前回キー:{st.session_state.bingx_cache['cache_key']}, 今回キー:{cache_key_5min}）")
-    data, status = fetch_bingx_data_internal(now_dt)
-    
-    # キャッシュに保存
-    st.session_state.bingx_cache = {
-        'data': data,
-        'status': status,
-        'cache_key': cache_key_5min
-    }
-    
-    print(f"[DEBUG] BingX: 取得完了 status={status}, データ件数={len(data)}")
     return data, status
 
-
-def fetch_bingx_data_internal(now_dt):
-    """BingX専用データ取得（内部関数）"""
-    t_start = time.time()
-    print("[DEBUG] BingX: 開始")
+def parse_bingx_data(payloads, cycle_masters, now_dt):
+    """BingX のレスポンス（ticker + premiumIndex）を解析"""
     data = {}
     status = "🔴"
-    
-    # タイムアウト設定
-    TIMEOUT_SET = (3.0, 6.0)  # 接続3秒, 読み込み6秒
-    
+
     try:
         bingx_catalog = load_bingx_catalog()
-        
-        # 1. Ticker取得
-        print("[DEBUG] BingX: Ticker取得中...")
-        bx_t = requests.get(
-            "https://open-api.bingx.com/openApi/swap/v2/quote/ticker", 
-            timeout=TIMEOUT_SET
-        ).json()
-        
-        # 2. PremiumIndex取得
-        print("[DEBUG] BingX: PremiumIndex取得中...")
-        bx_r = requests.get(
-            "https://open-api.bingx.com/openApi/swap/v2/quote/premiumIndex", 
-            timeout=TIMEOUT_SET
-        ).json()
-        
+        bx_t = payloads["ticker"]
+        bx_r = payloads["premiumIndex"]
+        cal = get_calendar(now_dt)
+
         print(f"[DEBUG] BingX: API応答確認 - ticker data count: {len(bx_t.get('data', []))}, premium data count: {len(bx_r.get('data', []))}")
         
         # ボラティリティのマッピング作成
@@ -400,16 +188,9 @@ def fetch_bingx_data_internal(now_dt):
                 next_epoch = int(next_time / 1000)
                 remaining_s = max(0, next_epoch - int(now_dt.timestamp()))
             else:
-                if interval_s == 3600:
-                    sched_h = list(range(24))
-                elif interval_s == 14400:
-                    sched_h = [1, 5, 9, 13, 17, 21]
-                else:
-                    sched_h = [1, 9, 17]
-                next_epoch_base = calc_next_settle_epoch_from_sched(sched_h, now_dt)
-                remaining_s = max(0, next_epoch_base - int(now_dt.timestamp()))
+                remaining_s = cal.remaining_s(cycle_for_seconds(interval_s), now_dt)
             
-            t_val = normalize_time(next_time, "BingX")
+            t_val = cal.normalize_time(next_time, "BingX")
             
             data.setdefault(sym, {})['BingX'] = {
                 'rate': float(i['lastFundingRate']) * 100,
@@ -429,24 +210,16 @@ def fetch_bingx_data_internal(now_dt):
         print(f"[DEBUG] BingX エラー: {e}")
         import traceback
         traceback.print_exc()
-    
-    print(f"[DEBUG] BingX: 完了 ({time.time() - t_start:.2f}秒)")
-    return data, status
-
-
 
+    return data, status
 
-def fetch_variational_data(now_dt):
-    """Variational専用データ取得"""
-    t_start = time.time()
-    print("[DEBUG] Variational: 開始")
+def parse_variational_data(payloads, cycle_masters, now_dt):
+    """Variational のレスポンスを解析"""
     data = {}
     status = "🔴"
-    
+
     try:
-        v_url = "https://omni-client-api.prod.ap-northeast-1.variational.io/metadata/stats"
-        # Timeoutを短縮 8s -> 3s
-        v = requests.get(v_url, timeout=3).json()
+        v = payloads["stats"]
         listings = v.get("listings") or v.get("data") or []
         for it in listings:
             sym = it.get("ticker") or it.get("listing_name") or it.get("symbol") or it.get("name")
@@ -472,50 +245,117 @@ def fetch_variational_data(now_dt):
     except Exception as e:
         print(f"[DEBUG] Variational エラー: {e}")
         pass
-    
-    print(f"[DEBUG] Variational: 完了 ({time.time() - t_start:.2f}秒)")
+
+    return data, status
+
+PARSERS = {
+    "MEXC": parse_mexc_data,
+    "Bitget": parse_bitget_data,
+    "BingX": parse_bingx_data,
+    "Variational": parse_variational_data,
+}
+
+EXCHANGES = ["MEXC", "BingX", "Bitget", "Variational"]
+
+# --- [各取引所のデータ取得（非同期 / stale-while-revalidate キャッシュ経由）] ---
+# TTL は exchange_clients.EXCHANGE_TTLS / ENDPOINT_TTLS（BingX premiumIndex は5分）
+
+def _exchange_status(state, age_s=None, stale=True):
+    """status 辞書の1取引所ぶん: 状態・データの経過秒・TTL切れか"""
+    return {'state': state, 'age_s': age_s, 'stale': stale}
+
+async def fetch_exchange_async(exchange, cycle_masters, now_dt):
+    """1取引所ぶんをキャッシュ経由で取得して解析（失敗時は空データと🔴）"""
+    t_start = time.time()
+    print(f"[DEBUG] {exchange}: 開始")
+    try:
+        payloads, age_s, stale = await get_cached(exchange)
+    except Exception as e:
+        print(f"[DEBUG] {exchange} エラー: {e!r}")
+        data, status = {}, _exchange_status("🔴")
+    else:
+        data, state = PARSERS[exchange](payloads, cycle_masters, now_dt)
+        status = _exchange_status(state, round(age_s, 1), stale)
+    print(f"[DEBUG] {exchange}: 完了 ({time.time() - t_start:.2f}秒) {status}")
+    return data, status
+
+async def fetch_all_async(exchanges, cycle_masters, now_dt):
+    """複数取引所を並行取得する（{取引所: (data, status)}）"""
+    results = await asyncio.gather(*(fetch_exchange_async(ex, cycle_masters, now_dt) for ex in exchanges))
+    return dict(zip(exchanges, results))
+
+def fetch_mexc_data(cycle_masters, now_dt):
+    """MEXC専用データ取得"""
+    return run_async(fetch_exchange_async("MEXC", cycle_masters, now_dt))
+
+def fetch_bitget_data(cycle_masters, now_dt):
+    """Bitget専用データ取得"""
+    return run_async(fetch_exchange_async("Bitget", cycle_masters, now_dt))
+
+def fetch_bingx_data_internal(now_dt):
+    """BingX専用データ取得（内部関数）: ticker と premiumIndex は並行に取得する"""
+    return run_async(fetch_exchange_async("BingX", None, now_dt))
+
+def fetch_variational_data(now_dt):
+    """Variational専用データ取得"""
+    return run_async(fetch_exchange_async("Variational", None, now_dt))
+
+def invalidate_exchanges(exchanges=None):
+    """指定した取引所のキャッシュだけを無効化（None は全取引所）"""
+    for ex in (exchanges if exchanges is not None else EXCHANGES):
+        invalidate(ex)
+
+
+def collect_snapshot(cycle_masters, now_dt):
+    """
+    全取引所を取得してマージする（Streamlit 非依存: コレクタープロセスからも使う）
+    戻り値: (data, status)  status は {取引所: {'state', 'age_s', 'stale'}}
+    """
+    try:
+        results = run_async(fetch_all_async(EXCHANGES, cycle_masters, now_dt))
+    except Exception as e:
+        print(f"[ERROR] 非同期取得エラー: {e}")
+        import traceback
+        traceback.print_exc()
+        results = {}
+
+    return merge_results(results)
+
+
+def merge_results(results):
+    """取引所ごとの (data, status) を銘柄単位にマージする（戻り値: (data, status)）"""
+    data = {}
+    status = {ex: _exchange_status("🔴") for ex in EXCHANGES}
+
+    for exchange in EXCHANGES:
+        if exchange not in results:
+            continue
+        ex_data, ex_status = results[exchange]
+
+        # データをマージ
+        for sym, exs in ex_data.items():
+            if sym not in data:
+                data[sym] = {}
+            data[sym].update(exs)
+
+        status[exchange] = ex_status
+        print(f"[DEBUG] {exchange}: ステータス={ex_status}, データ件数={len(ex_data)}")
+
     return data, status
 
-@st.cache_data(ttl=60)
+
 def fetch_api_snapshot():
-    """全取引所のデータを並列取得"""
+    """
+    全取引所のデータを取得（コレクター未起動時のフォールバック）
+    期限切れの取引所は古い値をすぐ返して裏で再取得するので、遅い取引所が全体を止めない
+    """
     t_all_start = time.time()
     print(f"[INFO] 全API取得開始: {datetime.now().strftime('%H:%M:%S')}")
     
-    data = {}
-    status = {"MEXC": "🔴", "BingX": "🔴", "Bitget": "🔴", "Variational": "🔴"}
-    
     cycle_masters = load_cycle_masters()
     now_dt = datetime.now()
-    
-    # 4並列で実行（BingXだけSession Stateキャッシュを使う）
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {
-            executor.submit(fetch_mexc_data, cycle_masters, now_dt): "MEXC",
-            executor.submit(fetch_bitget_data, cycle_masters, now_dt): "Bitget",
-            executor.submit(fetch_bingx_data_with_cache, now_dt): "BingX",  # ← Session State版
-            executor.submit(fetch_variational_data, now_dt): "Variational"
-        }
-        
-        for future in as_completed(futures):
-            exchange = futures[future]
-            try:
-                ex_data, ex_status = future.result()
-                
-                # データをマージ
-                for sym, exs in ex_data.items():
-                    if sym not in data:
-                        data[sym] = {}
-                    data[sym].update(exs)
-                
-                status[exchange] = ex_status
-                print(f"[DEBUG] {exchange}: ステータス={ex_status}, データ件数={len(ex_data)}")
-                
-            except Exception as e:
-                print(f"[ERROR] {exchange} スレッドエラー: {e}")
-                import traceback
-                traceback.print_exc()
-                status[exchange] = "🔴"
+
+    data, status = collect_snapshot(cycle_masters, now_dt)
     
     print(f"[INFO] 全API取得完了: {time.time() - t_all_start:.2f}秒")
     print(f"[INFO] 最終データ: 銘柄数={len(data)}, ステータス={status}")
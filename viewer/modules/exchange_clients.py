@@ -0,0 +1,267 @@
+# modules/exchange_clients.py
+"""
+取引所APIの非同期取得レイヤー（aiohttp）
+
+- 取引所ごとに keep-alive の ClientSession を1つだけ持ち、使い回す（毎回のTLSハンドシェイクを省く）
+- セッションはバックグラウンドスレッドで常駐するイベントループ上に置く
+  （Streamlit の再実行をまたいでも接続が残る）
+- タイムアウトは取引所ごとに設定する
+- 同じ取引所の複数エンドポイント（BingX の ticker と premiumIndex）も並行に取得する
+- エンドポイントごとに TTL を持つ stale-while-revalidate キャッシュ
+  （期限切れでも古い値をすぐ返し、裏で再取得する / 明示的な無効化時だけ再取得を待つ）
+"""
+
+import asyncio
+import threading
+import time
+
+import aiohttp
+
+# --- エンドポイント ---
+ENDPOINTS = {
+    "MEXC": {
+        "ticker": "https://api.mexc.com/api/v1/contract/ticker",
+    },
+    "Bitget": {
+        "tickers": "https://api.bitget.com/api/v2/mix/market/tickers?productType=usdt-futures",
+    },
+    "BingX": {
+        "ticker": "https://open-api.bingx.com/openApi/swap/v2/quote/ticker",
+        "premiumIndex": "https://open-api.bingx.com/openApi/swap/v2/quote/premiumIndex",
+    },
+    "Variational": {
+        "stats": "https://omni-client-api.prod.ap-northeast-1.variational.io/metadata/stats",
+    },
+}
+
+# --- 取引所ごとのタイムアウト（接続秒, 全体秒） ---
+EXCHANGE_TIMEOUTS = {
+    "MEXC": (3.0, 3.0),
+    "Bitget": (3.0, 3.0),
+    "BingX": (3.0, 6.0),
+    "Variational": (3.0, 3.0),
+}
+DEFAULT_TIMEOUT = (3.0, 5.0)
+
+EXCHANGE_HEADERS = {
+    "MEXC": {"User-Agent": "Mozilla/5.0"},
+}
+
+# --- キャッシュ TTL（秒）: 取引所ごとの既定値と、エンドポイント単位の上書き ---
+EXCHANGE_TTLS = {
+    "MEXC": 60,
+    "Bitget": 60,
+    "BingX": 60,
+    "Variational": 60,
+}
+ENDPOINT_TTLS = {
+    ("BingX", "premiumIndex"): 300,  # BingX はレート制限が厳しいので5分
+}
+DEFAULT_TTL = 60
+
+# keep-alive 接続を保持する秒数
+KEEPALIVE_TIMEOUT = 60
+
+
+class ExchangeClient:
+    """1取引所ぶんの keep-alive HTTP クライアント"""
+
+    def __init__(self, name, endpoints=None, timeout=None, headers=None):
+        self.name = name
+        self.endpoints = dict(ENDPOINTS.get(name, {}) if endpoints is None else endpoints)
+        connect_s, total_s = timeout or EXCHANGE_TIMEOUTS.get(name, DEFAULT_TIMEOUT)
+        self.timeout = aiohttp.ClientTimeout(total=total_s, sock_connect=connect_s)
+        self.headers = headers if headers is not None else EXCHANGE_HEADERS.get(name, {})
+        self._session = None
+
+    def _get_session(self):
+        # セッションはイベントループ上で作る（作ったループでしか使えない）
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=8, keepalive_timeout=KEEPALIVE_TIMEOUT)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers=self.headers,
+            )
+        return self._session
+
+    async def get_json(self, endpoint):
+        """エンドポイント名（または URL）を GET して JSON を返す"""
+        url = self.endpoints.get(endpoint, endpoint)
+        async with self._get_session().get(url) as resp:
+            return await resp.json(content_type=None)
+
+    async def get_all(self):
+        """この取引所の全エンドポイントを並行取得する（{エンドポイント名: JSON}）"""
+        names = list(self.endpoints)
+        payloads = await asyncio.gather(*(self.get_json(n) for n in names))
+        return dict(zip(names, payloads))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+def endpoint_ttl(name, endpoint):
+    return ENDPOINT_TTLS.get((name, endpoint), EXCHANGE_TTLS.get(name, DEFAULT_TTL))
+
+
+class _CacheEntry:
+    __slots__ = ("value", "fetched_at", "task", "invalidated", "error")
+
+    def __init__(self):
+        self.value = None
+        self.fetched_at = None  # time.monotonic()（未取得なら None）
+        self.task = None        # 実行中の再取得タスク
+        self.invalidated = False
+        self.error = None
+
+
+def _consume_exception(task):
+    # 誰も await しなかった裏の再取得の例外で警告を出さない
+    if not task.cancelled():
+        task.exception()
+
+
+class SWRCache:
+    """
+    エンドポイント単位の stale-while-revalidate キャッシュ（常駐ループ上で使う）
+
+    - TTL 内: キャッシュをそのまま返す
+    - TTL 切れ: 古い値をすぐ返し、裏で再取得を1本だけ走らせる
+    - 未取得 / invalidate 後: 再取得を待つ（失敗したら古い値にフォールバック）
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def _entry(self, name, endpoint):
+        key = (name, endpoint)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = _CacheEntry()
+        return entry
+
+    async def _refresh(self, client, endpoint, entry):
+        try:
+            value = await client.get_json(endpoint)
+        except Exception as e:
+            entry.error = repr(e)
+            raise
+        entry.value = value
+        entry.fetched_at = time.monotonic()
+        entry.invalidated = False
+        entry.error = None
+        return value
+
+    def _start_refresh(self, client, endpoint, entry):
+        if entry.task is None or entry.task.done():
+            entry.task = asyncio.ensure_future(self._refresh(client, endpoint, entry))
+            entry.task.add_done_callback(_consume_exception)
+        return entry.task
+
+    async def get(self, client, endpoint):
+        """(JSON, 経過秒, TTL切れか) を返す。未取得で取得にも失敗したら例外"""
+        entry = self._entry(client.name, endpoint)
+        ttl = endpoint_ttl(client.name, endpoint)
+
+        if entry.fetched_at is None:
+            await asyncio.shield(self._start_refresh(client, endpoint, entry))
+        elif entry.invalidated:
+            try:
+                await asyncio.shield(self._start_refresh(client, endpoint, entry))
+            except Exception:
+                entry.invalidated = False  # 古い値で続行（以後は通常の TTL で再取得）
+        elif time.monotonic() - entry.fetched_at > ttl:
+            self._start_refresh(client, endpoint, entry)
+
+        age = time.monotonic() - entry.fetched_at
+        return entry.value, age, age > ttl
+
+    async def get_all(self, client):
+        """
+        取引所の全エンドポイントをキャッシュ経由で取得
+        戻り値: ({エンドポイント名: JSON}, 最も古いエンドポイントの経過秒, どれかがTTL切れか)
+        """
+        names = list(client.endpoints)
+        results = await asyncio.gather(*(self.get(client, n) for n in names))
+        payloads = {n: r[0] for n, r in zip(names, results)}
+        age = max((r[1] for r in results), default=0.0)
+        stale = any(r[2] for r in results)
+        return payloads, age, stale
+
+    def invalidate(self, name=None, endpoint=None):
+        """指定した取引所（/エンドポイント）だけを無効化する。None は全件"""
+        for (ex, ep), entry in list(self.entries.items()):
+            if (name is None or ex == name) and (endpoint is None or ep == endpoint):
+                entry.invalidated = True
+
+
+class _LoopThread:
+    """常駐イベントループ（デーモンスレッド）"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="exchange-clients", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+
+_loop_thread = None
+_clients = {}
+_cache = SWRCache()
+_lock = threading.Lock()
+
+
+def _get_loop():
+    global _loop_thread
+    with _lock:
+        if _loop_thread is None or not _loop_thread.thread.is_alive():
+            _loop_thread = _LoopThread()
+        return _loop_thread.loop
+
+
+def get_client(name):
+    """取引所名に対応する常駐クライアント（初回のみ作成）"""
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            client = ExchangeClient(name)
+            _clients[name] = client
+        return client
+
+
+async def get_cached(name):
+    """キャッシュ経由で取引所の全エンドポイントを取得（常駐ループ上で await する）"""
+    return await _cache.get_all(get_client(name))
+
+
+def invalidate(name=None, endpoint=None):
+    """キャッシュの狙い撃ち無効化（次回の取得で再取得を待つ）"""
+    _cache.invalidate(name, endpoint)
+
+
+def run(coro, timeout=None):
+    """常駐ループでコルーチンを実行し、結果を待つ（同期コードからの入口）"""
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    return future.result(timeout)
+
+
+def close_all():
+    """全クライアントの接続を閉じる（テストや終了処理用）"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    if clients and _loop_thread is not None:
+        async def _close():
+            await asyncio.gather(*(c.close() for c in clients))
+        run(_close())
+
+
+def clear_cache():
+    """キャッシュを空にする（テスト・ベンチマーク用: 次回の取得は必ず再取得を待つ）"""
+    global _cache
+    _cache = SWRCache()
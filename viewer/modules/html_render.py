@@ -0,0 +1,79 @@
+# modules/html_render.py
+"""
+テーブルHTMLの組み立て（行フラグメントのキャッシュ）
+
+- 行のうちデータだけで決まる部分（銘柄・取引所・金利・時刻のセル）は行キーでキャッシュ
+- 証拠金・レバレッジで変わる金額セルだけを作り直す
+- 行・テーブルとも文字列の連結はせず、最後に1回の join で組み立てる
+- 入力が同じなら完成したテーブルHTMLをそのまま返す
+"""
+
+from collections import OrderedDict
+
+
+class _LRU:
+    """上限付きの小さな LRU（プロセス内で全セッション共有）"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get_or_build(self, key, build):
+        try:
+            value = self._data[key]
+            self._data.move_to_end(key)
+            return value
+        except KeyError:
+            pass
+        value = build()
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._data.clear()
+
+
+_row_cache = _LRU(8192)
+_table_cache = _LRU(64)
+
+
+def lev_cells(rate, risks, margin, levs):
+    """レバレッジ別の金額セル（rate は % 表記の実質金利）: 証拠金・レバレッジが変わったときに作り直す部分"""
+    return "".join([
+        "<td style='color:#94a3b8;font-size:0.8em'>MAX</td>" if risk == "MAX"
+        else f"<td><span class='lev-amount'>${margin * lev * (rate / 100):.1f}</span><br>{risk}</td>"
+        for lev, risk in zip(levs, risks)
+    ])
+
+
+def table_html(header, rows, row_key, row_body, rate_field, risk_field, margin, levs, numbered=False):
+    """
+    テーブル全体のHTML
+
+    Args:
+        header: <thead> のHTML
+        rows: 行データ（dict）のリスト
+        row_key: 行 → キャッシュキー（行の表示内容を決める値のタプル）
+        row_body: 行 → 金額セル以外の <td> 群（順位セルは含めない）
+        rate_field, risk_field: 金額セルに使う実質金利とリスク判定のキー
+        numbered: 先頭に順位セルを付ける（単体金利版）
+    """
+    keys = [row_key(r) for r in rows]
+    # 金額セルは行キーに含まれない実質金利・リスク判定（戦術・ボラで変わる）でも変わる
+    lev_keys = tuple((r[rate_field], tuple(r[risk_field])) for r in rows)
+    table_key = (header, tuple(keys), lev_keys, margin, tuple(levs), numbered)
+
+    def build():
+        parts = ["<table class='report-table'>", header, "<tbody>"]
+        for rank, (key, r) in enumerate(zip(keys, rows), 1):
+            parts.append("<tr>")
+            if numbered:
+                parts.append(f"<td><strong>{rank}</strong></td>")
+            parts.append(_row_cache.get_or_build(key, lambda: row_body(r)))
+            parts.append(lev_cells(r[rate_field], r[risk_field], margin, levs))
+            parts.append("</tr>")
+        parts.append("</tbody></table>")
+        return "".join(parts)
+    return _table_cache.get_or_build(table_key, build)
@@ -7,6 +7,8 @@
 
 import streamlit as st
 from modules.utils import calculate_risk_single, fmt_rem
+from modules.ranking import SingleRanker, get_ranker
+from modules.html_render import table_html
 
 
 def run_single_exchange_engine(raw, active_exs, levs, t_key):
@@ -42,6 +44,36 @@ def run_single_exchange_engine(raw, active_exs, levs, t_key):
     return exchange_data
 
 
+def _row_key(r):
+    return ("single", r['ticker'], r['rate'], r['remaining_s'], r['time'])
+
+
+def _row_body(r):
+    """1行ぶんのセル（順位セル・金額セルを除く）"""
+    rem_s = r.get('remaining_s', 0)
+    if rem_s > 0:
+        time_str = fmt_rem(rem_s)
+        if rem_s <= 1800:
+            time_display = f"<span style='background:#fee2e2;color:#dc2626;padding:3px 8px;border-radius:4px;font-weight:700;font-size:0.9em'>⚡{time_str}</span>"
+        elif rem_s <= 3600:
+            time_display = f"<span style='background:#fef3c7;color:#d97706;padding:3px 8px;border-radius:4px;font-weight:700;font-size:0.9em'>⏰{time_str}</span>"
+        else:
+            time_display = f"<span class='dist-time'>{time_str}</span>"
+    elif r['time'] > 0:
+        time_display = f"<span class='dist-time'>{int(r['time'])}:00 配布</span>"
+    else:
+        time_display = "<span class='dist-time'>不明</span>"
+    
+    rate_color = "#dc2626" if r['rate'] >= 0 else "#2563eb"
+    
+    return "".join([
+        f"<td><span class='ticker-text'>{r['ticker']}</span></td>",
+        f"<td><span class='rate-val' style='color:{rate_color}'>{r['rate']:.3f}%</span></td>",
+        f"<td><span style='font-weight:700;font-size:1.2em'>{r['position']}</span></td>",
+        f"<td>{time_display}</td>",
+    ])
+
+
 def render_single_mode(raw, active_exs, levs, t_key, margin):
     """単体金利版の表示"""
     sort_mode = st.radio(
@@ -51,57 +83,24 @@ def render_single_mode(raw, active_exs, levs, t_key, margin):
         key="single_sort_mode"
     )
     
-    exchange_data = run_single_exchange_engine(raw, active_exs, levs, t_key)
+    # 取引所ごとの上位を差分更新で保持（気配が変わった銘柄だけ再計算）
+    ranker = get_ranker(
+        st.session_state, "single",
+        lambda: SingleRanker(active_exs, levs, t_key),
+        active_exs, levs, t_key,
+    )
+    ranker.update(raw)
     
     tabs = st.tabs([f"🏦 {ex}" for ex in active_exs])
     
     for idx, ex_name in enumerate(active_exs):
         with tabs[idx]:
-            rows = exchange_data[ex_name]
-            
-            if sort_mode == "金利の高い順":
-                rows = sorted(rows, key=lambda x: x['abs_rate'], reverse=True)
-            else:
-                rows = sorted(rows, key=lambda x: x.get('remaining_s', 999999))
-            
-            rows = rows[:40]
+            rows = ranker.top(ex_name, 40, by="rate" if sort_mode == "金利の高い順" else "time")
             
             if len(rows) == 0:
                 st.info(f"{ex_name} に該当する銘柄がありません")
                 continue
             
             h = f"<thead><tr><th>順位</th><th>銘柄</th><th>金利率</th><th>方向</th><th>配布時刻</th>" + "".join([f"<th>{l}倍</th>" for l in levs]) + "</tr></thead>"
-            b = "<tbody>"
-            
-            for rank, r in enumerate(rows, 1):
-                l_cells = "".join(
-                    [f"<td style='color:#94a3b8;font-size:0.8em'>MAX</td>" if r['risks'][i] == "MAX"
-                     else f"<td><span class='lev-amount'>${margin * levs[i] * (r['abs_rate'] / 100):.1f}</span><br>{r['risks'][i]}</td>"
-                     for i in range(5)]
-                )
-                
-                rem_s = r.get('remaining_s', 0)
-                if rem_s > 0:
-                    time_str = fmt_rem(rem_s)
-                    if rem_s <= 1800:
-                        time_display = f"<span style='background:#fee2e2;color:#dc2626;padding:3px 8px;border-radius:4px;font-weight:700;font-size:0.9em'>⚡{time_str}</span>"
-                    elif rem_s <= 3600:
-                        time_display = f"<span style='background:#fef3c7;color:#d97706;padding:3px 8px;border-radius:4px;font-weight:700;font-size:0.9em'>⏰{time_str}</span>"
-                    else:
-                        time_display = f"<span class='dist-time'>{time_str}</span>"
-                elif r['time'] > 0:
-                    time_display = f"<span class='dist-time'>{int(r['time'])}:00 配布</span>"
-                else:
-                    time_display = "<span class='dist-time'>不明</span>"
-                
-                rate_color = "#dc2626" if r['rate'] >= 0 else "#2563eb"
-                
-                b += f"<tr><td><strong>{rank}</strong></td>" \
-                     f"<td><span class='ticker-text'>{r['ticker']}</span></td>" \
-                     f"<td><span class='rate-val' style='color:{rate_color}'>{r['rate']:.3f}%</span></td>" \
-                     f"<td><span style='font-weight:700;font-size:1.2em'>{r['position']}</span></td>" \
-                     f"<td>{time_display}</td>" \
-                     f"{l_cells}</tr>"
-            
-            b += "</tbody>"
-            st.markdown(f"<table class='report-table'>{h}{b}</table>", unsafe_allow_html=True)
+            html = table_html(h, rows, _row_key, _row_body, 'abs_rate', 'risks', margin, levs, numbered=True)
+            st.markdown(html, unsafe_allow_html=True)
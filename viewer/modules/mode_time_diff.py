@@ -6,75 +6,49 @@
 """
 
 import streamlit as st
-import pandas as pd
-from modules.utils import calculate_risk, fmt_rem
+from modules.utils import fmt_rem
+from modules.arb_engine import hedge_pairs
+from modules.ranking import PairRanker, get_ranker
+from modules.html_render import table_html
 
 
 def run_hedge_engine(raw, active_exs, levs, t_key):
-    """時間差ヘッジ版のエンジン"""
-    rows = []
+    """時間差ヘッジ版のエンジン（列指向: arb_engine.hedge_pairs）"""
+    return hedge_pairs(raw, active_exs, levs, t_key)
 
-    for ticker, exs in raw.items():
-        filtered = {k: v for k, v in exs.items() if k in active_exs}
-        if len(filtered) < 2: continue
-        it = list(filtered.items())
 
-        for i in range(len(it)):
-            for j in range(i + 1, len(it)):
-                cand_a = it[i]; cand_b = it[j]
-                dA = cand_a[1]; dB = cand_b[1]
+def _row_key(r):
+    return ("hedge", r['t'], r['ex1'], r['r1'], r['tp1'], r['rem1'], r['ex2'], r['r2'], r['tp2'], r['rem2'], r['df'], r['n'])
 
-                if ('remaining_s' not in dA) or ('remaining_s' not in dB): continue
-                if dA['remaining_s'] <= 0 or dB['remaining_s'] <= 0: continue
-                
-                cycle_same = (int(dA.get("interval_s", 0)) == int(dB.get("interval_s", 0)))
-                diff_s = abs(int(dA['remaining_s']) - int(dB['remaining_s']))
-                
-                if cycle_same and diff_s <= 120: continue
-                if not cycle_same and diff_s <= 30: continue
 
-                if dA['remaining_s'] < dB['remaining_s']:
-                    ex1, d1 = cand_a; ex2, d2 = cand_b
-                else:
-                    ex1, d1 = cand_b; ex2, d2 = cand_a
-
-                p1_type = "S" if d1['rate'] >= 0 else "L"
-                p2_type = "L" if p1_type == "S" else "S"
-                net = abs(d1['rate'])
-                diff = abs(d1['p'] - d2['p']) / d2['p'] * 100 if d2['p']!=0 else 0
-
-                rows.append({
-                    "t": ticker,
-                    "ex1": ex1, "r1": d1['rate'], "t1": d1.get('t', 0), "tp1": p1_type, "rem1": int(d1.get("remaining_s", 0)),
-                    "ex2": ex2, "r2": d2['rate'], "t2": d2.get('t', 0), "tp2": p2_type, "rem2": int(d2.get("remaining_s", 0)),
-                    "df": diff, "n": net - diff, "rk": calculate_risk(d1, d2, levs, t_key)
-                })
-    return pd.DataFrame(rows)
+def _row_body(r):
+    """1行ぶんのセル（金額セルを除く）"""
+    t1_str = fmt_rem(int(r.get("rem1", 0)))
+    t2_str = fmt_rem(int(r.get("rem2", 0)))
+    return "".join([
+        f"<td></td><td><span class='ticker-text'>{r['t']}</span></td>",
+        f"<td><span class='ex-label'>{r['ex1']} ({r['tp1']})</span><span class='rate-val'>{r['r1']:.3f}%</span><br><span class='dist-time'>{t1_str}</span></td>",
+        f"<td><span class='ex-label'>{r['ex2']} ({r['tp2']})</span><span class='rate-val'>{r['r2']:.3f}%</span><br><span class='dist-time'>{t2_str}</span></td>",
+        f"<td>{r['df']:.3f}%</td><td class='net-profit'>{r['n']:.3f}%</td>",
+    ])
 
 
 def render_time_diff_mode(raw, active_exs, levs, t_key, margin):
     """時間差ヘッジ版の表示"""
-    df = run_hedge_engine(raw, active_exs, levs, t_key)
+    # 銘柄別の最良ペアを差分更新で保持（気配が変わった銘柄だけ再計算）
+    ranker = get_ranker(
+        st.session_state, "hedge",
+        lambda: PairRanker("hedge", active_exs, levs, t_key),
+        active_exs, levs, t_key,
+    )
+    ranker.update(raw)
     col1_label, col2_label = "拠点側 (金利源)", "ヘッジ側 (価格固定用)"
     
-    if df is not None and not df.empty:
-        df = df.sort_values("n", ascending=False).drop_duplicates(subset=['t']).head(40)
+    if ranker.best:
+        rows = ranker.top("all", 40)
         
         h = f"<thead><tr><th>🔥</th><th>銘柄</th><th>{col1_label}</th><th>{col2_label}</th><th>価格乖離</th><th>実質</th>" + "".join([f"<th>{l}倍</th>" for l in levs]) + "</tr></thead>"
-        b = "<tbody>"
-        for _, r in df.iterrows():
-            l_cells = "".join(
-                [f"<td style='color:#94a3b8;font-size:0.8em'>MAX</td>" if r['rk'][i] == "MAX"
-                 else f"<td><span class='lev-amount'>${margin * levs[i] * (r['n'] / 100):.1f}</span><br>{r['rk'][i]}</td>"
-                 for i in range(5)]
-            )
-            t1_str = fmt_rem(int(r.get("rem1", 0)))
-            t2_str = fmt_rem(int(r.get("rem2", 0)))
-            
-            b += f"<tr><td></td><td><span class='ticker-text'>{r['t']}</span></td>" \
-                 f"<td><span class='ex-label'>{r['ex1']} ({r['tp1']})</span><span class='rate-val'>{r['r1']:.3f}%</span><br><span class='dist-time'>{t1_str}</span></td>" \
-                 f"<td><span class='ex-label'>{r['ex2']} ({r['tp2']})</span><span class='rate-val'>{r['r2']:.3f}%</span><br><span class='dist-time'>{t2_str}</span></td>" \
-                 f"<td>{r['df']:.3f}%</td><td class='net-profit'>{r['n']:.3f}%</td>{l_cells}</tr>"
-        st.markdown(f"<table class='report-table'>{h}{b}</tbody></table>", unsafe_allow_html=True)
+        html = table_html(h, rows, _row_key, _row_body, 'n', 'rk', margin, levs)
+        st.markdown(html, unsafe_allow_html=True)
     else:
         st.info("時間差ヘッジ版のロジックに適合する銘柄が現在ありません。")
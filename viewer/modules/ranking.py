@@ -0,0 +1,199 @@
+# modules/ranking.py
+"""
+差分更新のランキング（Top-K）
+
+- 銘柄ごとの「最良ペア」をヒープで持ち、スナップショット間で気配が変わった銘柄だけ再計算する
+- 上位K件はヒープから取り出すだけ（全銘柄の並べ替えはしない）
+- 同じ raw のまま再実行された場合（証拠金の変更など）は何も再計算しない
+"""
+
+import heapq
+import itertools
+
+from modules.arb_engine import CYCLES, best_per_ticker, hedge_pairs, simultaneous_pairs
+from modules.utils import calculate_risk_single
+
+# 気配の署名に使う項目（変わったら再計算）
+PAIR_SIG_FIELDS = ('rate', 'p', 'v', 'm', 't', 'interval_s')
+HEDGE_SIG_FIELDS = PAIR_SIG_FIELDS + ('remaining_s',)
+SINGLE_SIG_FIELDS = ('rate', 'p', 'v', 'm', 't', 'remaining_s')
+
+TABS = ("all",) + tuple(CYCLES)
+
+
+class TopKIndex:
+    """キー付きの遅延削除ヒープ（score の小さい順に上位を返す）"""
+
+    def __init__(self):
+        self._heap = []
+        self._live = {}  # key -> (score, seq)
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, key):
+        return key in self._live
+
+    def set(self, key, score):
+        entry = (score, next(self._seq), key)
+        self._live[key] = entry[:2]
+        heapq.heappush(self._heap, entry)
+        # 無効になったエントリが増えすぎたら作り直す
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._heap = [(s, q, k) for k, (s, q) in self._live.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, key):
+        self._live.pop(key, None)
+
+    def top(self, k):
+        """上位 k 件のキー（取り出した有効エントリは戻す）"""
+        out, kept = [], []
+        while self._heap and len(out) < k:
+            entry = heapq.heappop(self._heap)
+            score, seq, key = entry
+            if self._live.get(key) == (score, seq):
+                out.append(key)
+                kept.append(entry)
+        for entry in kept:
+            heapq.heappush(self._heap, entry)
+        return out
+
+
+def _signature(quotes, active_exs, fields):
+    return tuple(
+        (ex,) + tuple(quotes[ex].get(f) for f in fields)
+        for ex in active_exs if ex in quotes
+    )
+
+
+def _changed_tickers(raw, sigs, active_exs, fields):
+    """署名が変わった銘柄と、消えた銘柄を返す（sigs は更新される）"""
+    changed = {}
+    for ticker, quotes in raw.items():
+        sig = _signature(quotes, active_exs, fields)
+        if sigs.get(ticker) != sig:
+            sigs[ticker] = sig
+            changed[ticker] = quotes
+    removed = [t for t in sigs if t not in raw]
+    for t in removed:
+        del sigs[t]
+    return changed, removed
+
+
+class PairRanker:
+    """同時刻 / 時間差ヘッジの銘柄別最良ペアを差分更新で保持する"""
+
+    def __init__(self, mode, active_exs, levs, t_key):
+        self.engine = simultaneous_pairs if mode == "simultaneous" else hedge_pairs
+        self.fields = PAIR_SIG_FIELDS if mode == "simultaneous" else HEDGE_SIG_FIELDS
+        self.active_exs = list(active_exs)
+        self.levs = list(levs)
+        self.t_key = t_key
+        self.best = {}  # ticker -> 最良ペアの行（dict）
+        self.indexes = {tab: TopKIndex() for tab in TABS}
+        self._sigs = {}
+        self._raw = None
+
+    def _discard(self, ticker):
+        self.best.pop(ticker, None)
+        for index in self.indexes.values():
+            index.discard(ticker)
+
+    def update(self, raw):
+        """raw の差分だけ反映する（戻り値: 再計算した銘柄数）"""
+        if raw is self._raw:
+            return 0
+        self._raw = raw
+        changed, removed = _changed_tickers(raw, self._sigs, self.active_exs, self.fields)
+        for t in removed:
+            self._discard(t)
+        if not changed:
+            return 0
+
+        df = best_per_ticker(self.engine(changed, self.active_exs, self.levs, self.t_key))
+        rows = {} if df is None or df.empty else {r['t']: r for r in df.to_dict('records')}
+        for ticker in changed:
+            row = rows.get(ticker)
+            if row is None:
+                self._discard(ticker)
+                continue
+            self._discard(ticker)
+            self.best[ticker] = row
+            score = -row['n']
+            self.indexes["all"].set(ticker, score)
+            for label, sec in CYCLES.items():
+                if row['i1'] == sec and row['i2'] == sec:
+                    self.indexes[label].set(ticker, score)
+        return len(changed)
+
+    def top(self, tab="all", k=40):
+        """タブ（all / 1h / 4h / 8h）ごとの上位 k 件（実質の高い順）"""
+        return [self.best[t] for t in self.indexes[tab].top(k)]
+
+
+class SingleRanker:
+    """単体金利版: 取引所ごとに金利の絶対値 / 配布までの残り時間で上位を保持する"""
+
+    def __init__(self, active_exs, levs, t_key):
+        self.active_exs = list(active_exs)
+        self.levs = list(levs)
+        self.t_key = t_key
+        self.rows = {ex: {} for ex in self.active_exs}
+        self.by_rate = {ex: TopKIndex() for ex in self.active_exs}
+        self.by_time = {ex: TopKIndex() for ex in self.active_exs}
+        self._sigs = {}
+        self._raw = None
+
+    def _make_row(self, ticker, d):
+        rate = d.get('rate', 0)
+        return {
+            "ticker": ticker,
+            "rate": rate,
+            "abs_rate": abs(rate),
+            "position": "S" if rate >= 0 else "L",
+            "price": d.get('p', 0),
+            "volatility": d.get('v', 0),
+            "max_lev": d.get('m', 0),
+            "time": d.get('t', 0),
+            "remaining_s": d.get('remaining_s', 0),
+            "risks": calculate_risk_single(d, self.levs, self.t_key)
+        }
+
+    def update(self, raw):
+        if raw is self._raw:
+            return 0
+        self._raw = raw
+        changed, removed = _changed_tickers(raw, self._sigs, self.active_exs, SINGLE_SIG_FIELDS)
+        for ticker in list(changed) + removed:
+            quotes = changed.get(ticker, {})
+            for ex in self.active_exs:
+                if ex in quotes:
+                    row = self._make_row(ticker, quotes[ex])
+                    self.rows[ex][ticker] = row
+                    self.by_rate[ex].set(ticker, -row['abs_rate'])
+                    self.by_time[ex].set(ticker, row['remaining_s'])
+                else:
+                    self.rows[ex].pop(ticker, None)
+                    self.by_rate[ex].discard(ticker)
+                    self.by_time[ex].discard(ticker)
+        return len(changed)
+
+    def top(self, ex, k=40, by="rate"):
+        index = self.by_rate[ex] if by == "rate" else self.by_time[ex]
+        return [self.rows[ex][t] for t in index.top(k)]
+
+
+def get_ranker(store, name, factory, *config):
+    """
+    store（st.session_state など）にランキングを保持し、設定が変わったときだけ作り直す
+    config: 取引所・レバレッジ・戦術など、結果に影響する設定
+    """
+    key = f"ranker_{name}"
+    cached = store.get(key)
+    config = tuple(tuple(c) if isinstance(c, list) else c for c in config)
+    if cached is None or cached[0] != config:
+        cached = (config, factory())
+        store[key] = cached
+    return cached[1]
@@ -0,0 +1,187 @@
+# modules/rate_history.py
+"""
+金利の時系列ストア（日別 Parquet）
+
+- スナップショット（raw）を1行 = (時刻, 銘柄, 取引所) に展開して追記する
+- 保存先: funding_history/date=YYYY-MM-DD/part-*.parquet
+  （書き込みはバッファしてまとめて1ファイル、日付が変わったら前日分を1ファイルに圧縮）
+- 「銘柄×取引所ごとの直近N回の金利確定」を取引所の履歴APIなしで引ける
+"""
+
+import glob
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules.settlement_calendar import INTERVAL_SECONDS
+
+HISTORY_DIR = "funding_history"
+FLUSH_EVERY = 10        # 何スナップショットごとに書き出すか
+SETTLE_ROUND_S = 60     # 確定時刻は分単位に丸めて同一視する
+MAX_INTERVAL_S = max(INTERVAL_SECONDS.values())  # 最長の金利サイクル: 検索する日数の見積もりに使う
+
+# 保存する列（raw のキー → 列名）
+FIELDS = {
+    'rate': 'rate',
+    'p': 'price',
+    'v': 'volatility',
+    'interval_s': 'interval_s',
+    'remaining_s': 'remaining_s',
+}
+COLUMNS = ['ts', 'symbol', 'exchange', 'rate', 'price', 'volatility',
+           'interval_s', 'remaining_s', 'settle_epoch']
+
+
+def snapshot_to_frame(raw, ts=None):
+    """raw（{銘柄: {取引所: {...}}}）を1行1(銘柄, 取引所)の DataFrame に展開"""
+    ts = int(ts if ts is not None else time.time())
+    rows = {c: [] for c in COLUMNS}
+    for sym, exs in raw.items():
+        for ex, d in exs.items():
+            rows['symbol'].append(sym)
+            rows['exchange'].append(ex)
+            for key, col in FIELDS.items():
+                rows[col].append(d.get(key, np.nan))
+
+    df = pd.DataFrame({
+        'ts': np.full(len(rows['symbol']), ts, dtype=np.int64),
+        'symbol': rows['symbol'],
+        'exchange': rows['exchange'],
+        'rate': np.asarray(rows['rate'], dtype=np.float64),
+        'price': np.asarray(rows['price'], dtype=np.float64),
+        'volatility': np.asarray(rows['volatility'], dtype=np.float32),
+        'interval_s': np.nan_to_num(np.asarray(rows['interval_s'], dtype=np.float64)).astype(np.int32),
+        'remaining_s': np.nan_to_num(np.asarray(rows['remaining_s'], dtype=np.float64)).astype(np.int32),
+    })
+    # 次の確定時刻（この観測が効いてくる金利確定）
+    settle = df['ts'].to_numpy() + df['remaining_s'].to_numpy(dtype=np.int64)
+    df['settle_epoch'] = ((settle + SETTLE_ROUND_S // 2) // SETTLE_ROUND_S) * SETTLE_ROUND_S
+    for col in ('symbol', 'exchange'):
+        df[col] = df[col].astype('category')
+    return df[COLUMNS]
+
+
+def _day_dir(root, day):
+    return os.path.join(root, f"date={day}")
+
+
+def _local_times(epochs):
+    """epoch秒 → ローカル時刻（ダッシュボードの datetime.now() と同じ基準）"""
+    epochs = pd.Series(epochs)
+    uniq = {e: datetime.fromtimestamp(e) for e in epochs.unique()}
+    return epochs.map(uniq)
+
+
+def _write_parts(df, root):
+    """ts の日付（ローカル）ごとに part ファイルを書く"""
+    days = _local_times(df['ts']).dt.strftime('%Y-%m-%d')
+    for day, part in df.groupby(days, observed=True):
+        d = _day_dir(root, day)
+        os.makedirs(d, exist_ok=True)
+        name = f"part-{int(part['ts'].min())}-{int(part['ts'].max())}.parquet"
+        part.reset_index(drop=True).to_parquet(os.path.join(d, name), index=False)
+
+
+def compact_day(day, root=HISTORY_DIR):
+    """その日の part ファイルを1つ（day.parquet）にまとめる"""
+    d = _day_dir(root, day)
+    parts = sorted(glob.glob(os.path.join(d, "part-*.parquet")))
+    if not parts:
+        return None
+    files = parts + ([os.path.join(d, "day.parquet")] if os.path.exists(os.path.join(d, "day.parquet")) else [])
+    df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    df = df.sort_values(['ts', 'symbol', 'exchange'], kind='stable').reset_index(drop=True)
+    tmp = os.path.join(d, "day.parquet.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, os.path.join(d, "day.parquet"))
+    for f in parts:
+        os.remove(f)
+    print(f"[INFO] 金利履歴: {day} を圧縮（{len(parts)}ファイル → day.parquet, {len(df):,}行）")
+    return os.path.join(d, "day.parquet")
+
+
+class RateHistoryRecorder:
+    """スナップショットをバッファして日別 Parquet に追記する（コレクターから使う）"""
+
+    def __init__(self, root=HISTORY_DIR, flush_every=FLUSH_EVERY):
+        self.root = root
+        self.flush_every = flush_every
+        self._buffer = []
+
+    def record(self, raw, ts=None):
+        self._buffer.append(snapshot_to_frame(raw, ts))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        df = pd.concat(self._buffer, ignore_index=True)
+        self._buffer = []
+        _write_parts(df, self.root)
+        # 今日より前の日に part が残っていれば圧縮する
+        today = datetime.now().strftime('%Y-%m-%d')
+        for d in glob.glob(os.path.join(self.root, "date=*")):
+            day = os.path.basename(d).split("=", 1)[1]
+            if day < today:
+                compact_day(day, self.root)
+
+
+def load_history(start=None, end=None, symbols=None, exchanges=None, root=HISTORY_DIR):
+    """期間（datetime / None）と銘柄・取引所で絞って履歴を読む"""
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=COLUMNS)
+    start_day = start.strftime('%Y-%m-%d') if start is not None else None
+    end_day = end.strftime('%Y-%m-%d') if end is not None else None
+
+    files = []
+    for d in sorted(glob.glob(os.path.join(root, "date=*"))):
+        day = os.path.basename(d).split("=", 1)[1]
+        if (start_day and day < start_day) or (end_day and day > end_day):
+            continue
+        files.extend(sorted(glob.glob(os.path.join(d, "*.parquet"))))
+    if not files:
+        return pd.DataFrame(columns=COLUMNS)
+
+    filters = []
+    if symbols is not None:
+        filters.append(('symbol', 'in', list(symbols)))
+    if exchanges is not None:
+        filters.append(('exchange', 'in', list(exchanges)))
+    frames = [pd.read_parquet(f, filters=filters or None) for f in files]
+    df = pd.concat(frames, ignore_index=True)
+    if start is not None:
+        df = df[df['ts'] >= int(start.timestamp())]
+    if end is not None:
+        df = df[df['ts'] < int(end.timestamp())]
+    return df.reset_index(drop=True)
+
+
+def last_settlements(n=3, symbols=None, exchanges=None, now=None, root=HISTORY_DIR):
+    """
+    銘柄×取引所ごとの直近 n 回の金利確定
+    各確定について、確定時刻より前の最後の観測値をその回の金利とみなす
+    戻り値: symbol, exchange, settle_time, rate, price, interval_s（新しい順）
+    """
+    now = now or datetime.now()
+    days = int(np.ceil((n + 1) * MAX_INTERVAL_S / 86400)) + 1
+    df = load_history(now - timedelta(days=days), now + timedelta(days=1), symbols, exchanges, root)
+    out_cols = ['symbol', 'exchange', 'settle_time', 'rate', 'price', 'interval_s']
+    if df.empty:
+        return pd.DataFrame(columns=out_cols)
+
+    now_epoch = int(now.timestamp())
+    df = df[(df['settle_epoch'] <= now_epoch) & (df['ts'] <= df['settle_epoch'])]
+    df = df.sort_values('ts', kind='stable')
+    last_obs = df.drop_duplicates(['symbol', 'exchange', 'settle_epoch'], keep='last')
+    last_obs = last_obs.sort_values('settle_epoch', ascending=False, kind='stable')
+    top = last_obs.groupby(['symbol', 'exchange'], observed=True, sort=False).head(n)
+
+    top = top.assign(settle_time=_local_times(top['settle_epoch']).to_numpy())
+    top = top.sort_values(['symbol', 'exchange', 'settle_epoch'], ascending=[True, True, False])
+    for col in ('symbol', 'exchange'):
+        top[col] = top[col].astype(str)
+    return top[out_cols].reset_index(drop=True)
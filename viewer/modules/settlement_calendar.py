@@ -0,0 +1,126 @@
+# modules/settlement_calendar.py
+"""
+金利配布（確定）スケジュールのカレンダー
+
+- 1h / 4h / 8h の配布時刻（JST）の定義はここだけに置く
+- 「次の配布時刻（epoch秒）」はスケジュールごとに1分に1回だけ計算し、
+  銘柄ごとの残り秒数・配布時刻は辞書引きと引き算だけで求める
+- 取引所の nextFundingTime（ミリ秒）→ JST の時は datetime を使わず算術で求める
+"""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# 配布時刻（JSTの時）
+SCHEDULES = {
+    "1h": tuple(range(24)),
+    "4h": (1, 5, 9, 13, 17, 21),
+    "8h": (1, 9, 17),
+}
+INTERVAL_SECONDS = {"1h": 3600, "4h": 14400, "8h": 28800}
+DEFAULT_CYCLE = "8h"  # 不明なサイクルは 8h スケジュールとして扱う
+
+# サイクル指定がないときの取引所ごとの既定スケジュール（配布時刻の推定用）
+EXCHANGE_DEFAULT_SCHEDULE = {
+    "BingX": "4h",
+}
+
+JST_OFFSET_S = 9 * 3600
+
+
+def interval_to_seconds(interval):
+    """'1h' / '4h' / '8h' → 秒（それ以外は 0）"""
+    return INTERVAL_SECONDS.get(interval, 0)
+
+
+def interval_to_sched_hours(interval):
+    """'1h' / '4h' / '8h' → 配布時刻のリスト（それ以外は 8h）"""
+    return list(SCHEDULES.get(interval, SCHEDULES[DEFAULT_CYCLE]))
+
+
+def cycle_for_seconds(interval_s):
+    """3600 / 14400 / 28800 → '1h' / '4h' / '8h'（それ以外は 8h）"""
+    for cycle, sec in INTERVAL_SECONDS.items():
+        if sec == interval_s:
+            return cycle
+    return DEFAULT_CYCLE
+
+
+def hour_from_epoch_ms(ms):
+    """ミリ秒 epoch → JST の時（0-23）"""
+    return int(((float(ms) / 1000) + JST_OFFSET_S) // 3600 % 24)
+
+
+def _next_epoch(sched_hours, minute_dt):
+    # 配布は毎正時なので「now より後」は「その分の開始より後」と同じ
+    for h in sorted(sched_hours):
+        c = minute_dt.replace(hour=h, minute=0)
+        if c > minute_dt:
+            return int(c.timestamp())
+    base = (minute_dt + timedelta(days=1)).replace(minute=0)
+    return int(base.replace(hour=min(sched_hours)).timestamp())
+
+
+class SettlementCalendar:
+    """ある1分間の「次の配布時刻」表"""
+
+    def __init__(self, now_dt):
+        self.minute = now_dt.replace(second=0, microsecond=0)
+        self.hour = self.minute.hour
+        self._next = {}
+        self._fallback = {}
+
+    def next_epoch_for_hours(self, sched_hours):
+        key = tuple(sched_hours)
+        nxt = self._next.get(key)
+        if nxt is None:
+            nxt = self._next[key] = _next_epoch(key, self.minute)
+        return nxt
+
+    def next_settle_epoch(self, cycle):
+        """サイクル（'1h' / '4h' / '8h'）の次の配布時刻（epoch秒）"""
+        return self.next_epoch_for_hours(SCHEDULES.get(cycle, SCHEDULES[DEFAULT_CYCLE]))
+
+    def remaining_s(self, cycle, now_dt):
+        return max(0, self.next_settle_epoch(cycle) - int(now_dt.timestamp()))
+
+    def next_hour(self, exchange_name=None, cycle_hint=None):
+        """次の配布時刻（JSTの時）: サイクル指定 → 取引所の既定 → 8h の順で決める"""
+        cycle = cycle_hint if cycle_hint in SCHEDULES else EXCHANGE_DEFAULT_SCHEDULE.get(exchange_name, DEFAULT_CYCLE)
+        hour = self._fallback.get(cycle)
+        if hour is None:
+            sched = SCHEDULES[cycle]
+            hour = self._fallback[cycle] = next((h for h in sched if h > self.hour), sched[0])
+        return hour
+
+    def normalize_time(self, time_input, exchange_name, cycle_hint=None):
+        """取引所の次回配布時刻（ミリ秒 / 文字列 / なし）→ 表示用の JST の時"""
+        try:
+            if not time_input or time_input == 0:
+                return self.next_hour(exchange_name, cycle_hint)
+            if isinstance(time_input, (int, float)):
+                if time_input < 1000000:
+                    return self.next_hour(exchange_name, cycle_hint)
+                hour = hour_from_epoch_ms(time_input)
+            else:
+                hour = (pd.to_datetime(time_input) + timedelta(hours=9)).hour
+            if exchange_name == "MEXC" and not cycle_hint:
+                return int(min(SCHEDULES["8h"], key=lambda x: abs(x - hour)))
+            return int(hour)
+        except Exception:
+            return self.next_hour(exchange_name, cycle_hint)
+
+
+_calendar = None
+
+
+def get_calendar(now_dt=None):
+    """現在の1分間のカレンダー（分が変わったときだけ作り直す）"""
+    global _calendar
+    now_dt = now_dt or datetime.now()
+    minute = now_dt.replace(second=0, microsecond=0)
+    cal = _calendar
+    if cal is None or cal.minute != minute:
+        cal = _calendar = SettlementCalendar(now_dt)
+    return cal
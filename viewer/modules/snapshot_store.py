@@ -0,0 +1,102 @@
+# modules/snapshot_store.py
+"""
+スナップショット共有ストア（SQLite / WAL）
+
+- コレクター（snapshot_collector.py）が定期取得した raw / status を書き込む
+- ダッシュボードの各セッションは最新の1件を読むだけ（取引所には直接アクセスしない）
+- WAL モードなので、書き込み中でも読み込みはブロックされない
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+SNAPSHOT_DB = "snapshot_store.sqlite3"
+KEEP_SNAPSHOTS = 10  # 保持する世代数（古いものは書き込み時に削除）
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    ts TEXT NOT NULL,
+    status TEXT NOT NULL,
+    raw TEXT NOT NULL
+)
+"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def publish_snapshot(raw, status, ts, path=SNAPSHOT_DB, keep=KEEP_SNAPSHOTS):
+    """スナップショットを1件書き込み、古い世代を削除する（戻り値: スナップショットID）"""
+    raw_json = json.dumps(raw, ensure_ascii=False, default=str)
+    status_json = json.dumps(status, ensure_ascii=False)
+    conn = _connect(path)
+    try:
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO snapshots (created_at, ts, status, raw) VALUES (?, ?, ?, ?)",
+                (time.time(), ts, status_json, raw_json),
+            )
+            snapshot_id = cur.lastrowid
+            conn.execute("DELETE FROM snapshots WHERE id <= ?", (snapshot_id - keep,))
+        return snapshot_id
+    finally:
+        conn.close()
+
+
+def read_latest_snapshot(path=SNAPSHOT_DB):
+    """
+    最新のスナップショットを返す
+    戻り値: {'id', 'raw', 'status', 'ts', 'created_at', 'age_s'} / ストアが無ければ None
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = _connect(path)
+        try:
+            row = conn.execute(
+                "SELECT id, created_at, ts, status, raw FROM snapshots ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"[DEBUG] スナップショット読み込みエラー: {e}")
+        return None
+
+    if row is None:
+        return None
+    snapshot_id, created_at, ts, status_json, raw_json = row
+    return {
+        'id': snapshot_id,
+        'raw': json.loads(raw_json),
+        'status': json.loads(status_json),
+        'ts': ts,
+        'created_at': created_at,
+        'age_s': max(0.0, time.time() - created_at),
+    }
+
+
+def latest_snapshot_info(path=SNAPSHOT_DB):
+    """最新スナップショットのIDと経過秒だけを返す（更新有無・鮮度の確認用 / 無ければ None）"""
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = _connect(path)
+        try:
+            row = conn.execute(
+                "SELECT id, created_at FROM snapshots ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return {'id': row[0], 'created_at': row[1], 'age_s': max(0.0, time.time() - row[1])}
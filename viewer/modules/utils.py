@@ -6,6 +6,17 @@
 - その他の共通処理
 """
 
+import numpy as np
+
+
+# 戦術別リスク基準
+RISK_CONFIGS = {
+    "scalp": {"w": 0.5, "d": 0.9},  # スキャ：金利時刻ボラスパイクに直撃→厳しめ
+    "hedge": {"w": 0.4, "d": 0.7},  # ヘッジ：中程度
+    "hold": {"w": 0.3, "d": 0.6}    # ホールド：持続的変動に弱い、金利時刻ボラには強い→やや緩め
+}
+RISK_LABELS = np.array(['✅', '⚠️', '❌', "MAX"], dtype=object)
+
 
 def fmt_rem(rem_s: int) -> str:
     """
@@ -46,14 +57,7 @@ def calculate_risk(d1, d2, levs, t_key):
     Returns:
         リスク判定結果のリスト（["✅", "⚠️", "❌", "MAX"]など）
     """
-    # 戦術別リスク基準
-    risk_configs = {
-        "scalp": {"w": 0.5, "d": 0.9},  # スキャ：金利時刻ボラスパイクに直撃→厳しめ
-        "hedge": {"w": 0.4, "d": 0.7},  # ヘッジ：中程度
-        "hold": {"w": 0.3, "d": 0.6}    # ホールド：持続的変動に弱い、金利時刻ボラには強い→やや緩め
-    }
-    
-    cfg = risk_configs[t_key]
+    cfg = RISK_CONFIGS[t_key]
     res = []
     
     for lev in levs:
@@ -74,6 +78,32 @@ def calculate_risk(d1, d2, levs, t_key):
     return res
 
 
+def calculate_risk_matrix(v1, v2, m1, m2, levs, t_key):
+    """
+    calculate_risk のベクトル版（ペアの配列 × レバレッジを一括判定）
+    
+    Args:
+        v1, v2: 両側のボラティリティ（配列, 長さ P）
+        m1, m2: 両側の最大レバレッジ（配列, 長さ P）
+        levs: レバレッジのリスト（長さ L）
+        t_key: 戦術キー（"scalp", "hedge", "hold"）
+    
+    Returns:
+        判定結果の object 配列（P × L）
+    """
+    cfg = RISK_CONFIGS[t_key]
+    lev = np.asarray(levs, dtype=np.float64)[None, :]
+    v1 = np.asarray(v1, dtype=np.float64)[:, None]
+    v2 = np.asarray(v2, dtype=np.float64)[:, None]
+    vol = ((v1 + v2) / 2) / (100 / lev)
+
+    # 0: ✅ / 1: ⚠️ / 2: ❌ / 3: MAX
+    code = (vol > cfg['w']).astype(np.int8) + (vol > cfg['d'])
+    over = (lev > np.asarray(m1, dtype=np.float64)[:, None]) | (lev > np.asarray(m2, dtype=np.float64)[:, None])
+    code[over] = 3
+    return RISK_LABELS[code]
+
+
 def calculate_risk_single(d, levs, t_key):
     """
     単一取引所データからレバレッジごとのリスクを判定（単体金利版用）
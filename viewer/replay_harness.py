@@ -0,0 +1,323 @@
+# replay_harness.py
+"""
+取引所APIのリプレイ・ハーネス（ローカルHTTPの代役）
+
+記録したレスポンス（MEXC / Bitget / BingX / Variational）をローカルの aiohttp サーバーから返す。
+取引所ごとに遅延・ゆらぎ・失敗（HTTPエラー / 応答しない）を設定できるので、
+本物の取引所を叩かずに data_api の取得・解析・マージを計測・テストできる。
+
+使い方（viewer ディレクトリで実行）:
+    python replay_harness.py --record fixtures      # 本物のAPIから記録（fixtures/MEXC_ticker.json など）
+    python replay_harness.py --serve fixtures --port 8765
+    python replay_harness.py --serve synthetic      # 合成データを返す
+
+コードからは ReplayServer と replay_exchanges() を組み合わせて使う
+（tests/ と benchmarks/ を参照）。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from aiohttp import web
+
+from modules import exchange_clients
+
+
+class FaultProfile:
+    """
+    1取引所ぶんの応答のふるまい
+
+    latency_s: 基本の遅延（秒）
+    jitter_s: 遅延のゆらぎ（±秒・一様分布）
+    fail_rate: HTTPエラーを返す確率（0〜1）
+    fail_status: 失敗時のステータスコード
+    hang_s: 指定すると、この秒数だけ応答しない（タイムアウトの再現）
+    """
+
+    def __init__(self, latency_s=0.0, jitter_s=0.0, fail_rate=0.0, fail_status=503, hang_s=None):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.hang_s = hang_s
+
+    def delay(self, rng):
+        if self.hang_s is not None:
+            return self.hang_s
+        return max(0.0, self.latency_s + rng.uniform(-self.jitter_s, self.jitter_s))
+
+
+class ReplayServer:
+    """
+    記録済みレスポンスを返すローカルHTTPサーバー（専用スレッドのイベントループで動く）
+
+    fixtures: {取引所: {エンドポイント名: JSON}}
+    profiles: {取引所: FaultProfile}（ない取引所は遅延なし）
+    """
+
+    def __init__(self, fixtures, profiles=None, host="127.0.0.1", port=0, seed=0):
+        self.host = host
+        self.port = port
+        self.profiles = dict(profiles or {})
+        self.hits = Counter()
+        self._rng = random.Random(seed)
+        # 応答は事前に直列化しておく（サーバー側の負荷を計測に混ぜない）
+        self._bodies = {
+            (ex, ep): json.dumps(payload).encode()
+            for ex, endpoints in fixtures.items()
+            for ep, payload in endpoints.items()
+        }
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    # --- サーバー本体 ---
+    async def _handle(self, request):
+        exchange = request.match_info["exchange"]
+        endpoint = request.match_info["endpoint"]
+        body = self._bodies.get((exchange, endpoint))
+        if body is None:
+            return web.Response(status=404, text="no fixture")
+        self.hits[exchange] += 1
+
+        profile = self.profiles.get(exchange) or FaultProfile()
+        delay = profile.delay(self._rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if profile.fail_rate and self._rng.random() < profile.fail_rate:
+            return web.Response(status=profile.fail_status, text="injected failure")
+        return web.Response(body=body, content_type="application/json")
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/{exchange}/{endpoint}", self._handle)
+        self._runner = web.AppRunner(app, shutdown_timeout=0.1)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def _shutdown(self):
+        await self._runner.cleanup()
+        # 応答しないまま残っているハンドラ（hang_s）を止める
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name="replay-server", daemon=True)
+        self._thread.start()
+        ready.wait(5.0)
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(5.0)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5.0)
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- 設定 ---
+    def set_profile(self, exchange, profile):
+        """取引所のふるまいを差し替える（次のリクエストから有効）"""
+        self.profiles[exchange] = profile
+
+    def url_for(self, exchange, endpoint):
+        return f"http://{self.host}:{self.port}/{exchange}/{endpoint}"
+
+    def endpoints(self):
+        """exchange_clients.ENDPOINTS と同じ形（URL だけこのサーバー向け）"""
+        out = {}
+        for ex, ep in self._bodies:
+            out.setdefault(ex, {})[ep] = self.url_for(ex, ep)
+        return out
+
+
+@contextmanager
+def replay_exchanges(server, timeouts=None):
+    """
+    exchange_clients の接続先をリプレイサーバーに向ける（抜けると元に戻す）
+    timeouts: {取引所: (接続秒, 全体秒)} でタイムアウトも上書きできる
+    """
+    saved_endpoints = {ex: exchange_clients.ENDPOINTS.get(ex) for ex in server.endpoints()}
+    saved_timeouts = dict(exchange_clients.EXCHANGE_TIMEOUTS)
+    exchange_clients.close_all()
+    exchange_clients.clear_cache()
+    exchange_clients.ENDPOINTS.update(server.endpoints())
+    exchange_clients.EXCHANGE_TIMEOUTS.update(timeouts or {})
+    try:
+        yield server
+    finally:
+        exchange_clients.close_all()
+        exchange_clients.clear_cache()
+        for ex, endpoints in saved_endpoints.items():
+            if endpoints is None:
+                exchange_clients.ENDPOINTS.pop(ex, None)
+            else:
+                exchange_clients.ENDPOINTS[ex] = endpoints
+        exchange_clients.EXCHANGE_TIMEOUTS.clear()
+        exchange_clients.EXCHANGE_TIMEOUTS.update(saved_timeouts)
+
+
+# --- フィクスチャ（記録・読み込み・合成） ---
+def save_fixtures(fixtures, directory):
+    os.makedirs(directory, exist_ok=True)
+    for ex, endpoints in fixtures.items():
+        for ep, payload in endpoints.items():
+            with open(os.path.join(directory, f"{ex}_{ep}.json"), "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+
+
+def load_fixtures(directory):
+    """directory の {取引所}_{エンドポイント}.json を読む"""
+    fixtures = {}
+    for ex, endpoints in exchange_clients.ENDPOINTS.items():
+        for ep in endpoints:
+            path = os.path.join(directory, f"{ex}_{ep}.json")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    fixtures.setdefault(ex, {})[ep] = json.load(f)
+    return fixtures
+
+
+def record_fixtures(directory):
+    """本物の取引所APIから全エンドポイントを取得して保存する"""
+    async def _fetch_all():
+        names = list(exchange_clients.ENDPOINTS)
+        results = await asyncio.gather(
+            *(exchange_clients.get_client(ex).get_all() for ex in names), return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    fixtures = {}
+    for ex, result in exchange_clients.run(_fetch_all()).items():
+        if isinstance(result, Exception):
+            print(f"[ERROR] {ex}: 記録失敗 {result!r}")
+            continue
+        fixtures[ex] = result
+        print(f"[INFO] {ex}: {', '.join(result)} を記録")
+    save_fixtures(fixtures, directory)
+    exchange_clients.close_all()
+    return fixtures
+
+
+def synthetic_fixtures(n_symbols=600, seed=0, now_ms=None):
+    """
+    各取引所のレスポンスと同じ形の合成データ
+    銘柄は取引所ごとに約8割ずつ重なるように選ぶ（BTC / ETH は全取引所）
+    """
+    rng = random.Random(seed)
+    now_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+    symbols = ["BTC", "ETH"] + [f"S{i:04d}" for i in range(max(0, n_symbols - 2))]
+
+    def listed(sym):
+        return sym in ("BTC", "ETH") or rng.random() < 0.8
+
+    def rate():
+        return round(rng.uniform(-0.002, 0.002), 6)
+
+    def price():
+        return round(rng.uniform(0.01, 500.0), 4)
+
+    def next_settle_ms(interval_h):
+        hour_ms = 3600 * 1000
+        return (now_ms // (interval_h * hour_ms) + 1) * interval_h * hour_ms
+
+    mexc = [
+        {"symbol": f"{s}_USDT", "lastPrice": price(), "fundingRate": rate(),
+         "riseFallRate": round(rng.uniform(-0.2, 0.2), 4)}
+        for s in symbols if listed(s)
+    ]
+    bitget = [
+        {"symbol": f"{s}USDT", "lastPr": str(price()), "fundingRate": str(rate()),
+         "change24h": str(round(rng.uniform(-0.2, 0.2), 4))}
+        for s in symbols if listed(s)
+    ]
+    bingx_syms = [s for s in symbols if listed(s)]
+    bingx_ticker = [
+        {"symbol": f"{s}-USDT", "priceChangePercent": str(round(rng.uniform(-20, 20), 2))}
+        for s in bingx_syms
+    ]
+    bingx_premium = [
+        {"symbol": f"{s}-USDT", "markPrice": str(price()), "lastFundingRate": str(rate()),
+         "nextFundingTime": next_settle_ms(rng.choice((1, 4, 8)))}
+        for s in bingx_syms
+    ]
+    variational = [
+        {"ticker": s, "funding_rate": str(round(rng.uniform(-0.5, 0.5), 4)),
+         "mark_price": str(price()), "funding_interval_s": rng.choice((3600, 28800))}
+        for s in symbols if listed(s)
+    ]
+    return {
+        "MEXC": {"ticker": {"success": True, "code": 0, "data": mexc}},
+        "Bitget": {"tickers": {"code": "00000", "msg": "success", "data": bitget}},
+        "BingX": {
+            "ticker": {"code": 0, "msg": "", "data": bingx_ticker},
+            "premiumIndex": {"code": 0, "msg": "", "data": bingx_premium},
+        },
+        "Variational": {"stats": {"listings": variational}},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="取引所APIのリプレイ・ハーネス")
+    parser.add_argument("--record", metavar="DIR", help="本物のAPIから記録して DIR に保存")
+    parser.add_argument("--serve", metavar="DIR", help="DIR の記録を返すサーバーを起動（synthetic で合成データ）")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="全取引所の遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="遅延のゆらぎ（±秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="HTTPエラーを返す確率")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record)
+        return
+    if not args.serve:
+        parser.error("--record か --serve を指定してください")
+
+    fixtures = synthetic_fixtures() if args.serve == "synthetic" else load_fixtures(args.serve)
+    profile = FaultProfile(args.latency, args.jitter, args.fail_rate)
+    server = ReplayServer(fixtures, {ex: profile for ex in fixtures}, port=args.port).start()
+    print(f"[INFO] リプレイサーバー起動: http://{server.host}:{server.port}/")
+    for ex, endpoints in server.endpoints().items():
+        for ep, url in endpoints.items():
+            print(f"  {ex:<12} {ep:<14} {url}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("\n[INFO] リプレイサーバー停止")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
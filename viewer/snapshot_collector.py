@@ -0,0 +1,95 @@
+# snapshot_collector.py
+"""
+スナップショット・コレクター（常駐プロセス）
+
+全取引所を一定間隔で取得し、modules/snapshot_store の共有ストアに書き込む。
+ダッシュボード（main.py）は最新スナップショットを読むだけになるので、
+閲覧しているタブの数に関係なく取引所へのリクエスト数は一定になる。
+
+使い方（viewer ディレクトリで実行）:
+    python snapshot_collector.py              # 60秒間隔で常駐
+    python snapshot_collector.py --interval 30
+    python snapshot_collector.py --once       # 1回だけ取得して終了
+    python snapshot_collector.py --no-reconcile  # サイクルの自動照合をしない
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from modules.cycle_reconciler import RECONCILE_BATCH, RECONCILE_INTERVAL_S, ReconcileWorker
+from modules.data_api import collect_snapshot, load_cycle_masters
+from modules.exchange_clients import close_all
+from modules.rate_history import HISTORY_DIR, RateHistoryRecorder
+from modules.snapshot_store import SNAPSHOT_DB, KEEP_SNAPSHOTS, publish_snapshot
+
+POLL_INTERVAL_S = 60
+
+
+def collect_once(db_path=SNAPSHOT_DB, keep=KEEP_SNAPSHOTS, recorder=None, reconciler=None):
+    """
+    1回ぶん取得してストアに書き込む（取引所ごとの TTL は exchange_clients のキャッシュが管理）
+    recorder を渡すと金利履歴（rate_history）にも追記する
+    reconciler を渡すと、載っている銘柄をサイクル照合の対象として渡す
+    """
+    t_start = time.time()
+    now_dt = datetime.now()
+    cycle_masters = load_cycle_masters()
+
+    data, status = collect_snapshot(cycle_masters, now_dt)
+
+    ts = datetime.now().strftime("%H:%M:%S")
+    snapshot_id = publish_snapshot(data, status, ts, path=db_path, keep=keep)
+    if recorder is not None:
+        recorder.record(data, now_dt.timestamp())
+    if reconciler is not None:
+        reconciler.update_symbols(data)
+    print(f"[INFO] スナップショット #{snapshot_id} 書き込み: 銘柄数={len(data)}, "
+          f"ステータス={status}, 所要={time.time() - t_start:.2f}秒")
+    return snapshot_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="取引所スナップショットの定期取得")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL_S, help="取得間隔（秒）")
+    parser.add_argument("--db", default=SNAPSHOT_DB, help="共有ストアのパス")
+    parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS, help="保持する世代数")
+    parser.add_argument("--once", action="store_true", help="1回だけ取得して終了")
+    parser.add_argument("--history-dir", default=HISTORY_DIR, help="金利履歴（日別 Parquet）の保存先")
+    parser.add_argument("--no-history", action="store_true", help="金利履歴を記録しない")
+    parser.add_argument("--reconcile-interval", type=float, default=RECONCILE_INTERVAL_S,
+                        help="サイクル照合の間隔（秒）")
+    parser.add_argument("--reconcile-batch", type=int, default=RECONCILE_BATCH,
+                        help="1回の照合で確認する銘柄数（取引所ごと）")
+    parser.add_argument("--no-reconcile", action="store_true", help="サイクルの自動照合をしない")
+    args = parser.parse_args()
+
+    recorder = None if args.no_history else RateHistoryRecorder(args.history_dir)
+    reconciler = None
+    if not (args.no_reconcile or args.once):
+        reconciler = ReconcileWorker(args.reconcile_interval, args.reconcile_batch)
+        reconciler.start()
+    print(f"[INFO] コレクター開始: 間隔={args.interval}秒, ストア={args.db}")
+    try:
+        while True:
+            t_start = time.time()
+            try:
+                collect_once(db_path=args.db, keep=args.keep, recorder=recorder, reconciler=reconciler)
+            except Exception as e:
+                print(f"[ERROR] 取得エラー: {e}")
+            if args.once:
+                break
+            # 取得にかかった時間を差し引いて、一定のリズムで取得する
+            time.sleep(max(0.0, args.interval - (time.time() - t_start)))
+    except KeyboardInterrupt:
+        print("\n[INFO] コレクター停止")
+    finally:
+        if reconciler is not None:
+            reconciler.stop()
+        if recorder is not None:
+            recorder.flush()
+        close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+
+@pytest.fixture
+def make_raw(tmp_path, monkeypatch):
+    """
+    合成レスポンス（replay_harness.synthetic_fixtures）を data_api の parse_* で raw にする
+    Bitget / MEXC のサイクルは銘柄ごとにランダム（1h / 4h / 8h のタブが全部埋まるように）
+    """
+    pytest.importorskip('streamlit')
+    from modules import data_api
+    from replay_harness import synthetic_fixtures
+
+    # サイクルマスター（cycle_store）はテストごとの一時ディレクトリに作る
+    monkeypatch.chdir(tmp_path)
+    now_ms = int(datetime(2026, 3, 2, 10, 17).timestamp() * 1000)
+
+    def make(seed=0, n_symbols=300):
+        fixtures = synthetic_fixtures(n_symbols=n_symbols, seed=seed, now_ms=now_ms)
+        rng = random.Random(seed)
+        symbols = [x['symbol'].split('_')[0] for x in fixtures["MEXC"]["ticker"]["data"]]
+        masters = {ex: {s: rng.choice(("1h", "4h", "8h")) for s in symbols} for ex in ("Bitget", "MEXC")}
+        now_dt = datetime.fromtimestamp(now_ms / 1000)
+        results = {ex: data_api.PARSERS[ex](fixtures[ex], masters, now_dt) for ex in data_api.EXCHANGES}
+        raw, _ = data_api.merge_results(results)
+        return raw
+
+    return make
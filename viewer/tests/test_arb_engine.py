@@ -0,0 +1,134 @@
+import pandas as pd
+import pytest
+
+from modules import arb_engine
+from modules.utils import calculate_risk
+
+EXCHANGES = ["MEXC", "BingX", "Bitget", "Variational"]
+LEVS = [2, 5, 10, 25, 50]
+COMPARE = ["t", "ex1", "r1", "t1", "tp1", "ex2", "r2", "t2", "tp2", "df", "n", "rk"]
+
+
+# --- 列指向化する前の二重ループ（mode_simultaneous / mode_time_diff の旧実装） ---
+
+def loop_simultaneous(raw, active_exs, levs, t_key):
+    rows = []
+    for ticker, exs in raw.items():
+        filtered = {k: v for k, v in exs.items() if k in active_exs}
+        if len(filtered) < 2: continue
+        it = list(filtered.items())
+        for i in range(len(it)):
+            for j in range(i + 1, len(it)):
+                ex1, d1 = it[i]; ex2, d2 = it[j]
+                if d1['t'] == 0 or d2['t'] == 0: continue
+                if d1['t'] == d2['t']:
+                    low, high = (it[i], it[j]) if d1['rate'] < d2['rate'] else (it[j], it[i])
+                    net = high[1]['rate'] - low[1]['rate']
+                    diff = abs(d1['p'] - d2['p']) / d2['p'] * 100
+                    rows.append({
+                        "t": ticker, "ex1": low[0], "r1": low[1]['rate'], "t1": low[1]['t'], "tp1": "L",
+                        "ex2": high[0], "r2": high[1]['rate'], "t2": high[1]['t'], "tp2": "S",
+                        "df": diff, "n": net - diff, "rk": calculate_risk(d1, d2, levs, t_key)
+                    })
+    return pd.DataFrame(rows)
+
+
+def loop_hedge(raw, active_exs, levs, t_key):
+    rows = []
+    for ticker, exs in raw.items():
+        filtered = {k: v for k, v in exs.items() if k in active_exs}
+        if len(filtered) < 2: continue
+        it = list(filtered.items())
+        for i in range(len(it)):
+            for j in range(i + 1, len(it)):
+                dA = it[i][1]; dB = it[j][1]
+                if ('remaining_s' not in dA) or ('remaining_s' not in dB): continue
+                if dA['remaining_s'] <= 0 or dB['remaining_s'] <= 0: continue
+                cycle_same = (int(dA.get("interval_s", 0)) == int(dB.get("interval_s", 0)))
+                diff_s = abs(int(dA['remaining_s']) - int(dB['remaining_s']))
+                if cycle_same and diff_s <= 120: continue
+                if not cycle_same and diff_s <= 30: continue
+                if dA['remaining_s'] < dB['remaining_s']:
+                    ex1, d1 = it[i]; ex2, d2 = it[j]
+                else:
+                    ex1, d1 = it[j]; ex2, d2 = it[i]
+                p1_type = "S" if d1['rate'] >= 0 else "L"
+                p2_type = "L" if p1_type == "S" else "S"
+                net = abs(d1['rate'])
+                diff = abs(d1['p'] - d2['p']) / d2['p'] * 100 if d2['p'] != 0 else 0
+                rows.append({
+                    "t": ticker,
+                    "ex1": ex1, "r1": d1['rate'], "t1": d1.get('t', 0), "tp1": p1_type, "rem1": int(d1.get("remaining_s", 0)),
+                    "ex2": ex2, "r2": d2['rate'], "t2": d2.get('t', 0), "tp2": p2_type, "rem2": int(d2.get("remaining_s", 0)),
+                    "df": diff, "n": net - diff, "rk": calculate_risk(d1, d2, levs, t_key)
+                })
+    return pd.DataFrame(rows)
+
+
+def loop_cycle_buckets(df, raw):
+    """旧 render_simultaneous_mode のサイクル分類（raw の interval_s を両側で照合）"""
+    buckets = {"1h": [], "4h": [], "8h": []}
+    for r in df.to_dict('records'):
+        s1 = raw[r['t']][r['ex1']].get('interval_s', 0)
+        s2 = raw[r['t']][r['ex2']].get('interval_s', 0)
+        for label, sec in arb_engine.CYCLES.items():
+            if s1 == sec and s2 == sec:
+                buckets[label].append(r['t'])
+    return buckets
+
+
+def _records(df, columns=COMPARE):
+    return [{c: (list(r[c]) if c == "rk" else r[c]) for c in columns} for r in df.to_dict('records')]
+
+
+def _best(df):
+    return df.sort_values("n", ascending=False, kind="stable").drop_duplicates(subset=['t'])
+
+
+ENGINES = [
+    (loop_simultaneous, arb_engine.simultaneous_pairs),
+    (loop_hedge, arb_engine.hedge_pairs),
+]
+
+
+@pytest.mark.parametrize("loop, engine", ENGINES, ids=["simultaneous", "hedge"])
+@pytest.mark.parametrize("t_key", ["scalp", "hold"])
+def test_engine_matches_nested_loops(make_raw, loop, engine, t_key):
+    raw = make_raw(seed=3)
+    expected = loop(raw, EXCHANGES, LEVS, t_key)
+    got = engine(raw, EXCHANGES, LEVS, t_key)
+
+    assert len(expected) > 50
+    # 行の順序（銘柄 → 取引所ペアの二重ループ順）も含めて一致
+    assert _records(got) == _records(expected)
+    assert got['t1'].dtype.kind == "i" and got['t2'].dtype.kind == "i"
+
+
+@pytest.mark.parametrize("loop, engine", ENGINES, ids=["simultaneous", "hedge"])
+def test_best_per_ticker_and_cycle_buckets_match(make_raw, loop, engine):
+    raw = make_raw(seed=5)
+    expected = _best(loop(raw, EXCHANGES, LEVS, "hold"))
+    got = arb_engine.best_per_ticker(engine(raw, EXCHANGES, LEVS, "hold"))
+
+    assert _records(got) == _records(expected)
+    assert _records(arb_engine.best_per_ticker(engine(raw, EXCHANGES, LEVS, "hold"), limit=40)) == \
+        _records(expected.head(40))
+
+    buckets = arb_engine.split_by_cycle(got)
+    expected_buckets = loop_cycle_buckets(expected, raw)
+    assert any(expected_buckets.values())
+    for label in arb_engine.CYCLES:
+        assert buckets[label]['t'].tolist() == expected_buckets[label]
+
+
+def test_active_exchanges_filter(make_raw):
+    raw = make_raw(seed=7)
+    active = ["MEXC", "Bitget"]
+    for loop, engine in ENGINES:
+        assert _records(engine(raw, active, LEVS, "hold")) == _records(loop(raw, active, LEVS, "hold"))
+
+
+def test_no_pairs_returns_empty_frame_with_columns():
+    raw = {"BTC": {"MEXC": {'rate': 0.01, 'p': 1.0, 'v': 1.0, 'm': 50, 't': 9, 'interval_s': 3600, 'remaining_s': 60}}}
+    assert list(arb_engine.simultaneous_pairs(raw, EXCHANGES, LEVS, "hold").columns) == arb_engine.PAIR_COLUMNS
+    assert list(arb_engine.hedge_pairs(raw, EXCHANGES, LEVS, "hold").columns) == arb_engine.HEDGE_COLUMNS
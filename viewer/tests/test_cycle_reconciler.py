@@ -0,0 +1,103 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from modules import cycle_reconciler
+from modules.cycle_reconciler import parse_bingx_meta, parse_bitget_meta, parse_mexc_meta
+from modules.cycle_store import CycleStore
+
+HOUR_MS = 3600 * 1000
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CycleStore(str(tmp_path / "cycles.sqlite3"), seed=False)
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """fetch_intervals を差し替え、取引所ごとの結果を返す（呼ばれた銘柄を記録）"""
+    answers, calls = {}, []
+
+    async def fake_fetch_intervals(exchange, symbols, rate=None, concurrency=None):
+        calls.append((exchange, list(symbols)))
+        return {sym: answers.get(exchange, {}).get(sym) for sym in symbols}
+
+    monkeypatch.setattr(cycle_reconciler, "fetch_intervals", fake_fetch_intervals)
+    return answers, calls
+
+
+def test_parse_mexc_meta():
+    assert parse_mexc_meta({"success": True, "data": {"collectCycle": 4}}) == "4h"
+    assert parse_mexc_meta({"data": {"collectCycle": "8"}}) == "8h"
+    assert parse_mexc_meta({"data": {"collectCycle": 2}}) is None
+    assert parse_mexc_meta({"data": {"collectCycle": "x"}}) is None
+    assert parse_mexc_meta({"data": []}) is None
+    assert parse_mexc_meta(None) is None
+
+
+def test_parse_bitget_meta():
+    assert parse_bitget_meta({"code": "00000", "data": [{"fundingRateInterval": "1"}]}) == "1h"
+    assert parse_bitget_meta({"data": [{}]}) is None
+    assert parse_bitget_meta({"data": []}) is None
+    assert parse_bitget_meta("error") is None
+
+
+def test_parse_bingx_meta():
+    times = [{"fundingTime": str(t * 4 * HOUR_MS)} for t in (3, 1, 2)]
+    assert parse_bingx_meta({"code": 0, "data": times}) == "4h"
+    # 間隔がそろわない・サイクルにない・1件だけ → 判定しない
+    assert parse_bingx_meta({"data": [{"fundingTime": t * HOUR_MS} for t in (10, 11, 15)]}) is None
+    assert parse_bingx_meta({"data": [{"fundingTime": t * HOUR_MS} for t in (10, 12)]}) is None
+    assert parse_bingx_meta({"data": times[:1]}) is None
+
+
+def test_fetch_interval_treats_bad_meta_as_one_failure():
+    class Client:
+        async def get_json(self, url):
+            return {"code": "00000", "data": "unexpected"}
+
+    limiter = cycle_reconciler.RateLimiter(0)
+    result = asyncio.run(cycle_reconciler.fetch_interval(Client(), "Bitget", "BTC", limiter, asyncio.Semaphore(1)))
+    assert result is None
+
+
+def test_reconcile_writes_only_changes(store, fetched):
+    answers, calls = fetched
+    store.apply("MEXC", {"BTC": "8h", "ETH": "8h"})
+    answers["MEXC"] = {"BTC": "8h", "ETH": "4h", "XRP": "1h", "DOGE": None}
+
+    changes = cycle_reconciler.reconcile("MEXC", ["BTC", "ETH", "XRP", "DOGE", "ETH"], store=store)
+
+    assert calls == [("MEXC", ["BTC", "ETH", "XRP", "DOGE"])]
+    assert changes == [("ETH", "8h", "4h"), ("XRP", None, "1h")]
+    assert store.load("MEXC") == {"BTC": "8h", "ETH": "4h", "XRP": "1h"}
+
+
+def test_reconcile_skips_unknown_exchange_and_empty_symbols(store, fetched):
+    _, calls = fetched
+    assert cycle_reconciler.reconcile("Variational", ["BTC"], store=store) == []
+    assert cycle_reconciler.reconcile("MEXC", [], store=store) == []
+    assert calls == []
+
+
+def test_reconcile_stalest_checks_batch_per_exchange(store, fetched):
+    answers, calls = fetched
+    answers["Bitget"] = {"BTC": "1h", "ETH": "4h"}
+    answers["BingX"] = {"BTC": "4h"}
+    raw = {
+        "BTC": {"Bitget": {}, "BingX": {}, "Variational": {}},
+        "ETH": {"Bitget": {}},
+        "SOL": {"Bitget": {}},
+    }
+
+    result = cycle_reconciler.reconcile_stalest(raw, batch=2, store=store)
+
+    assert sorted(calls) == [("BingX", ["BTC"]), ("Bitget", ["BTC", "ETH"])]
+    assert result == {"Bitget": [("BTC", None, "1h"), ("ETH", None, "4h")], "BingX": [("BTC", None, "4h")]}
@@ -0,0 +1,98 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from modules import cycle_store
+from modules.cycle_store import CycleStore, base_symbol
+
+
+@pytest.fixture
+def legacy_dir(tmp_path, monkeypatch):
+    """旧CSV（Symbol, Interval）を置いた作業ディレクトリ"""
+    (tmp_path / "mexc_cycle_master.csv").write_text("Symbol,Interval\nBTC,8h\nETH,4\n", encoding="utf-8")
+    (tmp_path / "bitget_true_catalog_0101_0000.csv").write_text("Symbol,Interval\nBTCUSDT,1h\n", encoding="utf-8")
+    (tmp_path / "bingx_true_catalog_history_0101.csv").write_text(
+        "\ufeffSymbol,Interval\nBTC-USDT,4h\nDOGE-USDT,\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """checked_at / updated_at に使う時刻を進められるようにする"""
+    now = {"t": 0}
+
+    def tick():
+        now["t"] += 1
+        return f"2026-03-02 00:00:{now['t']:02d}"
+
+    monkeypatch.setattr(cycle_store, "_now_str", tick)
+    return now
+
+
+def test_seeds_from_legacy_csv_once(legacy_dir):
+    store = CycleStore(str(legacy_dir / "cycles.sqlite3"))
+
+    assert store.load() == {
+        "MEXC": {"BTC": "8h", "ETH": "4h"},
+        "Bitget": {"BTC": "1h"},
+        "BingX": {"BTC": "4h"},
+    }
+    revision = store.revision()
+    assert revision > 0
+
+    # 2回目以降は revision が 0 でないので CSV を読み直さない
+    (legacy_dir / "mexc_cycle_master.csv").write_text("Symbol,Interval\nBTC,1h\n", encoding="utf-8")
+    again = CycleStore(str(legacy_dir / "cycles.sqlite3"))
+    assert again.load("MEXC") == {"BTC": "8h", "ETH": "4h"}
+    assert again.revision() == revision
+
+
+def test_empty_seed_still_marks_store_initialized(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = CycleStore(str(tmp_path / "cycles.sqlite3"))
+    assert store.load() == {}
+    assert store.revision() == 1
+
+
+def test_apply_records_changes_and_bumps_revision(tmp_path, clock):
+    store = CycleStore(str(tmp_path / "cycles.sqlite3"), seed=False)
+    assert store.revision() == 0
+
+    assert store.apply("MEXC", {"BTC": "8h", "ETH": "4h", "XRP": None}) == [("BTC", None, "8h"), ("ETH", None, "4h")]
+    assert store.revision() == 1
+
+    # 変わらない銘柄・取得失敗（None）では revision は変わらない
+    assert store.apply("MEXC", {"BTC": "8h", "ETH": None}) == []
+    assert store.revision() == 1
+
+    assert store.apply("MEXC", {"ETH": "1h"}) == [("ETH", "4h", "1h")]
+    assert store.revision() == 2
+    assert store.load("MEXC") == {"BTC": "8h", "ETH": "1h"}
+    assert store.load("Bitget") == {}
+
+    with sqlite3.connect(store.path) as conn:
+        log = conn.execute("SELECT symbol, old_interval, new_interval, reason FROM cycle_changes ORDER BY id").fetchall()
+    assert log == [("BTC", None, "8h", "NEW"), ("ETH", None, "4h", "NEW"), ("ETH", "4h", "1h", "CHANGED")]
+
+
+def test_stalest_orders_unchecked_first_then_oldest(tmp_path, clock):
+    store = CycleStore(str(tmp_path / "cycles.sqlite3"), seed=False)
+    store.apply("BingX", {"A": "4h"})
+    store.apply("BingX", {"B": "4h"})
+    store.apply("BingX", {"C": "1h"})
+    store.apply("BingX", {"A": "4h"})  # 変更なしでも確認時刻は更新される
+
+    assert store.stalest("BingX", ["A", "B", "C", "NEW", "B"], 10) == ["NEW", "B", "C", "A"]
+    assert store.stalest("BingX", ["A", "B", "C"], 2) == ["B", "C"]
+    # 別の取引所の確認時刻は関係ない
+    assert store.stalest("MEXC", ["A", "B"], 2) == ["A", "B"]
+
+
+def test_base_symbol():
+    assert [base_symbol(s) for s in ("BTC-USDT", "BTCUSDT", "BTC_USDT", "BTC", "USDT")] == \
+        ["BTC", "BTC", "BTC", "BTC", "USDT"]
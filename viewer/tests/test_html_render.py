@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from modules import html_render
+
+HEADER = "<thead><tr><th>銘柄</th></tr></thead>"
+LEVS = [5, 50, 125]
+
+
+def _row_key(r):
+    return ("test", r['t'], r['n'])
+
+
+def _row_body(r):
+    return f"<td>{r['t']}</td>"
+
+
+def _render(rows, margin=200, levs=LEVS):
+    return html_render.table_html(HEADER, rows, _row_key, _row_body, 'n', 'rk', margin, levs)
+
+
+def setup_function():
+    html_render._row_cache.clear()
+    html_render._table_cache.clear()
+
+
+def test_risk_change_rebuilds_lev_cells():
+    # 金利・行キーが同じでも、リスク判定（戦術・ボラ・最大レバ）が変われば作り直す
+    hold = [{'t': 'BTC', 'n': 0.1, 'rk': ["✅", "⚠️", "❌"]}]
+    scalp = [{'t': 'BTC', 'n': 0.1, 'rk': ["✅", "MAX", "MAX"]}]
+
+    first = _render(hold)
+    second = _render(scalp)
+
+    assert first != second
+    assert second.count(">MAX<") == 2
+    assert "$10.0" not in second  # MAX を超えたレバの金額は出さない
+
+
+def test_same_input_returns_cached_table():
+    rows = [{'t': 'ETH', 'n': 0.2, 'rk': ["✅", "✅", "⚠️"]}]
+    assert _render(rows) is _render([dict(r) for r in rows])
+
+
+def test_margin_change_rebuilds_amounts():
+    rows = [{'t': 'ETH', 'n': 0.2, 'rk': ["✅", "✅", "✅"]}]
+    assert "$2.0" in _render(rows, margin=200)
+    assert "$4.0" in _render(rows, margin=400)
@@ -0,0 +1,136 @@
+import copy
+import random
+
+import pytest
+
+from modules import arb_engine
+from modules.ranking import PairRanker, SingleRanker, TopKIndex
+
+EXCHANGES = ["MEXC", "BingX", "Bitget", "Variational"]
+LEVS = [2, 5, 10, 25, 50]
+K = 15
+
+
+def _recompute(raw, engine, tab, k):
+    """全銘柄を並べ直した場合の上位 k 件（比較用）"""
+    df = engine(raw, EXCHANGES, LEVS, "hold")
+    df = df.sort_values('n', ascending=False, kind='stable').drop_duplicates('t')
+    if tab != "all":
+        # 周期タブは銘柄ごとの最良ペアのうち、両側がその周期のもの
+        sec = arb_engine.CYCLES[tab]
+        df = df[(df['i1'] == sec) & (df['i2'] == sec)]
+    df = df.head(k)
+    return list(zip(df['t'], df['n']))
+
+
+def _top(ranker, tab, k):
+    return [(r['t'], r['n']) for r in ranker.top(tab, k)]
+
+
+def _tab_of(ranker, ticker):
+    return [tab for tab in arb_engine.CYCLES if ticker in ranker.indexes[tab]]
+
+
+def _mutate(raw, rng, n_changed=30, n_removed=5):
+    """一部の銘柄の金利・価格を変え、一部の銘柄を消す（新しい raw を返す）"""
+    raw = copy.deepcopy(raw)
+    for ticker in rng.sample(sorted(raw), n_changed):
+        for d in raw[ticker].values():
+            d['rate'] += rng.uniform(-0.05, 0.05)
+            d['p'] *= 1 + rng.uniform(-0.001, 0.001)
+    for ticker in rng.sample(sorted(raw), n_removed):
+        del raw[ticker]
+    return raw
+
+
+@pytest.mark.parametrize("mode, engine", [
+    ("simultaneous", arb_engine.simultaneous_pairs),
+    ("hedge", arb_engine.hedge_pairs),
+])
+def test_pair_ranker_matches_full_recompute(make_raw, mode, engine):
+    rng = random.Random(0)
+    ranker = PairRanker(mode, EXCHANGES, LEVS, "hold")
+    raw = make_raw(seed=11)
+    removed_total = 0
+
+    for step in range(6):
+        if step:
+            before = set(raw)
+            raw = _mutate(raw, rng)
+            removed_total += len(before - set(raw))
+        ranker.update(raw)
+        for tab in ("all",) + tuple(arb_engine.CYCLES):
+            assert _top(ranker, tab, K) == _recompute(raw, engine, tab, K), (step, tab)
+
+    assert removed_total == 25
+    assert not set(ranker.best) - set(raw)
+    # 同じ raw の再実行では何も再計算しない
+    assert ranker.update(raw) == 0
+
+
+def test_best_pair_moves_between_cycle_tabs(make_raw):
+    ranker = PairRanker("simultaneous", EXCHANGES, LEVS, "hold")
+    raw = make_raw(seed=11)
+    ranker.update(raw)
+    ticker = next(t for t, r in ranker.best.items() if r['i1'] == r['i2'] == 3600)
+    assert _tab_of(ranker, ticker) == ["1h"]
+
+    # 両側のサイクルを 4h に → 1h タブから 4h タブへ
+    raw = copy.deepcopy(raw)
+    for d in raw[ticker].values():
+        if d.get('interval_s') == 3600:
+            d['interval_s'] = 14400
+    assert ranker.update(raw) == 1
+    assert _tab_of(ranker, ticker) == ["4h"]
+
+    # 片側だけ 8h → 4h タブから外れる（最良ペアが変わればその周期のタブへ）
+    raw = copy.deepcopy(raw)
+    raw[ticker][ranker.best[ticker]['ex1']]['interval_s'] = 28800
+    ranker.update(raw)
+    best = ranker.best[ticker]
+    assert _tab_of(ranker, ticker) == [tab for tab, sec in arb_engine.CYCLES.items()
+                                       if best['i1'] == best['i2'] == sec]
+    assert ticker in ranker.indexes["all"]
+    for tab in ("all",) + tuple(arb_engine.CYCLES):
+        assert _top(ranker, tab, K) == _recompute(raw, arb_engine.simultaneous_pairs, tab, K)
+
+
+def test_single_ranker_matches_full_recompute(make_raw):
+    rng = random.Random(1)
+    ranker = SingleRanker(EXCHANGES, LEVS, "hold")
+    raw = make_raw(seed=13)
+
+    for step in range(4):
+        if step:
+            raw = _mutate(raw, rng)
+        ranker.update(raw)
+        for ex in EXCHANGES:
+            quotes = [(t, exs[ex]) for t, exs in raw.items() if ex in exs]
+            by_rate = sorted((abs(d['rate']) for _, d in quotes), reverse=True)[:K]
+            by_time = sorted(d['remaining_s'] for _, d in quotes)[:K]
+            assert [r['abs_rate'] for r in ranker.top(ex, K, by="rate")] == by_rate
+            assert [r['remaining_s'] for r in ranker.top(ex, K, by="time")] == by_time
+            assert {r['ticker'] for r in ranker.top(ex, len(quotes) + 1)} == {t for t, _ in quotes}
+
+
+def test_topk_index_compaction_keeps_order():
+    rng = random.Random(2)
+    index = TopKIndex()
+    scores = {}
+    for _ in range(5000):
+        key = f"k{rng.randrange(50)}"
+        scores[key] = rng.uniform(-1, 1)
+        index.set(key, scores[key])
+        if rng.random() < 0.05:
+            gone = f"k{rng.randrange(50)}"
+            index.discard(gone)
+            scores.pop(gone, None)
+
+    # 無効エントリは定期的に捨てられる
+    assert len(index._heap) <= 2 * len(index) + 64
+    assert len(index) == len(scores)
+    expected = sorted(scores, key=scores.get)
+    assert index.top(10) == expected[:10]
+    assert index.top(len(scores) + 5) == expected
+    # top は取り出した分を戻すので、繰り返しても同じ
+    assert index.top(10) == expected[:10]
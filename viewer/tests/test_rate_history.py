@@ -0,0 +1,82 @@
+import glob
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from modules import rate_history
+
+NOW = datetime(2026, 3, 2, 12, 0)
+# 8h サイクルの確定時刻（NOW より前の4回 + まだ来ていない1回）
+SETTLES = [int((datetime(2026, 3, 2, 1, 0) + timedelta(hours=h)).timestamp()) for h in (-16, -8, 0, 8, 16)]
+
+
+def _raw(rate, remaining_s, symbols=("BTC",)):
+    return {sym: {"Bybit": {'rate': rate, 'p': 100.0, 'v': 1.0, 'interval_s': 28800, 'remaining_s': remaining_s},
+                  "OKX": {'rate': -rate, 'p': 100.0, 'v': 1.0, 'interval_s': 28800, 'remaining_s': remaining_s}}
+            for sym in symbols}
+
+
+def _record_settles(recorder):
+    """確定ごとに 10分前・1分前の2回観測（1分前の金利 = 確定の番号）"""
+    for k, settle in enumerate(SETTLES):
+        for before, rate in ((600, -1.0), (60, float(k))):
+            ts = settle - before
+            if ts > NOW.timestamp():
+                continue
+            recorder.record(_raw(rate, before), ts=ts)
+    recorder.flush()
+
+
+def test_last_settlements_picks_last_observation_before_each_settle(tmp_path):
+    _record_settles(rate_history.RateHistoryRecorder(root=str(tmp_path), flush_every=100))
+
+    df = rate_history.last_settlements(n=10, now=NOW, root=str(tmp_path))
+
+    bybit = df[(df['symbol'] == "BTC") & (df['exchange'] == "Bybit")]
+    # まだ来ていない確定（SETTLES[4]）は出ない・新しい順
+    assert [int(t.timestamp()) for t in bybit['settle_time']] == SETTLES[3::-1]
+    assert bybit['rate'].tolist() == [3.0, 2.0, 1.0, 0.0]
+    okx = df[df['exchange'] == "OKX"]
+    assert okx['rate'].tolist() == [-3.0, -2.0, -1.0, -0.0]
+
+
+def test_last_settlements_limits_to_n_per_symbol_and_exchange(tmp_path):
+    _record_settles(rate_history.RateHistoryRecorder(root=str(tmp_path), flush_every=100))
+
+    df = rate_history.last_settlements(n=2, now=NOW, root=str(tmp_path))
+
+    assert len(df) == 4
+    assert df.groupby(['symbol', 'exchange']).size().tolist() == [2, 2]
+    assert df[df['exchange'] == "Bybit"]['rate'].tolist() == [3.0, 2.0]
+
+
+def test_compact_day_merges_parts_with_existing_day_file(tmp_path):
+    root = str(tmp_path)
+    day = datetime(2026, 3, 1)
+    recorder = rate_history.RateHistoryRecorder(root=root, flush_every=100)
+    first = [int((day + timedelta(hours=h)).timestamp()) for h in (1, 2, 3)]
+    second = [int((day + timedelta(hours=h)).timestamp()) for h in (4, 5)]
+
+    for ts in first:
+        recorder.record(_raw(0.01, 600, symbols=("BTC", "ETH")), ts=ts)
+    recorder.flush()  # 過去の日なのでそのまま day.parquet に圧縮される
+    day_dir = os.path.join(root, "date=2026-03-01")
+    assert os.listdir(day_dir) == ["day.parquet"]
+
+    for ts in second:
+        recorder.record(_raw(0.02, 600, symbols=("BTC", "ETH")), ts=ts)
+    recorder.flush()
+
+    assert glob.glob(os.path.join(day_dir, "part-*.parquet")) == []
+    df = rate_history.load_history(root=root)
+    assert len(df) == len(first + second) * 4
+    assert df['ts'].is_monotonic_increasing
+    assert sorted(df['ts'].unique().tolist()) == first + second
+    assert rate_history.compact_day("2026-03-01", root) is None  # part がなければ何もしない
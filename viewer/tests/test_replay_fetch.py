@@ -0,0 +1,103 @@
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('streamlit')
+
+from modules import data_api, exchange_clients
+from replay_harness import FaultProfile, ReplayServer, replay_exchanges, synthetic_fixtures
+
+# テスト中は取引所のタイムアウトを短くする（接続秒, 全体秒）
+TIMEOUT_S = 0.5
+TIMEOUTS = {ex: (TIMEOUT_S, TIMEOUT_S) for ex in data_api.EXCHANGES}
+CYCLE_MASTERS = {"Bitget": {}, "MEXC": {}}
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cwd(tmp_path, monkeypatch):
+    # サイクルマスター（cycle_store）はテストごとの一時ディレクトリに作る
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def fixtures():
+    return synthetic_fixtures(n_symbols=200, seed=1)
+
+
+@pytest.fixture
+def server(fixtures):
+    profiles = {ex: FaultProfile(latency_s=0.02, jitter_s=0.01) for ex in fixtures}
+    with ReplayServer(fixtures, profiles) as srv:
+        with replay_exchanges(srv, timeouts=TIMEOUTS):
+            yield srv
+
+
+def _snapshot():
+    t_start = time.perf_counter()
+    data, status = data_api.collect_snapshot(CYCLE_MASTERS, datetime.now())
+    return data, status, time.perf_counter() - t_start
+
+
+def _listed(fixtures, exchange):
+    if exchange == "MEXC":
+        return {x['symbol'].split('_')[0] for x in fixtures["MEXC"]["ticker"]["data"]}
+    if exchange == "Bitget":
+        return {x['symbol'].replace('USDT', '') for x in fixtures["Bitget"]["tickers"]["data"]}
+    if exchange == "BingX":
+        return {x['symbol'].split('-')[0] for x in fixtures["BingX"]["premiumIndex"]["data"]}
+    return {x['ticker'] for x in fixtures["Variational"]["stats"]["listings"]}
+
+
+def test_replay_serves_all_exchanges(server, fixtures):
+    data, status, _ = _snapshot()
+
+    for ex in data_api.EXCHANGES:
+        assert status[ex]['state'] == "🟢"
+        listed = _listed(fixtures, ex)
+        assert {sym for sym, quotes in data.items() if ex in quotes} == listed
+    assert server.hits["BingX"] == 2  # ticker と premiumIndex
+
+
+def test_slow_exchange_does_not_stall_others(server, fixtures):
+    server.set_profile("MEXC", FaultProfile(hang_s=30.0))
+
+    data, status, elapsed = _snapshot()
+
+    assert status["MEXC"]['state'] == "🔴"
+    assert not any("MEXC" in quotes for quotes in data.values())
+    for ex in ("BingX", "Bitget", "Variational"):
+        assert status[ex]['state'] == "🟢"
+    # 遅い取引所のタイムアウトぶんしか待たない
+    assert elapsed < TIMEOUT_S + 0.5
+
+
+def test_stale_exchange_is_served_from_cache_without_waiting(server, fixtures, monkeypatch):
+    _snapshot()
+    server.set_profile("MEXC", FaultProfile(hang_s=30.0))
+    # TTL 切れ: 古い値をすぐ返し、裏で再取得する
+    monkeypatch.setitem(exchange_clients.EXCHANGE_TTLS, "MEXC", 0)
+
+    data, status, elapsed = _snapshot()
+
+    assert status["MEXC"]['state'] == "🟢"
+    assert status["MEXC"]['stale'] is True
+    assert sum("MEXC" in quotes for quotes in data.values()) == len(_listed(fixtures, "MEXC"))
+    assert elapsed < TIMEOUT_S
+
+
+def test_injected_failure_marks_only_that_exchange(server):
+    server.set_profile("Bitget", FaultProfile(fail_rate=1.0))
+
+    data, status, elapsed = _snapshot()
+
+    assert status["Bitget"]['state'] == "🔴"
+    for ex in ("MEXC", "BingX", "Variational"):
+        assert status[ex]['state'] == "🟢"
+    assert elapsed < TIMEOUT_S
+
@@ -0,0 +1,117 @@
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+import pytest
+
+from modules import settlement_calendar
+from modules.settlement_calendar import SettlementCalendar, hour_from_epoch_ms, interval_to_sched_hours
+
+CYCLES = ["1h", "4h", "8h", "12h", None]
+
+
+# --- カレンダー導入前の data_api の実装（datetime.replace で候補を探す） ---
+
+def old_interval_to_sched_hours(interval):
+    if interval == "1h": return list(range(24))
+    if interval == "4h": return [1, 5, 9, 13, 17, 21]
+    return [1, 9, 17]
+
+
+def old_calc_next_settle_epoch_from_sched(sched_hours, now_dt):
+    candidates = []
+    for h in sched_hours:
+        candidates.append(now_dt.replace(hour=h, minute=0, second=0, microsecond=0))
+    future = [c for c in candidates if c > now_dt]
+    if future:
+        nxt = min(future)
+    else:
+        base = (now_dt + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        nxt = base.replace(hour=min(sched_hours))
+    return int(nxt.timestamp())
+
+
+def old_remaining_s(cycle, now_dt):
+    nxt = old_calc_next_settle_epoch_from_sched(old_interval_to_sched_hours(cycle), now_dt)
+    return max(0, nxt - int(now_dt.timestamp()))
+
+
+def old_normalize_time(time_input, exchange_name, cycle_hint, now_h):
+    sched = [1, 9, 17]
+    if exchange_name == "BingX":
+        sched = [1, 5, 9, 13, 17, 21]
+    if cycle_hint:
+        if cycle_hint == '1h': sched = list(range(24))
+        elif cycle_hint == '4h': sched = [1, 5, 9, 13, 17, 21]
+        elif cycle_hint == '8h': sched = [1, 9, 17]
+    def get_fallback():
+        return next((h for h in sched if h > now_h), sched[0])
+    try:
+        if not time_input or time_input == 0: return get_fallback()
+        if isinstance(time_input, (int, float)):
+            if time_input < 1000000: return get_fallback()
+            dt = pd.to_datetime(time_input, unit='ms')
+        else:
+            dt = pd.to_datetime(time_input)
+        hour = (dt + timedelta(hours=9)).hour
+        if exchange_name == "MEXC" and not cycle_hint:
+            return int(min([1, 9, 17], key=lambda x: abs(x - hour)))
+        return int(hour)
+    except Exception:
+        return get_fallback()
+
+
+def _random_times(n, seed):
+    """ランダムな時刻 + 配布の直前・ちょうど・直後・日付の変わり目"""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    times = [base + timedelta(seconds=rng.randrange(400 * 86400), microseconds=rng.randrange(10**6))
+             for _ in range(n)]
+    for h in range(24):
+        at = base.replace(hour=h) + timedelta(days=rng.randrange(400))
+        times += [at - timedelta(seconds=1), at, at + timedelta(microseconds=1), at + timedelta(seconds=59)]
+    return times
+
+
+@pytest.mark.parametrize("cycle", ["1h", "4h", "8h", "12h"])
+def test_next_epoch_and_remaining_match_replace_search(cycle):
+    sched = interval_to_sched_hours(cycle)
+    assert sched == old_interval_to_sched_hours(cycle)
+    for now_dt in _random_times(800, seed=len(cycle)):
+        cal = SettlementCalendar(now_dt)
+        assert cal.next_epoch_for_hours(sched) == old_calc_next_settle_epoch_from_sched(sched, now_dt), now_dt
+        assert cal.remaining_s(cycle, now_dt) == old_remaining_s(cycle, now_dt), now_dt
+
+
+def test_calendar_is_reused_within_a_minute():
+    now_dt = datetime(2026, 3, 2, 8, 59, 10)
+    cal = settlement_calendar.get_calendar(now_dt)
+    later = now_dt + timedelta(seconds=45)
+    assert settlement_calendar.get_calendar(later) is cal
+    # 同じ1分の中では次の配布は同じで、残り秒数だけ減る
+    assert cal.remaining_s("1h", later) == old_remaining_s("1h", later) == 5
+    assert settlement_calendar.get_calendar(now_dt + timedelta(minutes=1)) is not cal
+
+
+def test_normalize_time_matches_old_helper():
+    rng = random.Random(4)
+    inputs = [None, 0, 0.0, 500, 999999, "", "garbage", "2026-03-02T10:00:00", "2026-03-02 23:30:00+00:00"]
+    for now_dt in rng.sample(_random_times(30, seed=5), 40):
+        cal = SettlementCalendar(now_dt)
+        ms = int(now_dt.timestamp() * 1000) + rng.randrange(-10**8, 10**8)
+        for time_input in inputs + [ms, float(ms), ms // 3600000 * 3600000]:
+            for exchange in ("MEXC", "BingX", "Bitget"):
+                for hint in CYCLES:
+                    assert cal.normalize_time(time_input, exchange, hint) == \
+                        old_normalize_time(time_input, exchange, hint, now_dt.hour), (now_dt, time_input, exchange, hint)
+
+
+def test_hour_from_epoch_ms_matches_pandas():
+    rng = random.Random(6)
+    for _ in range(5000):
+        ms = rng.randrange(1_600_000_000_000, 1_900_000_000_000)
+        assert hour_from_epoch_ms(ms) == (pd.to_datetime(ms, unit='ms') + timedelta(hours=9)).hour